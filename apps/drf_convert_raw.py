@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2017 Massachusetts Institute of Technology
+#
+"""Package raw segments from digital_rf_sink into Digital RF files."""
+from __future__ import print_function
+
+import sys
+import os
+import json
+import shutil
+import time
+import multiprocessing
+import numpy as np
+from argparse import ArgumentParser
+
+# the DigitalRFWriter arguments used here are those of digital_rf >= 2
+from digital_rf import DigitalRFWriter
+
+# index records written by raw_writer, in native byte order
+RUN_DTYPE = np.dtype([('start', 'u8'), ('nitems', 'u8'), ('offset', 'u8')])
+# offset of a run of zeros, which has no data in the .raw file
+ZEROS = 2**64 - 1
+# samples handed to the writer at a time
+CHUNK_ITEMS = 1 << 22
+
+
+def read_properties(rawdir):
+    """Read the channel description written by the sink."""
+    with open(os.path.join(rawdir, 'properties.json')) as f:
+        props = json.load(f)
+    comp = np.dtype(str(props['dtype']))
+    if props['is_complex']:
+        props['sample_dtype'] = np.dtype([('r', comp), ('i', comp)])
+    else:
+        props['sample_dtype'] = comp
+    props['item_size'] = (
+        props['sample_dtype'].itemsize*props['num_subchannels']
+    )
+    return props
+
+
+def complete_segments(rawdir):
+    """Names of the segments in rawdir whose index has been written."""
+    return sorted(
+        f[:-4] for f in os.listdir(rawdir)
+        if f.endswith('.idx') and not f.startswith('.')
+    )
+
+
+def _items(props, n):
+    if props['num_subchannels'] > 1:
+        return (n, props['num_subchannels'])
+    return (n,)
+
+
+def _move_tree(src, dst):
+    """Move the files of a Digital RF directory into another."""
+    for name in os.listdir(src):
+        path = os.path.join(src, name)
+        if not os.path.isdir(path):
+            # drf_properties.h5 is the same for every segment
+            os.rename(path, os.path.join(dst, name))
+            continue
+        if not os.path.isdir(os.path.join(dst, name)):
+            try:
+                os.makedirs(os.path.join(dst, name))
+            except OSError:
+                # created by another process in the meantime
+                pass
+        for f in os.listdir(path):
+            os.rename(os.path.join(path, f), os.path.join(dst, name, f))
+
+
+def convert_segment(task):
+    """Write one raw segment as a Digital RF file in its channel.
+
+    Runs in a pool process. Returns the segment and an error message, or
+    None if it was converted.
+
+    """
+    chdir, name, props, keep = task
+    rawdir = os.path.join(chdir, 'raw')
+    rawpath = os.path.join(rawdir, name + '.raw')
+    idxpath = os.path.join(rawdir, name + '.idx')
+    # the writer's own directory, moved into the channel when complete
+    tmpdir = os.path.join(rawdir, '.' + name)
+    try:
+        runs = np.fromfile(idxpath, dtype=RUN_DTYPE)
+        if len(runs) > 0:
+            if os.path.exists(tmpdir):
+                shutil.rmtree(tmpdir)
+            os.makedirs(tmpdir)
+            data = None
+            if os.path.getsize(rawpath) > 0:
+                data = np.memmap(
+                    rawpath, dtype=props['sample_dtype'], mode='r',
+                    shape=_items(
+                        props, os.path.getsize(rawpath)//props['item_size'],
+                    ),
+                )
+            start = int(runs['start'][0])
+            writer = DigitalRFWriter(
+                tmpdir, str(props['dtype']), props['subdir_cadence_secs'],
+                props['file_cadence_millisecs'], start,
+                props['sample_rate_numerator'],
+                props['sample_rate_denominator'], str(props['uuid_str']),
+                props['compression_level'], props['checksum'],
+                props['is_complex'], props['num_subchannels'],
+                props['is_continuous'], False,
+            )
+            for run in runs:
+                offset = int(run['offset'])
+                first = offset//props['item_size']
+                for k in range(0, int(run['nitems']), CHUNK_ITEMS):
+                    n = min(CHUNK_ITEMS, int(run['nitems']) - k)
+                    if offset == ZEROS:
+                        arr = np.zeros(
+                            _items(props, n), dtype=props['sample_dtype'],
+                        )
+                    else:
+                        arr = np.ascontiguousarray(
+                            data[first + k:first + k + n],
+                        )
+                    index = int(run['start']) - start + k
+                    if props['is_continuous']:
+                        writer.rf_write(arr, index)
+                    else:
+                        writer.rf_write_blocks(arr, [index], [0])
+            writer.close()
+            del data
+            _move_tree(tmpdir, chdir)
+            shutil.rmtree(tmpdir)
+        if not keep:
+            os.remove(rawpath)
+            os.remove(idxpath)
+    except Exception as e:
+        return (chdir, name, str(e))
+    return (chdir, name, None)
+
+
+def convert(chdirs, jobs=None, follow=False, interval=1.0, keep=False,
+            verbose=True):
+    """Convert the raw segments of each channel directory in chdirs.
+
+    With follow, keep converting segments as they are finished until every
+    channel's recording has stopped. Returns the number of segments that
+    failed to convert.
+
+    """
+    pool = multiprocessing.Pool(jobs)
+    props = {}
+    done = set()
+    failed = 0
+    try:
+        while True:
+            # checked first so no segment finished before the stop is missed
+            stopped = all(
+                os.path.exists(os.path.join(ch, 'raw', 'stopped'))
+                for ch in chdirs
+            )
+            tasks = []
+            for ch in chdirs:
+                rawdir = os.path.join(ch, 'raw')
+                if ch not in props:
+                    if not os.path.exists(
+                        os.path.join(rawdir, 'properties.json')
+                    ):
+                        # the sink hasn't started writing this channel yet
+                        continue
+                    props[ch] = read_properties(rawdir)
+                tasks.extend(
+                    (ch, name, props[ch], keep)
+                    for name in complete_segments(rawdir)
+                    if (ch, name) not in done
+                )
+            for ch, name, err in pool.imap_unordered(convert_segment, tasks):
+                done.add((ch, name))
+                if err is not None:
+                    failed += 1
+                    print('{0}/{1}: {2}'.format(ch, name, err),
+                          file=sys.stderr)
+                elif verbose:
+                    print('{0}/{1}'.format(ch, name))
+            if not follow or (stopped and not tasks):
+                break
+            if not tasks:
+                time.sleep(interval)
+    finally:
+        pool.close()
+        pool.join()
+    return failed
+
+
+if __name__ == '__main__':
+    desc = '''Package the raw segments recorded by digital_rf_sink with raw
+              capture enabled into Digital RF files in the same channel
+              directories, converting segments in parallel.'''
+    parser = ArgumentParser(description=desc)
+    parser.add_argument(
+        'chdirs', nargs='+',
+        help='''Channel directories, each holding a "raw" directory.''',
+    )
+    parser.add_argument(
+        '-j', '--jobs', dest='jobs', default=None, type=int,
+        help='''Number of segments to convert at once.
+                (default: number of CPUs)''',
+    )
+    parser.add_argument(
+        '-f', '--follow', dest='follow', action='store_true',
+        help='''Convert segments as they are finished until the recording
+                stops. (default: False)''',
+    )
+    parser.add_argument(
+        '--interval', dest='interval', default=1.0, type=float,
+        help='''Seconds between checks for new segments when following.
+                (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--keep', dest='keep', action='store_true',
+        help='''Keep raw segments after converting them. (default: False)''',
+    )
+    parser.add_argument(
+        '-q', '--quiet', dest='verbose', action='store_false',
+        help='''Don't list converted segments. (default: False)''',
+    )
+    op = parser.parse_args()
+
+    sys.exit(1 if convert(**vars(op)) else 0)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2017 Massachusetts Institute of Technology
+#
+"""Benchmark digital_rf_sink settings by writing synthetic data."""
+from __future__ import print_function
+
+import sys
+import os
+import re
+import shutil
+import time
+import itertools
+from argparse import ArgumentParser
+from subprocess import CalledProcessError, call, check_output
+from gnuradio import blocks
+from gnuradio import gr
+
+import gr_drf
+
+try:
+    from digital_rf import DigitalRFReader as DRFReader
+except ImportError:
+    try:
+        from digital_rf_hdf5 import read_hdf5 as DRFReader
+    except ImportError:
+        DRFReader = None
+
+
+def file_extents(path):
+    """Number of extents of a file according to filefrag, or None."""
+    try:
+        out = check_output(['filefrag', path]).decode()
+    except (OSError, CalledProcessError):
+        return None
+    m = re.search(r'(\d+) extents? found', out)
+    if m is None:
+        return None
+    return int(m.group(1))
+
+
+def channel_extents(chdir):
+    """Mean and most extents of the Digital RF files in chdir."""
+    counts = []
+    for root, dirs, files in os.walk(chdir):
+        for f in files:
+            if f.startswith('rf@') and f.endswith('.h5'):
+                n = file_extents(os.path.join(root, f))
+                if n is not None:
+                    counts.append(n)
+    if not counts:
+        return (None, None)
+    return (float(sum(counts))/len(counts), max(counts))
+
+
+def drop_cache(chdir):
+    """Drop the files in chdir from the page cache, so reads hit the disk."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for root, dirs, files in os.walk(chdir):
+        for f in files:
+            fd = os.open(os.path.join(root, f), os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def read_rate(op, outdir):
+    """MB/s reading every channel back in op.read_items blocks, or NaN."""
+    if DRFReader is None:
+        return float('nan')
+    for k in range(op.channels):
+        drop_cache(os.path.join(outdir, 'ch{0}'.format(k)))
+    reader = DRFReader(outdir)
+    nbytes = 0
+    t0 = time.time()
+    for k in range(op.channels):
+        ch = 'ch{0}'.format(k)
+        start, end = reader.get_bounds(ch)
+        for s in range(start, end + 1, op.read_items):
+            n = min(op.read_items, end + 1 - s)
+            nbytes += reader.read_vector_raw(s, n, ch).nbytes
+    return nbytes/(time.time() - t0)/1e6
+
+
+def run(op, settings, outdir):
+    """Write op.samples samples to each of op.channels channels.
+
+    settings maps sink setters, without "set_", to their arguments. Returns
+    a dict of results.
+
+    """
+    itemsize = op.sample_size*op.vlen
+    fg = gr.top_block()
+    sinks = []
+    for k in range(op.channels):
+        src = blocks.null_source(itemsize)
+        head = blocks.head(itemsize, op.samples)
+        dst = gr_drf.digital_rf_sink(
+            os.path.join(outdir, 'ch{0}'.format(k)), op.sample_size,
+            op.subdir_cadence_s, op.file_cadence_ms, op.samplerate, 1,
+            'bench', True, op.vlen, False, True, op.compression_level,
+            False,
+        )
+        for name, args in settings.items():
+            getattr(dst, 'set_' + name)(*args)
+        fg.connect(src, head, dst)
+        sinks.append(dst)
+
+    t0 = time.time()
+    fg.run()
+    t1 = time.time()
+    # include writing back what is still in the page cache
+    call(['sync'])
+    t2 = time.time()
+
+    nbytes = float(op.samples*itemsize*op.channels)
+    extents = [channel_extents(os.path.join(outdir, 'ch{0}'.format(k)))
+               for k in range(op.channels)]
+    extents = [e for e in extents if e[0] is not None]
+    return dict(
+        write_rate=nbytes/(t1 - t0)/1e6,
+        sync_rate=nbytes/(t2 - t0)/1e6,
+        read_rate=read_rate(op, outdir) if op.read_items else float('nan'),
+        p99=max(s.stats().write_latency_p99 for s in sinks)*1e3,
+        max=max(s.stats().write_latency_max for s in sinks)*1e3,
+        extents=(sum(e[0] for e in extents)/len(extents)
+                 if extents else float('nan')),
+        extents_max=max(e[1] for e in extents) if extents else 0,
+        alignment=sinks[0].stats().alignment,
+    )
+
+
+def sweeps(op):
+    """Settings to compare, as dicts for run()."""
+    preallocate = dict(off=[False], on=[True], both=[False, True])
+    # each axis is a list of alternatives, an empty dict being the default
+    axes = [
+        [dict(preallocate=(p,)) for p in preallocate[op.preallocate]],
+        [{}] + [dict(writeback=(True, int(b))) for b in op.writeback],
+        [{}] + [dict(coalesce=(int(n), 1.0)) for n in op.coalesce],
+        [{}] + [dict(metadata_cache=(int(b),)) for b in op.metadata_cache],
+        [{}] + [dict(alignment=(a,)) for a in op.alignment],
+        [{}, dict(chunk_writes=(True,))] if op.chunk_writes else [{}],
+    ]
+    runs = []
+    for combo in itertools.product(*axes):
+        settings = {}
+        for alt in combo:
+            settings.update(alt)
+        runs.append(settings)
+    return runs
+
+
+def describe(settings):
+    return ' '.join(
+        '{0}={1}'.format(k, ','.join(str(a) for a in v))
+        for k, v in sorted(settings.items())
+    )
+
+
+if __name__ == '__main__':
+    desc = '''Write synthetic data with digital_rf_sink under each
+              combination of the given settings, and report write
+              throughput, write latency, file fragmentation and the
+              throughput of reading the data back.'''
+    parser = ArgumentParser(description=desc)
+    parser.add_argument(
+        'datadir',
+        help='''Directory to write to, on the file system to test.''',
+    )
+    parser.add_argument(
+        '-n', '--samples', dest='samples', default=100000000, type=int,
+        help='''Samples to write per channel. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '-c', '--channels', dest='channels', default=2, type=int,
+        help='''Channels written at once. Files of several channels
+                growing side by side fragment more. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '-r', '--samplerate', dest='samplerate', default=10000000, type=int,
+        help='''Sample rate in Hz, which sets the file size.
+                (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--sample_size', dest='sample_size', default=4, type=int,
+        help='''Bytes per complex sample. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--vlen', dest='vlen', default=1, type=int,
+        help='''Subchannels per sample. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--file_cadence_ms', dest='file_cadence_ms', default=1000, type=int,
+        help='''Milliseconds of data per file. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--subdir_cadence_s', dest='subdir_cadence_s', default=3600,
+        type=int,
+        help='''Seconds of data per subdirectory. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '-z', '--compression_level', dest='compression_level', default=0,
+        type=int,
+        help='''HDF5 compression level. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--preallocate', dest='preallocate', default='both',
+        choices=['off', 'on', 'both'],
+        help='''Preallocation settings to run. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--writeback', dest='writeback', action='append', default=[],
+        type=float,
+        help='''Also run with writeback of closed files, writing back the
+                open file every this many bytes (0 for only closed files).
+                Can be given more than once. (default: none)''',
+    )
+    parser.add_argument(
+        '--coalesce', dest='coalesce', action='append', default=[],
+        type=float,
+        help='''Also run gathering this many samples per HDF5 write. Can
+                be given more than once. (default: none)''',
+    )
+    parser.add_argument(
+        '--metadata_cache', dest='metadata_cache', action='append',
+        default=[], type=float,
+        help='''Also run with this fixed HDF5 metadata cache size in
+                bytes. Can be given more than once. (default: none)''',
+    )
+    parser.add_argument(
+        '--alignment', dest='alignment', action='append', default=[],
+        type=int,
+        help='''Also run with writes aligned to this many bytes, -1 for the
+                file system's stripe size. Only gathered writes are
+                aligned, so give --coalesce too. Can be given more than
+                once. (default: none)''',
+    )
+    parser.add_argument(
+        '--chunk_writes', dest='chunk_writes', action='store_true',
+        help='''Also run with writes gathered into whole HDF5 chunks. Give
+                --coalesce too. (default: False)''',
+    )
+    parser.add_argument(
+        '--read_items', dest='read_items', default=1000000, type=int,
+        help='''Samples per read when reading the data back, as a
+                time-major reader would. 0 skips reading back.
+                (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--keep', dest='keep', action='store_true',
+        help='''Keep the data written by each run. (default: False)''',
+    )
+    op = parser.parse_args()
+
+    print('{0:>10} {1:>10} {2:>10} {3:>9} {4:>9} {5:>8} {6:>8}  '
+          '{7}'.format(
+              'write MB/s', 'sync MB/s', 'read MB/s', 'p99 ms', 'max ms',
+              'extents', 'most', 'settings',
+          ))
+    for n, settings in enumerate(sweeps(op)):
+        outdir = os.path.join(op.datadir, 'run{0}'.format(n))
+        if os.path.exists(outdir):
+            shutil.rmtree(outdir)
+        res = run(op, settings, outdir)
+        if 'alignment' in settings:
+            # show the size detected for -1
+            settings['alignment'] = (res['alignment'],)
+        print('{0:10.1f} {1:10.1f} {2:10.1f} {3:9.2f} {4:9.2f} {5:8.1f} '
+              '{6:8d}  {7}'.format(
+                  res['write_rate'], res['sync_rate'], res['read_rate'],
+                  res['p99'], res['max'], res['extents'],
+                  res['extents_max'], describe(settings),
+              ))
+        sys.stdout.flush()
+        if not op.keep:
+            shutil.rmtree(outdir)
@@ -11,6 +11,7 @@ import math
 import re
 import time
 import datetime
+import threading
 import dateutil.parser
 import pytz
 import uuid
@@ -39,8 +40,18 @@ class Thor(object):
         dev_args=['recv_buff_size=100000000', 'num_recv_frames=512'],
         stream_args=[],
         sync=True, sync_source='external',
-        stop_on_dropped=False, realtime=False,
+        stop_on_dropped=False, continuous=True, realtime=False,
         file_cadence_ms=1000, subdir_cadence_s=3600, metadata={}, uuid=None,
+        compression_level=0, checksum=False,
+        async_buffers=0, async_buffer_items=1000000, lookahead=False,
+        close_queue=0, coalesce_items=0, coalesce_delay=0.1,
+        writer_threads=0, worker_buffers=0, trace=None,
+        ringbuffer_size=0, ringbuffer_duration=0,
+        staging_dir=None, staging_rate=0, raw_capture=False,
+        stripe_dirs=[], stripe_files=False, preallocate=False,
+        writeback=False, writeback_bytes=0, metadata_cache=0, alignment=0,
+        chunk_writes=False, adapt_max_lag=0,
+        perf_log=None, perf_interval=1.0,
         verbose=True, test_settings=True,
     ):
         options = locals()
@@ -154,6 +165,12 @@ class Thor(object):
                    channel names provided'''
             )
 
+        # raw segments are always written to the channel directory
+        if op.raw_capture and op.stripe_files and op.stripe_dirs:
+            raise ValueError(
+                'Raw capture cannot be combined with striping files.'
+            )
+
         return op
 
     def _usrp_setup(self):
@@ -222,6 +239,97 @@ class Thor(object):
                     raise ValueError(errstr)
         return u
 
+    def _stripe_channels(self):
+        """Spread channel directories over the data and stripe roots.
+
+        Channels not placed in the data directory get a symbolic link there
+        to their directory, so it still holds every channel.
+
+        """
+        op = self.op
+        roots = [op.datadir] + op.stripe_dirs
+        for k, ch in enumerate(op.chs):
+            root = roots[k % len(roots)]
+            if root == op.datadir:
+                continue
+            chdir = os.path.abspath(os.path.join(root, ch))
+            if not os.path.isdir(chdir):
+                os.makedirs(chdir)
+            link = os.path.join(op.datadir, ch)
+            if os.path.islink(link):
+                os.remove(link)
+            elif os.path.exists(link):
+                raise ValueError(
+                    '{0} exists, cannot link it to {1}'.format(link, chdir)
+                )
+            os.symlink(chdir, link)
+
+    @staticmethod
+    def _perf_sample(blocks):
+        """Return the current performance counters of a channel's blocks."""
+        tps = gr.high_res_timer_tps()
+        nan = float('nan')
+        sample = []
+        for name, blk, inport, outport in blocks:
+            sample.append((
+                name,
+                1e6*blk.pc_work_time_avg()/tps,
+                blk.pc_noutput_items_avg(),
+                nan if inport is None
+                else blk.pc_input_buffers_full_avg(inport),
+                nan if outport is None
+                else blk.pc_output_buffers_full_avg(outport),
+            ))
+        return sample
+
+    def _perf_log(self, chains, stop, totals):
+        """Write performance counters to the perf log until stopped."""
+        op = self.op
+        with open(op.perf_log, 'w') as f:
+            f.write(
+                'time,channel,block,work_us,noutput_items,in_full,out_full\n'
+            )
+            while not stop.wait(op.perf_interval):
+                t = time.time()
+                for ch, blocks in zip(op.chs, chains):
+                    for row in self._perf_sample(blocks):
+                        f.write(
+                            '{0:.3f},{1},{2},{3:.1f},{4:.0f},{5:.3f},{6:.3f}'
+                            '\n'.format(t, ch, *row)
+                        )
+                        # sums for the summary, with the number of samples
+                        tot = totals.setdefault((ch, row[0]), [0.0]*5)
+                        for n, v in enumerate(row[1:] + (1,)):
+                            tot[n] += v
+                f.flush()
+
+    def _perf_summary(self, chains, totals):
+        """Print mean counters and the likely bottleneck of each channel."""
+        op = self.op
+        if not any(tot[0] or tot[1] for tot in totals.values()):
+            print('Note: performance counters read zero, check that this '
+                  'GNU Radio was built with them')
+        for ch, blocks in zip(op.chs, chains):
+            print('---- {0} performance '.format(ch).ljust(78, '-'))
+            bottleneck = 'none, no input buffer is over half full'
+            most_full = 0.5
+            for name, blk, inport, outport in blocks:
+                tot = totals.get((ch, name))
+                if tot is None:
+                    continue
+                work, nitems, infull, outfull = [v/tot[4] for v in tot[:4]]
+                print(
+                    '  {0:<6} work {1:10.1f} us  items {2:9.0f}  in {3:6.1%}'
+                    '  out {4:6.1%}'.format(
+                        name, work, nitems, infull, outfull,
+                    )
+                )
+                # a block that can't keep up leaves its input buffer full
+                if inport is not None and infull > most_full:
+                    bottleneck = name
+                    most_full = infull
+            print('  Bottleneck: {0}'.format(bottleneck))
+
     def run(self, starttime=None, endtime=None, duration=None, period=10):
         op = self.op
 
@@ -262,6 +370,12 @@ class Thor(object):
             if (et < time.time() + 5) or (st is not None and et <= st):
                 raise ValueError('End time is before launch time!')
 
+        if op.perf_log is not None:
+            # the scheduler only keeps performance counters when enabled;
+            # the preferences were read when gnuradio was imported, so an
+            # environment variable set here would come too late
+            gr.prefs().singleton().set_bool('PerfCounters', 'on', True)
+
         if op.realtime:
             r = gr.enable_realtime_scheduling()
 
@@ -275,6 +389,8 @@ class Thor(object):
         # to launch
         if not os.path.isdir(op.datadir):
             os.makedirs(op.datadir)
+        if op.stripe_dirs and not op.stripe_files:
+            self._stripe_channels()
 
         # wait for the start time if it is not past
         while (st is not None) and (st - time.time()) > 10:
@@ -332,15 +448,36 @@ class Thor(object):
 
         # populate flowgraph one channel at a time
         fg = gr.top_block()
-        for k in range(op.nchs):
-            # create digital RF sink
-            chdir = os.path.join(op.datadir, op.chs[k])
-            dst = gr_drf.digital_rf_sink(
-                chdir, sample_size, op.subdir_cadence_s, op.file_cadence_ms,
+        sinks = []
+        # (name, block, input port, output port) along each channel
+        chains = []
+        if op.writer_threads > 0:
+            # one sink writes all channels from a shared pool of threads
+            chdirs = [os.path.join(op.datadir, ch) for ch in op.chs]
+            multi_dst = gr_drf.digital_rf_multi_sink(
+                chdirs, sample_size, op.subdir_cadence_s, op.file_cadence_ms,
                 samplerate_num_out, samplerate_den_out,
                 op.uuid, True, 1,
-                op.stop_on_dropped,
+                op.stop_on_dropped, op.continuous, op.compression_level,
+                op.checksum, op.writer_threads,
             )
+            sinks.append(multi_dst)
+        for k in range(op.nchs):
+            if op.writer_threads > 0:
+                dst = multi_dst
+                dst_port = k
+            else:
+                # create digital RF sink
+                chdir = os.path.join(op.datadir, op.chs[k])
+                dst = gr_drf.digital_rf_sink(
+                    chdir, sample_size, op.subdir_cadence_s,
+                    op.file_cadence_ms, samplerate_num_out,
+                    samplerate_den_out, op.uuid, True, 1,
+                    op.stop_on_dropped, op.continuous, op.compression_level,
+                    op.checksum,
+                )
+                dst_port = 0
+                sinks.append(dst)
 
             if op.dec > 1:
                 # create low-pass filter
@@ -349,14 +486,61 @@ class Thor(object):
                 )
 
                 # connections for usrp->lpf->drf
-                connections = ((u, k), (lpf, 0), (dst, 0))
+                connections = ((u, k), (lpf, 0), (dst, dst_port))
+                chains.append((
+                    ('usrp', u, None, k), ('lpf', lpf, 0, 0),
+                    ('sink', dst, dst_port, None),
+                ))
             else:
                 # connections for usrp->drf
-                connections = ((u, k), (dst, 0))
+                connections = ((u, k), (dst, dst_port))
+                chains.append((
+                    ('usrp', u, None, k), ('sink', dst, dst_port, None),
+                ))
 
             # make channel connections in flowgraph
             fg.connect(*connections)
 
+        for dst in sinks:
+            if op.async_buffers > 0:
+                dst.set_async_writer(op.async_buffers, op.async_buffer_items)
+            if op.coalesce_items > 0:
+                dst.set_coalesce(op.coalesce_items, op.coalesce_delay)
+            if op.lookahead:
+                dst.set_lookahead(True)
+            if op.close_queue > 0:
+                dst.set_pipelined_close(op.close_queue)
+            if op.worker_buffers > 0:
+                dst.set_worker_process(
+                    op.worker_buffers, op.async_buffer_items,
+                )
+            if not op.verbose:
+                dst.set_quiet(True)
+            if op.trace is not None:
+                dst.set_trace(op.trace)
+            if op.ringbuffer_size > 0 or op.ringbuffer_duration > 0:
+                dst.set_ring_buffer(
+                    int(op.ringbuffer_size), op.ringbuffer_duration,
+                )
+            if op.staging_dir is not None:
+                dst.set_staging(op.staging_dir, op.staging_rate)
+            if op.raw_capture:
+                dst.set_raw_capture(True)
+            if op.stripe_files and op.stripe_dirs:
+                dst.set_stripe(op.stripe_dirs)
+            if op.preallocate:
+                dst.set_preallocate(True)
+            if op.writeback or op.writeback_bytes > 0:
+                dst.set_writeback(op.writeback, int(op.writeback_bytes))
+            if op.metadata_cache > 0:
+                dst.set_metadata_cache(int(op.metadata_cache))
+            if op.alignment != 0:
+                dst.set_alignment(op.alignment)
+            if op.chunk_writes:
+                dst.set_chunk_writes(True)
+            if op.adapt_max_lag > 0:
+                dst.set_adaptive_compression(op.adapt_max_lag)
+
         # set launch time
         if st is not None:
             lt = st
@@ -376,9 +560,26 @@ class Thor(object):
             uhd.time_spec(float(lt_secs)) + uhd.time_spec(float(lt_frac))
         )
 
+        # let the sinks create their writers before launch, predicting the
+        # first sample the same way the sink computes it from rx_time
+        start_sample = (
+            long(np.uint64(samplerate_out*lt_secs))
+            + long(np.uint64(samplerate_out*lt_frac))
+        )
+        for dst in sinks:
+            dst.set_start_sample(start_sample)
+
         # start to receive data
         fg.start()
 
+        if op.perf_log is not None:
+            perf_stop = threading.Event()
+            perf_totals = {}
+            perf_thread = threading.Thread(
+                target=self._perf_log, args=(chains, perf_stop, perf_totals),
+            )
+            perf_thread.start()
+
         # write metadata one channel at a time
         for k in range(op.nchs):
             # create metadata dir, dmd object, and write channel metadata
@@ -432,6 +633,10 @@ class Thor(object):
             pass
         fg.stop()
         fg.wait()
+        if op.perf_log is not None:
+            perf_stop.set()
+            perf_thread.join()
+            self._perf_summary(chains, perf_totals)
         print('done')
         sys.stdout.flush()
 
@@ -500,6 +705,17 @@ if __name__ == '__main__':
         help='''Do not test USRP settings until experiment start.
                 (default: False)''',
     )
+    parser.add_argument(
+        '--perf_log', dest='perf_log', default=None,
+        help='''Sample the performance counters of each block to this CSV
+                file, and print the likely bottleneck of each channel at the
+                end. (default: %(default)s)''',
+    )
+    parser.add_argument(
+        '--perf_interval', dest='perf_interval', default=1.0, type=float,
+        help='''Seconds between performance counter samples.
+                (default: %(default)s)''',
+    )
 
     dirgroup = parser.add_mutually_exclusive_group(required=True)
     dirgroup.add_argument(
@@ -585,6 +801,11 @@ if __name__ == '__main__':
         '--stop_on_dropped', dest='stop_on_dropped', action='store_true',
         help='''Stop on dropped packet. (default: %(default)s)''',
     )
+    recgroup.add_argument(
+        '--gaps', dest='continuous', action='store_false',
+        help='''Record dropped packets as gaps in the data instead of filling
+                them with zeros. (default: False)''',
+    )
     recgroup.add_argument(
         '--realtime', dest='realtime', action='store_true',
         help='''Enable realtime scheduling if possible.
@@ -628,6 +849,168 @@ if __name__ == '__main__':
         help='''Number of seconds of data per subdirectory.
                 (default: %(default)s)''',
     )
+    drfgroup.add_argument(
+        '-z', '--compression_level', dest='compression_level',
+        default=0, type=int,
+        help='''HDF5 compression level, 0-9. Use together with
+                --async_buffers to compress off the flowgraph thread.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--checksum', dest='checksum', action='store_true',
+        help='''Store a checksum with each chunk of data.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--async_buffers', dest='async_buffers',
+        default=0, type=int,
+        help='''Number of buffers for writing from a separate thread, or 0 to
+                write directly from the flowgraph. (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--async_buffer_items', dest='async_buffer_items',
+        default=1000000, type=int,
+        help='''Number of samples held by each writer buffer.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--worker_buffers', dest='worker_buffers',
+        default=0, type=int,
+        help='''Number of shared memory buffers for writing each channel
+                from a separate process, avoiding the HDF5 global lock.
+                0 writes in the recorder process. (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--ringbuffer_size', dest='ringbuffer_size',
+        default=0, type=float,
+        help='''Keep at most this many bytes per channel, deleting the
+                oldest files as new ones are written. 0 keeps everything.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--ringbuffer_duration', dest='ringbuffer_duration',
+        default=0, type=float,
+        help='''Keep at most this many seconds of data per channel,
+                deleting the oldest files as new ones are written. 0 keeps
+                everything. (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--staging_dir', dest='staging_dir',
+        default=None,
+        help='''Write each channel to a directory of the same name in this
+                directory on fast storage, and move closed files into the
+                data directory in the background. (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--staging_rate', dest='staging_rate',
+        default=0, type=float,
+        help='''Most bytes per second to copy from the staging directory
+                when it is on another file system. 0 for no limit.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--raw_capture', dest='raw_capture', action='store_true',
+        help='''Write raw sample segments to a "raw" directory in each
+                channel directory instead of Digital RF files, to be
+                packaged by drf_convert_raw.py during or after recording.
+                (default: False)''',
+    )
+    drfgroup.add_argument(
+        '--stripe', dest='stripe_dirs', action='append',
+        help='''Additional data directory, e.g. on another disk. Channels
+                are spread over the data directory and these, with links
+                to them in the data directory. Can be repeated.
+                (default: None)''',
+    )
+    drfgroup.add_argument(
+        '--stripe_files', dest='stripe_files', action='store_true',
+        help='''Spread the files of every channel round-robin over the
+                data and stripe directories instead of whole channels.
+                (default: False)''',
+    )
+    drfgroup.add_argument(
+        '--preallocate', dest='preallocate', action='store_true',
+        help='''Reserve the space for each file when it is opened, so that
+                files are not fragmented. (default: False)''',
+    )
+    drfgroup.add_argument(
+        '--writeback', dest='writeback', action='store_true',
+        help='''Write each closed file to disk and drop it from the page
+                cache in the background, instead of leaving it to the
+                kernel. (default: False)''',
+    )
+    drfgroup.add_argument(
+        '--writeback_bytes', dest='writeback_bytes',
+        default=0, type=float,
+        help='''Also write back the open file of each channel every time
+                this many bytes have been written to it. 0 leaves it to
+                the kernel. (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--metadata_cache', dest='metadata_cache',
+        default=0, type=float,
+        help='''Fixed size in bytes of each file's HDF5 metadata cache.
+                0 keeps the HDF5 default. (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--alignment', dest='alignment', default=0, type=int,
+        help='''Align the writes gathered with --coalesce_items to this
+                many bytes, e.g. the stripe size of a parallel file
+                system. -1 uses the size reported by the file system.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--chunk_writes', dest='chunk_writes', action='store_true',
+        help='''Gather the writes from --coalesce_items into whole HDF5
+                chunks. (default: False)''',
+    )
+    drfgroup.add_argument(
+        '--adapt_max_lag', dest='adapt_max_lag', default=0, type=float,
+        help='''Pick each file's compression level, up to the one given by
+                -z, from the samples queued for the writer: level 0 when
+                more than this many seconds of them are waiting. Needs
+                --async_buffers or --worker_buffers. 0 keeps the level
+                fixed. (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--trace', dest='trace',
+        default=None,
+        help='''Record a timeline of the writers to this Chrome trace
+                JSON file, written when recording stops.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--writer_threads', dest='writer_threads',
+        default=0, type=int,
+        help='''Write all channels from one sink block with this many shared
+                writer threads. 0 uses a separate sink per channel.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--coalesce_items', dest='coalesce_items',
+        default=0, type=int,
+        help='''Gather this many samples, or up to the next file boundary,
+                into each write. 0 writes input as it arrives.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--coalesce_delay', dest='coalesce_delay',
+        default=0.1, type=float,
+        help='''Longest time in seconds to hold gathered samples.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--lookahead', dest='lookahead', action='store_true',
+        help='''Create upcoming subdirectories from a helper thread.
+                (default: %(default)s)''',
+    )
+    drfgroup.add_argument(
+        '--close_queue', dest='close_queue',
+        default=0, type=int,
+        help='''Close finished files from a separate thread, allowing this
+                many files to wait to be closed. 0 closes files inline.
+                (default: %(default)s)''',
+    )
     drfgroup.add_argument(
         '--metadata', action='append', metavar='{KEY}={VALUE}',
         help='''Key, value metadata pairs to include with data.
@@ -669,6 +1052,8 @@ if __name__ == '__main__':
         op.stream_args = []
     if op.metadata is None:
         op.metadata = []
+    if op.stripe_dirs is None:
+        op.stripe_dirs = []
 
     # separate any combined arguments
     # e.g. op.mboards = ['192.168.10.2,192.168.10.3']
@@ -0,0 +1,184 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+
+#ifndef INCLUDED_GRDRF_DIGITAL_RF_MULTI_SINK_H
+#define INCLUDED_GRDRF_DIGITAL_RF_MULTI_SINK_H
+
+#include <string>
+#include <vector>
+#include <gr_drf/api.h>
+#include <gr_drf/writer_stats.h>
+#include <gnuradio/sync_block.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Write several channels in Digital RF format from one block.
+     * \ingroup drf
+     *
+     * Each input port is written to its own channel directory, as if by a
+     * separate gr_drf::digital_rf_sink with an asynchronous writer. Instead
+     * of one writer thread per channel, the channels share a pool of
+     * writer threads that serve them in turn, so that many channels on one
+     * host do not have more threads competing for the disks than there
+     * are disks to write to.
+     */
+    class GRDRF_API digital_rf_multi_sink : virtual public gr::sync_block
+    {
+     public:
+      typedef boost::shared_ptr<digital_rf_multi_sink> sptr;
+
+      /*!
+       * \brief Return a shared_ptr to a new instance of gr_drf::digital_rf_multi_sink.
+       *
+       * \param dirs Directory to write to for each input port.
+       * \param sample_size Size of the input data items.
+       * \param subdir_cadence_s Number of seconds of data per subdirectory.
+       * \param file_cadence_ms Number of milliseconds of data per file.
+       * \param sample_rate_numerator Numerator of sample rate in Hz.
+       * \param sample_rate_denominator Denominator of sample rate in Hz.
+       * \param uuid Unique ID to associate with this data, for pairing metadata.
+       * \param is_complex True if the data samples are complex.
+       * \param num_subchannels Number of subchannels (i.e. vector length).
+       * \param stop_on_dropped_packet If True, stop when a packet is dropped
+       *        on any channel.
+       * \param is_continuous If True, fill dropped samples with zeros. If
+       *        False, record each drop as a gap in the Digital RF index.
+       * \param compression_level HDF5 gzip compression level (0-9), 0 for
+       *        none.
+       * \param checksum If True, store an HDF5 Fletcher32 checksum with each
+       *        chunk.
+       * \param num_threads Number of writer threads shared by the channels.
+       */
+      static sptr make(const std::vector<std::string> &dirs,
+                       size_t sample_size,
+                       uint64_t subdir_cadence_s, uint64_t file_cadence_ms,
+                       uint64_t sample_rate_numerator,
+                       uint64_t sample_rate_denominator,
+                       char* uuid, bool is_complex,
+                       int num_subchannels, bool stop_on_dropped_packet,
+                       bool is_continuous=true, int compression_level=0,
+                       bool checksum=false, int num_threads=2);
+
+      //! Number of channels, one per input port.
+      virtual int num_channels() const = 0;
+
+      /*!
+       * \brief Create the writers in start() for a predicted first sample.
+       *
+       * See gr_drf::digital_rf_sink::set_start_sample(). The prediction
+       * applies to every channel. Must be called before the flowgraph is
+       * started.
+       */
+      virtual void set_start_sample(uint64_t start_sample) = 0;
+
+      /*!
+       * \brief Size the buffers each channel queues for the writer pool.
+       *
+       * Every channel gets a ring of \p num_buffers buffers of
+       * \p buffer_items items each; see
+       * gr_drf::digital_rf_sink::set_async_writer(). Must be called before
+       * the flowgraph is started. Defaults to 4 buffers of 262144 items.
+       *
+       * \param num_buffers Number of buffers per channel, at least 1.
+       * \param buffer_items Capacity of each buffer in items.
+       */
+      virtual void set_async_writer(int num_buffers, int buffer_items) = 0;
+
+      /*!
+       * \brief Gather input into larger writes on every channel.
+       *
+       * See gr_drf::digital_rf_sink::set_coalesce().
+       */
+      virtual void set_coalesce(int items, double max_delay) = 0;
+
+      /*!
+       * \brief Prepare upcoming files on a helper thread for every channel.
+       *
+       * See gr_drf::digital_rf_sink::set_lookahead().
+       */
+      virtual void set_lookahead(bool enable) = 0;
+
+      /*!
+       * \brief Close finished files on a separate thread for every channel.
+       *
+       * See gr_drf::digital_rf_sink::set_pipelined_close().
+       */
+      virtual void set_pipelined_close(int max_files) = 0;
+
+      /*!
+       * \brief Write each channel from its own worker process.
+       *
+       * See gr_drf::digital_rf_sink::set_worker_process(). The writer
+       * threads are not used for channels with a worker process.
+       */
+      virtual void set_worker_process(
+              int num_buffers, int buffer_items,
+              const std::string &program="gr_drf_writer") = 0;
+
+      //! See gr_drf::digital_rf_sink::set_quiet().
+      virtual void set_quiet(bool quiet) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_log_interval().
+      virtual void set_log_interval(double seconds) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_trace().
+      virtual void set_trace(const std::string &path) = 0;
+
+      /*!
+       * \brief See gr_drf::digital_rf_sink::set_ring_buffer(). The limits
+       * apply to each channel separately.
+       */
+      virtual void set_ring_buffer(uint64_t max_bytes,
+                                   double max_seconds) = 0;
+
+      /*!
+       * \brief See gr_drf::digital_rf_sink::set_staging(). Each channel
+       * stages in a directory in \p dir named like its own, so channel
+       * directories must have different names.
+       */
+      virtual void set_staging(const std::string &dir, double max_rate) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_raw_capture().
+      virtual void set_raw_capture(bool enable) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_stripe().
+      virtual void set_stripe(const std::vector<std::string> &dirs) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_preallocate().
+      virtual void set_preallocate(bool enable) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_writeback().
+      virtual void set_writeback(bool on_close, uint64_t max_dirty) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_metadata_cache().
+      virtual void set_metadata_cache(uint64_t bytes) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_alignment().
+      virtual void set_alignment(int bytes) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_chunk_writes().
+      virtual void set_chunk_writes(bool enable) = 0;
+
+      //! See gr_drf::digital_rf_sink::set_adaptive_compression().
+      virtual void set_adaptive_compression(double max_lag) = 0;
+
+      /*!
+       * \brief Statistics of \p channel's writer.
+       *
+       * See gr_drf::digital_rf_sink::stats(). ControlPort gets the totals
+       * over all channels, and for latencies, alignment, chunk size and
+       * compression level the largest of any channel.
+       */
+      virtual writer_stats stats(int channel) const = 0;
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_DIGITAL_RF_MULTI_SINK_H */
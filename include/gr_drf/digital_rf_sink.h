@@ -8,7 +8,10 @@
 #ifndef INCLUDED_GRDRF_DIGITAL_RF_SINK_H
 #define INCLUDED_GRDRF_DIGITAL_RF_SINK_H
 
+#include <string>
+#include <vector>
 #include <gr_drf/api.h>
+#include <gr_drf/writer_stats.h>
 #include <gnuradio/sync_block.h>
 
 namespace gr {
@@ -37,6 +40,14 @@ namespace gr {
        * \param is_complex True if the data samples are complex.
        * \param num_subchannels Number of subchannels (i.e. vector length).
        * \param stop_on_dropped_packet If True, stop when a packet is dropped.
+       * \param is_continuous If True, fill dropped samples with zeros. If
+       *        False, record each drop as a gap in the Digital RF index so
+       *        that a drop costs the same no matter how long it is.
+       * \param compression_level HDF5 gzip compression level (0-9), 0 for
+       *        none. Compression runs on whichever thread writes, so use it
+       *        together with set_async_writer() at high sample rates.
+       * \param checksum If True, store an HDF5 Fletcher32 checksum with each
+       *        chunk. Like compression, it is computed by the writing thread.
        *
        * To avoid accidental use of raw pointers, gr_drf::digital_rf_sink's
        * constructor is in a private implementation
@@ -48,7 +59,355 @@ namespace gr {
                        uint64_t sample_rate_numerator,
                        uint64_t sample_rate_denominator,
                        char* uuid, bool is_complex,
-                       int num_subchannels, bool stop_on_dropped_packet);
+                       int num_subchannels, bool stop_on_dropped_packet,
+                       bool is_continuous=true, int compression_level=0,
+                       bool checksum=false);
+
+      /*!
+       * \brief Create the writer in start() for a predicted first sample.
+       *
+       * Normally the writer is created from the first 'rx_time' tag inside
+       * the first call to work(), which makes that call the slowest one.
+       * With a predicted start sample the writer and its first subdirectory
+       * are created when the flowgraph starts instead, and the first tag is
+       * only checked against the prediction. The writer is recreated if
+       * the prediction turns out to be wrong.
+       *
+       * Must be called before the flowgraph is started.
+       *
+       * \param start_sample Expected index of the first sample since the
+       *        epoch, computed from the rx_time tag as
+       *        floor(rate*secs) + floor(rate*frac). 0 disables the
+       *        prediction.
+       */
+      virtual void set_start_sample(uint64_t start_sample) = 0;
+
+      /*!
+       * \brief Write from a dedicated thread instead of from work().
+       *
+       * When enabled, work() copies its input into a ring of \p num_buffers
+       * preallocated buffers of \p buffer_items items each and returns
+       * without calling into HDF5. A writer thread drains the ring into the
+       * Digital RF writer, so a slow flush, file close, or directory change
+       * no longer stalls the scheduler. work() only waits when every buffer
+       * is in use; see stats().
+       *
+       * Must be called before the flowgraph is started. A \p num_buffers of
+       * 0 (the default) writes synchronously from work().
+       *
+       * \param num_buffers Number of buffers in the ring.
+       * \param buffer_items Capacity of each buffer in items.
+       */
+      virtual void set_async_writer(int num_buffers, int buffer_items) = 0;
+
+      /*!
+       * \brief Gather input into larger writes.
+       *
+       * The scheduler often calls work() with a few thousand items, and
+       * each call otherwise becomes its own write with its own HDF5
+       * overhead. When enabled, input is gathered until \p items samples
+       * are held or the next file boundary is reached, and then written at
+       * once. Dropped packets still end the gathered run at the drop.
+       * Gathered samples are handed to the writer \p max_delay seconds after
+       * the first of them arrived, even if work() isn't called again, and
+       * when the flowgraph stops. With
+       * set_async_writer(), samples are gathered in the writer's buffers
+       * and \p items is limited to their size.
+       *
+       * Must be called before the flowgraph is started. An \p items of 0
+       * (the default) writes each call's input as it arrives.
+       *
+       * \param items Number of samples to gather per write.
+       * \param max_delay Longest time in seconds to hold gathered samples.
+       */
+      virtual void set_coalesce(int items, double max_delay) = 0;
+
+      /*!
+       * \brief Prepare upcoming files on a helper thread.
+       *
+       * When enabled, a helper thread creates the subdirectory for the next
+       * file while the current one is being written, so that crossing a
+       * file or subdirectory boundary does less work on the writing
+       * thread. Must be called before the flowgraph is started.
+       */
+      virtual void set_lookahead(bool enable) = 0;
+
+      /*!
+       * \brief Close finished files on a separate thread.
+       *
+       * When enabled, the sink starts a new Digital RF writer at each file
+       * boundary and hands the finished one to a close thread, so flushing
+       * and closing a file no longer holds up writing the next one. At most
+       * \p max_files files wait to be closed, beyond that the writer waits
+       * (see stats()). With set_lookahead() the next writer is
+       * also created ahead of time. Requires a thread-safe HDF5 library.
+       *
+       * Must be called before the flowgraph is started. A \p max_files of 0
+       * (the default) closes each file as part of the write that leaves it.
+       */
+      virtual void set_pipelined_close(int max_files) = 0;
+
+      /*!
+       * \brief Write from a separate worker process.
+       *
+       * With thread-safe HDF5, every writer in a process shares one global
+       * lock, so sinks in the same flowgraph cannot write in parallel no
+       * matter how many writer threads they have. When enabled, work()
+       * copies its input into a ring of \p num_buffers buffers of
+       * \p buffer_items items each in shared memory, and a worker process
+       * running \p program does all of the HDF5 work with its own library
+       * and lock. Drops are still detected and accounted for by the sink.
+       *
+       * The sink starts the worker in start() and waits for it to write
+       * everything in stop(). Write errors in the worker, or the worker
+       * exiting early, are raised by the next call to work(). The queue,
+       * boundary and close statistics are reported by the worker.
+       * set_lookahead() and set_pipelined_close() apply in the worker, and
+       * set_async_writer() is ignored.
+       *
+       * Must be called before the flowgraph is started. A \p num_buffers
+       * of 0 (the default) writes in this process.
+       *
+       * \param num_buffers Number of buffers in the shared ring.
+       * \param buffer_items Capacity of each buffer in items.
+       * \param program Worker executable, looked up in the PATH.
+       */
+      virtual void set_worker_process(
+              int num_buffers, int buffer_items,
+              const std::string &program="gr_drf_writer") = 0;
+
+      /*!
+       * \brief Log informational messages at debug level.
+       *
+       * The sink reports through the GNU Radio logger from a thread of its
+       * own, so work() never waits on the terminal or a log file. Dropped
+       * samples are summed and reported once per log interval. In quiet
+       * mode, messages about time tags and new writers are logged at
+       * debug level and only warnings, errors and drop summaries remain.
+       * Must be called before the flowgraph is started.
+       */
+      virtual void set_quiet(bool quiet) = 0;
+
+      /*!
+       * \brief Seconds between summaries of dropped samples.
+       *
+       * Defaults to 1. Must be called before the flowgraph is started.
+       */
+      virtual void set_log_interval(double seconds) = 0;
+
+      /*!
+       * \brief Record a timeline of the sink's work to a Chrome trace.
+       *
+       * Calls to work(), each HDF5 write, waits for a free writer buffer,
+       * file boundaries and drops are recorded by the thread they happen
+       * on into a buffer of its own, without locking, and written to
+       * \p path as Chrome trace JSON when the flowgraph stops. Load it in
+       * chrome://tracing or Perfetto. Sinks given the same path share one
+       * file so that all channels appear on one timeline. A worker process
+       * writes its own file, \p path followed by a dot and its process ID,
+       * on the same clock.
+       *
+       * When tracing is off (an empty \p path, the default) each trace
+       * point costs one branch. Must be called before the flowgraph is
+       * started.
+       */
+      virtual void set_trace(const std::string &path) = 0;
+
+      /*!
+       * \brief Keep only the newest files, like a ring buffer.
+       *
+       * Each file the sink closes is recorded, and a background thread at
+       * the lowest CPU and I/O priority deletes the oldest ones while the
+       * channel holds more than \p max_bytes bytes or more than
+       * \p max_seconds seconds of data. Subdirectories are removed once
+       * they are empty. Only files written by this sink are counted or
+       * deleted; the directory is never scanned, so files left by an
+       * earlier run stay. The file being written is always kept.
+       *
+       * Must be called before the flowgraph is started. 0 turns off each
+       * limit, and both are off by default.
+       */
+      virtual void set_ring_buffer(uint64_t max_bytes,
+                                   double max_seconds) = 0;
+
+      /*!
+       * \brief Write to a staging directory and move closed files into
+       * place in the background.
+       *
+       * The sink writes a Digital RF directory named like the channel's
+       * own inside \p dir, which would be on fast storage such as tmpfs
+       * or NVMe. A mover thread puts each closed file at the same place in
+       * the channel directory. Files on the same file system are renamed;
+       * otherwise they are copied at no more than \p max_rate bytes per
+       * second (0 for no limit) under a temporary name and then renamed,
+       * so that readers never see part of a file. set_ring_buffer() limits
+       * apply to the moved files. A failed move is raised by the next
+       * call to work(), and the file stays in \p dir.
+       *
+       * stop() waits for every closed file to be moved. Must be called
+       * before the flowgraph is started. An empty \p dir (the default)
+       * writes to the channel directory directly.
+       */
+      virtual void set_staging(const std::string &dir, double max_rate) = 0;
+
+      /*!
+       * \brief Capture raw samples to be converted to Digital RF later.
+       *
+       * Instead of HDF5 files the sink writes one raw segment per Digital
+       * RF file to a "raw" directory in the channel directory: a
+       * preallocated .raw file with the samples as they arrive and a .idx
+       * file with the index of each run of samples. Zeros for drops in
+       * continuous mode are recorded in the index rather than written.
+       * drf_convert_raw.py packages the finished segments into the
+       * channel directory, during or after the recording. Staging and
+       * ring buffer limits do not apply to raw segments. Must be called
+       * before the flowgraph is started.
+       */
+      virtual void set_raw_capture(bool enable) = 0;
+
+      /*!
+       * \brief Spread files round-robin over several directories.
+       *
+       * Each of \p dirs gets a directory named like the channel's own, and
+       * files take turns between the channel directory and those, each
+       * written by a writer of its own so that several disks are written
+       * at once, without RAID. Once a file is closed, a symbolic link to
+       * it is made at its usual place in the channel directory, so readers
+       * still see one channel. set_ring_buffer() limits delete the linked
+       * files too. Cannot be combined with set_staging(), and does not
+       * apply to raw capture. Must be called before the flowgraph is
+       * started. Empty \p dirs (the default) write every file to the
+       * channel directory.
+       */
+      virtual void set_stripe(const std::vector<std::string> &dirs) = 0;
+
+      /*!
+       * \brief Reserve the space for each file when it is opened.
+       *
+       * A file's size is known from the file cadence, sample rate and
+       * item size, so when HDF5 opens a file the sink asks the file system
+       * (with fallocate(), on Linux) for that much space up front rather
+       * than letting the file grow by appends. The file keeps few extents
+       * even when many files are being written and deleted at once, as
+       * with a ring buffer. Space that isn't used, e.g. with compression,
+       * is given back when the file is closed. Does nothing on file
+       * systems that don't support it. Must be called before the
+       * flowgraph is started.
+       */
+      virtual void set_preallocate(bool enable) = 0;
+
+      /*!
+       * \brief Write files back to disk steadily instead of in bursts.
+       *
+       * At high rates the kernel lets written data fill the page cache and
+       * then writes it back in bursts that stall digital_rf_write_hdf5().
+       * With \p on_close, each file is handed to a background thread once
+       * it is closed, which waits for it to be written (sync_file_range())
+       * and drops it from the page cache (posix_fadvise()). With a nonzero
+       * \p max_dirty, the open file is handed over as well every
+       * \p max_dirty bytes, which bounds the dirty data per channel to
+       * about that much. The effect shows in the write latencies of
+       * stats(). Linux only. Must be called before the
+       * flowgraph is started.
+       */
+      virtual void set_writeback(bool on_close, uint64_t max_dirty) = 0;
+
+      /*!
+       * \brief Give each file's HDF5 metadata cache a fixed size.
+       *
+       * HDF5 starts each file with a small metadata cache and resizes it
+       * as it goes, which suits files that are opened and read, not files
+       * that are written front to back and closed. With a nonzero
+       * \p bytes, every file the sink opens gets a cache of that size
+       * (1 KiB to 128 MiB) that is never resized. 0 (the default) keeps
+       * HDF5's setting.
+       *
+       * The chunk layout of the data itself is chosen by the Digital RF
+       * library; the size of each write into it is set with
+       * set_coalesce(). drf_sink_bench sweeps both, and reports the write
+       * and read-back rates of each. Must be called before the flowgraph
+       * is started.
+       */
+      virtual void set_metadata_cache(uint64_t bytes) = 0;
+
+      /*!
+       * \brief Align writes to the file system's stripe size.
+       *
+       * On parallel file systems such as Lustre and BeeGFS, a write that
+       * doesn't cover whole stripes costs several times what an aligned
+       * one does. With a nonzero \p bytes, the writes gathered by
+       * set_coalesce() hold a whole number of \p bytes blocks and end on
+       * a multiple of \p bytes from the first sample of their file; a
+       * write cut short by a drop, a gap or the coalescing delay is
+       * followed by a shorter one that brings them back into line. The
+       * space reserved by set_preallocate() is rounded up to a multiple
+       * of \p bytes too. A \p bytes of -1 uses the block size that the
+       * file system reports for the channel directory, which is the
+       * stripe size on Lustre and the chunk size on BeeGFS.
+       *
+       * The offsets of the HDF5 chunks within each file are chosen by the
+       * Digital RF library and aren't affected. Must be called before the
+       * flowgraph is started. 0 (the default) doesn't align writes.
+       */
+      virtual void set_alignment(int bytes) = 0;
+
+      /*!
+       * \brief Gather writes into whole HDF5 chunks.
+       *
+       * When a write covers only part of a chunk, HDF5 keeps the chunk in
+       * its chunk cache, and may have to read it back and pass it through
+       * the filters again when the rest arrives. When enabled, the chunk
+       * size of the rf_data dataset is read from the first file the sink
+       * writes, and from then on the writes gathered by set_coalesce() are
+       * made a whole number of chunks and aligned to chunk boundaries, as
+       * set_alignment() does for bytes. Each digital_rf_write_hdf5() call
+       * then completes the chunks it touches, so HDF5 can filter and write
+       * them once instead of holding partial chunks in its cache. This
+       * works best with continuous data, where a sample's row in the file
+       * follows from its time.
+       *
+       * Has no effect without set_coalesce(), if the Digital RF library
+       * doesn't chunk the data, or if a whole aligned number of chunks
+       * doesn't fit the buffers of set_async_writer() or
+       * set_worker_process(). Must be called before the flowgraph is
+       * started.
+       */
+      virtual void set_chunk_writes(bool enable) = 0;
+
+      /*!
+       * \brief Choose each file's compression level from the writer's
+       * backlog.
+       *
+       * Compression at a fixed level wastes an idle system and can't keep
+       * up when the writer falls behind. When enabled, the level passed
+       * to make() becomes the highest level used, and the sink picks a
+       * level for each new file from how far the writer lags the incoming
+       * samples: the samples queued for it and not written yet when the
+       * file is opened, in seconds at the sample rate. A lag over
+       * \p max_lag seconds drops the level to 0; a lag under half of
+       * \p max_lag raises it by one per file, back up to the highest
+       * level. Each file is written by a
+       * writer of its own, and its level is recorded in the filter
+       * settings of its rf_data dataset (drf_properties.h5 keeps the
+       * level of the first file). Changes are logged and counted in
+       * stats().
+       *
+       * Only samples in the writer's own buffers count, so this needs
+       * set_async_writer() or set_worker_process(), and \p max_lag should
+       * be well under the time those buffers hold; without either the
+       * level stays fixed. Must be called before the flowgraph is started.
+       * A \p max_lag of 0 (the default) keeps the level fixed.
+       */
+      virtual void set_adaptive_compression(double max_lag) = 0;
+
+      /*!
+       * \brief Statistics of the sink's writer.
+       *
+       * Can be read while the flowgraph runs. The same values are
+       * registered as ControlPort performance counters when GNU Radio has
+       * ControlPort enabled.
+       */
+      virtual writer_stats stats() const = 0;
     };
 
   } // namespace drf
@@ -0,0 +1,136 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+
+#ifndef INCLUDED_GRDRF_WRITER_STATS_H
+#define INCLUDED_GRDRF_WRITER_STATS_H
+
+#include <stdint.h>
+#include <gr_drf/api.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Statistics of one channel's writer, as returned by
+     * digital_rf_sink::stats() and digital_rf_multi_sink::stats().
+     *
+     * Each is a snapshot taken when the statistics are read, and can be
+     * read while the flowgraph runs. With set_worker_process(), the queue
+     * and drop statistics come from the sink and the rest are reported by
+     * the worker.
+     */
+    struct GRDRF_API writer_stats
+    {
+      //! Number of filled buffers waiting for the writer thread.
+      int queue_depth;
+
+      //! Largest number of filled buffers that have waited at once.
+      int queue_high_water;
+
+      //! Total seconds that work() has waited for a free buffer.
+      double stall_time;
+
+      /*!
+       * \brief Number of samples handed to the writer thread that have
+       * not been written yet.
+       *
+       * This is how far compression and checksumming lag behind work().
+       */
+      uint64_t writer_backlog;
+
+      //! Number of writes that started a new file.
+      uint64_t boundary_count;
+
+      //! Mean seconds taken by writes that started a new file.
+      double boundary_latency_avg;
+
+      //! Longest seconds taken by a write that started a new file.
+      double boundary_latency_max;
+
+      //! Number of finished files waiting to be closed.
+      int close_queue_depth;
+
+      //! Mean seconds taken to close a finished file.
+      double close_latency_avg;
+
+      //! Total seconds the writer has waited for room in the close queue.
+      double close_stall_time;
+
+      /*!
+       * \brief Number of samples written to Digital RF files.
+       *
+       * Includes zeros written for dropped samples in continuous mode.
+       */
+      uint64_t samples_written;
+
+      //! Number of samples lost to drops, from the gaps between rx_time tags.
+      uint64_t samples_dropped;
+
+      //! Number of drops, each one a gap between rx_time tags.
+      uint64_t drop_count;
+
+      //! Bytes of samples handed to HDF5, before compression.
+      uint64_t bytes_written;
+
+      /*!
+       * \brief Median seconds taken by a call to digital_rf_write_hdf5().
+       *
+       * Quantiles come from a logarithmic histogram and are accurate to
+       * within a factor of sqrt(2).
+       */
+      double write_latency_p50;
+
+      //! 99th percentile seconds taken by a call to digital_rf_write_hdf5().
+      double write_latency_p99;
+
+      //! Longest seconds taken by a call to digital_rf_write_hdf5().
+      double write_latency_max;
+
+      /*!
+       * \brief Mean seconds from the rx_time of the last sample in a write
+       * to the end of that write.
+       *
+       * This is how far the files on disk trail the receiver. It is only
+       * an estimate as it compares rx_time with the host clock.
+       */
+      double disk_latency_avg;
+
+      //! Longest seconds from the rx_time of a sample to its write.
+      double disk_latency_max;
+
+      //! Bytes in closed files waiting in the staging directory.
+      uint64_t staged_bytes;
+
+      //! Number of closed files waiting in the staging directory.
+      int staged_files;
+
+      //! Mean seconds taken to write back and drop a file or part of one.
+      double writeback_latency_avg;
+
+      //! Longest seconds taken to write back and drop a file or part of one.
+      double writeback_latency_max;
+
+      //! Alignment in bytes in use since start(), or 0 if none.
+      uint64_t alignment;
+
+      /*!
+       * \brief Samples per HDF5 chunk found by set_chunk_writes(), or 0
+       * until the first file is written or if the data isn't chunked.
+       */
+      uint64_t chunk_items;
+
+      //! Compression level of the files being written.
+      int compression_level;
+
+      //! Number of times the adaptive compression level has changed.
+      uint64_t compression_changes;
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_WRITER_STATS_H */
@@ -0,0 +1,1503 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <algorithm>
+#include <cstring>
+#include <stdexcept>
+#include <sys/stat.h>
+#include <sys/time.h>
+#include <boost/bind.hpp>
+#include <boost/foreach.hpp>
+#include <boost/format.hpp>
+#include <boost/filesystem.hpp>
+#include <gnuradio/block.h>
+#include "channel_writer.h"
+#include "drf_layout.h"
+#include "worker_ring.h"
+#include "writer_pool.h"
+#include "zero_buffer.h"
+
+namespace gr {
+  namespace drf {
+
+    static uint64_t
+    gcd(uint64_t a, uint64_t b)
+    {
+      uint64_t t;
+
+      while(b) {
+        t = a % b;
+        a = b;
+        b = t;
+      }
+      return a;
+    }
+
+    channel_writer::channel_writer(
+            const char *dir, size_t sample_size, uint64_t subdir_cadence_s,
+            uint64_t file_cadence_ms, uint64_t sample_rate_numerator,
+            uint64_t sample_rate_denominator, const char *uuid,
+            bool is_complex, int num_subchannels, bool stop_on_dropped_packet,
+            bool is_continuous, int compression_level, bool checksum,
+            gr::logger_ptr logger
+    )
+      : d_sample_size(sample_size), d_subdir_cadence_s(subdir_cadence_s),
+        d_file_cadence_ms(file_cadence_ms),
+        d_sample_rate_numerator(sample_rate_numerator),
+        d_sample_rate_denominator(sample_rate_denominator),
+        d_is_complex(is_complex), d_num_subchannels(num_subchannels),
+        d_stop_on_dropped_packet(stop_on_dropped_packet),
+        d_is_continuous(is_continuous), d_compression_level(compression_level),
+        d_checksum(checksum),
+        d_drfo(NULL), d_drfo_start(0), d_drfo_written(false), d_open_file(0),
+        d_async_buffers(0), d_async_buffer_items(0), d_pool(NULL),
+        d_writer_failed(false), d_worker_buffers(0),
+        d_worker_buffer_items(0), d_opened(false), d_logger(logger),
+        d_log_interval(1.0), d_quiet(false), d_ring_max_bytes(0),
+        d_ring_max_seconds(0),
+        d_layout(dir, subdir_cadence_s, file_cadence_ms), d_staging_rate(0),
+        d_preallocate(false), d_writeback_on_close(false),
+        d_writeback_max_dirty(0), d_metadata_cache(0),
+        d_alignment(0), d_align_bytes(0), d_align_items(1),
+        d_chunk_writes(false), d_chunk_items(0), d_chunk_checked(false),
+        d_chunk_pending(false), d_adapt_max_lag(0), d_adapting(false),
+        d_level(compression_level), d_drfo_level(compression_level),
+        d_level_changes(0),
+        d_raw_capture(false),
+        d_trace_channel(0),
+        d_lookahead_enabled(false), d_file_index(0), d_next_file_sample(0),
+        d_close_max_files(0), d_next_drfo(NULL), d_next_drfo_file(0),
+        d_next_drfo_start(0), d_next_drfo_level(0), d_coalesce_items(0),
+        d_coalesce_delay(0)
+    {
+      d_sample_rate = ((long double)sample_rate_numerator /
+                       (long double)sample_rate_denominator);
+
+      if(d_is_complex)
+      {
+        // complex char (int8)
+        if(d_sample_size == 2) {
+          d_dtype = H5T_NATIVE_CHAR;
+        }
+        // complex short (int16)
+        else if(d_sample_size == 4) {
+          d_dtype = H5T_NATIVE_SHORT;
+        }
+        // complex float (float32)
+        else if(d_sample_size == 8) {
+          d_dtype = H5T_NATIVE_FLOAT;
+        }
+        // complex double (float64)
+        else if(d_sample_size == 16) {
+          d_dtype = H5T_NATIVE_DOUBLE;
+        }
+        else {
+          throw std::invalid_argument("Item size not supported");
+        }
+      }
+      else
+      {
+        // char (int8)
+        if(d_sample_size == 1) {
+          d_dtype = H5T_NATIVE_CHAR;
+        }
+        // short (int16)
+        else if(d_sample_size == 2) {
+          d_dtype = H5T_NATIVE_SHORT;
+        }
+        // float (float32)
+        else if(d_sample_size == 4) {
+          d_dtype = H5T_NATIVE_FLOAT;
+        }
+        // double (float64)
+        else if(d_sample_size == 8) {
+          d_dtype = H5T_NATIVE_DOUBLE;
+        }
+        else {
+          throw std::invalid_argument("Item size not supported");
+        }
+      }
+
+      if(d_compression_level < 0 || d_compression_level > 9) {
+        throw std::invalid_argument("Compression level must be 0-9");
+      }
+
+      strcpy(d_dir, dir);
+      boost::filesystem::create_directories(d_dir);
+
+      strcpy(d_uuid, uuid);
+
+      GR_LOG_DEBUG(d_logger, boost::format(
+              "%s: subdir_cadence_s %lu file_cadence_ms %lu sample_size %d "
+              "rate %1.2Lf") % d_dir % subdir_cadence_s % file_cadence_ms
+              % (int)sample_size % d_sample_rate);
+
+      d_first = 1;
+      d_t0 = 1;
+      d_local_index = 0;
+      d_total_dropped = 0;
+      d_start_sample = 0;
+      d_drop_count = 0;
+      d_samples_written = 0;
+      d_bytes_written = 0;
+    }
+
+    channel_writer::~channel_writer()
+    {
+      if(d_drfo) {
+        digital_rf_close_write_hdf5(d_drfo);
+      }
+    }
+
+    void
+    channel_writer::set_start_sample(uint64_t start_sample)
+    {
+      d_start_sample = start_sample;
+    }
+
+    void
+    channel_writer::set_async_writer(int num_buffers, int buffer_items)
+    {
+      if(num_buffers < 0 || (num_buffers > 0 && buffer_items <= 0)) {
+        throw std::invalid_argument("Invalid async writer buffer settings");
+      }
+      d_async_buffers = num_buffers;
+      d_async_buffer_items = buffer_items;
+    }
+
+    void
+    channel_writer::set_quiet(bool quiet)
+    {
+      d_quiet = quiet;
+    }
+
+    void
+    channel_writer::set_log_interval(double seconds)
+    {
+      if(seconds <= 0) {
+        throw std::invalid_argument("Log interval must be > 0");
+      }
+      d_log_interval = seconds;
+    }
+
+    void
+    channel_writer::set_ring_buffer(uint64_t max_bytes, double max_seconds)
+    {
+      if(max_seconds < 0) {
+        throw std::invalid_argument("Ring buffer duration must be >= 0");
+      }
+      d_ring_max_bytes = max_bytes;
+      d_ring_max_seconds = max_seconds;
+    }
+
+    void
+    channel_writer::set_staging(const std::string &root, double max_rate)
+    {
+      if(max_rate < 0) {
+        throw std::invalid_argument("Staging rate must be >= 0");
+      }
+      d_layout.set_staging(root);
+      d_staging_rate = max_rate;
+    }
+
+    void
+    channel_writer::set_stripe(const std::vector<std::string> &roots)
+    {
+      d_layout.set_stripe(roots);
+    }
+
+    void
+    channel_writer::set_preallocate(bool enable)
+    {
+      d_preallocate = enable;
+    }
+
+    void
+    channel_writer::set_writeback(bool on_close, uint64_t max_dirty)
+    {
+      d_writeback_on_close = on_close;
+      d_writeback_max_dirty = max_dirty;
+    }
+
+    void
+    channel_writer::set_metadata_cache(uint64_t bytes)
+    {
+      // HDF5's H5C__MIN_MAX_CACHE_SIZE and H5C__MAX_MAX_CACHE_SIZE
+      if(bytes != 0 && (bytes < 1024 || bytes > 128*1024*1024)) {
+        throw std::invalid_argument("Metadata cache must be 1 KiB-128 MiB");
+      }
+      d_metadata_cache = bytes;
+    }
+
+    void
+    channel_writer::set_alignment(int bytes)
+    {
+      if(bytes < -1) {
+        throw std::invalid_argument("Alignment must be >= -1");
+      }
+      d_alignment = bytes;
+    }
+
+    void
+    channel_writer::set_chunk_writes(bool enable)
+    {
+      d_chunk_writes = enable;
+    }
+
+    void
+    channel_writer::set_adaptive_compression(double max_lag)
+    {
+      if(max_lag < 0) {
+        throw std::invalid_argument("Adaptive compression lag must be >= 0");
+      }
+      d_adapt_max_lag = max_lag;
+    }
+
+    void
+    channel_writer::set_backlog(const backlog_func &backlog)
+    {
+      d_backlog = backlog;
+    }
+
+    void
+    channel_writer::read_chunk_items()
+    {
+      hid_t dataset, plist;
+      hsize_t dims[2];
+      uint64_t items = 0;
+
+      // the Digital RF library picks the layout, so ask the file it has
+      // just opened
+      d_chunk_checked = true;
+      dataset = H5Dopen2(d_drfo->hdf5_file, "rf_data", H5P_DEFAULT);
+      if(dataset >= 0) {
+        plist = H5Dget_create_plist(dataset);
+        if(plist >= 0) {
+          if(H5Pget_layout(plist) == H5D_CHUNKED
+             && H5Pget_chunk(plist, 2, dims) > 0) {
+            items = dims[0];
+          }
+          H5Pclose(plist);
+        }
+        H5Dclose(dataset);
+      }
+      if(items == 0) {
+        log(event_log::LEVEL_WARN,
+            "HDF5 data isn't chunked, writes won't be gathered by chunk");
+        return;
+      }
+      log(event_log::LEVEL_INFO,
+          (boost::format("HDF5 chunks hold %lu samples") % items).str());
+      gr::thread::scoped_lock lock(d_stats_mutex);
+      d_chunk_items = items;
+    }
+
+    void
+    channel_writer::apply_chunk_items()
+    {
+      // one snapshot, in which the chunk size is known before the first
+      // samples are counted as written
+      writer_stats current = stats();
+      uint64_t written = current.samples_written;
+      uint64_t chunk = current.chunk_items;
+      uint64_t align, capacity;
+
+      if(chunk == 0) {
+        // nothing written yet, or the data isn't chunked
+        d_chunk_pending = (written == 0);
+        return;
+      }
+      d_chunk_pending = false;
+      // whole chunks that are also whole aligned blocks
+      align = d_align_items / gcd(d_align_items, chunk) * chunk;
+      try {
+        capacity = run_capacity(align);
+      }
+      catch(std::invalid_argument &) {
+        log(event_log::LEVEL_WARN,
+            (boost::format("HDF5 chunks of %lu samples don't fit the writer "
+                           "buffers, writes won't be gathered by chunk")
+             % chunk).str());
+        return;
+      }
+      d_align_items = align;
+      d_gatherer->set_alignment(capacity, align);
+    }
+
+    uint64_t
+    channel_writer::run_capacity(uint64_t align_items) const
+    {
+      uint64_t buffer_items = (d_worker_buffers > 0 ? d_worker_buffer_items
+                               : d_async_buffers > 0 ? d_async_buffer_items
+                               : 0);
+
+      if(!d_coalesce_items) {
+        return buffer_items;
+      }
+      if(buffer_items == 0) {
+        // the buffer is the gatherer's, so it can grow to a whole aligned
+        // block
+        return sample_gatherer::aligned_capacity(
+                d_coalesce_items, d_coalesce_items + align_items,
+                align_items);
+      }
+      return sample_gatherer::aligned_capacity(
+              std::min(buffer_items, (uint64_t)d_coalesce_items),
+              buffer_items, align_items);
+    }
+
+    uint64_t
+    channel_writer::detect_alignment() const
+    {
+      boost::filesystem::path dir = d_layout.write_dir();
+      struct stat st;
+
+      // the channel directory may not exist yet, so ask the nearest
+      // directory that does
+      while(stat(dir.c_str(), &st)) {
+        if(!dir.has_parent_path()) {
+          return 0;
+        }
+        dir = dir.parent_path();
+      }
+      return st.st_blksize;
+    }
+
+    void
+    channel_writer::set_raw_capture(bool enable)
+    {
+      d_raw_capture = enable;
+    }
+
+    void
+    channel_writer::set_trace(const std::string &path)
+    {
+      d_trace_path = path;
+    }
+
+    void
+    channel_writer::log(event_log::level lvl, const std::string &msg)
+    {
+      if(d_events) {
+        d_events->post(lvl, msg);
+      }
+      else if(lvl >= event_log::LEVEL_WARN) {
+        GR_LOG_WARN(d_logger, d_dir + std::string(": ") + msg);
+      }
+      else if(lvl == event_log::LEVEL_INFO && !d_quiet) {
+        GR_LOG_INFO(d_logger, d_dir + std::string(": ") + msg);
+      }
+      else {
+        GR_LOG_DEBUG(d_logger, d_dir + std::string(": ") + msg);
+      }
+    }
+
+    void
+    channel_writer::set_worker_process(int num_buffers, int buffer_items,
+                                       const std::string &program)
+    {
+      if(num_buffers < 0 || (num_buffers > 0 && buffer_items <= 0)) {
+        throw std::invalid_argument("Invalid worker buffer settings");
+      }
+      d_worker_buffers = num_buffers;
+      d_worker_buffer_items = buffer_items;
+      d_worker_program = program;
+    }
+
+    void
+    channel_writer::set_coalesce(int items, double max_delay)
+    {
+      if(items < 0 || max_delay < 0) {
+        throw std::invalid_argument("Invalid coalescing settings");
+      }
+      d_coalesce_items = items;
+      d_coalesce_delay = max_delay;
+    }
+
+    void
+    channel_writer::set_lookahead(bool enable)
+    {
+      d_lookahead_enabled = enable;
+    }
+
+    void
+    channel_writer::set_pipelined_close(int max_files)
+    {
+      if(max_files < 0) {
+        throw std::invalid_argument("Number of files in flight must be >= 0");
+      }
+      d_close_max_files = max_files;
+    }
+
+    writer_stats
+    channel_writer::stats() const
+    {
+      writer_stats stats = writer_stats();
+
+      if(d_ring) {
+        // the worker's writer reports everything past the ring
+        stats = d_ring->stats();
+        stats.queue_depth = d_ring->depth();
+        stats.queue_high_water = d_ring->high_water();
+        stats.stall_time = d_ring->stall_time();
+        stats.writer_backlog = d_ring->pending_items();
+      }
+      else {
+        if(d_queue) {
+          stats.queue_depth = (int)d_queue->depth();
+          stats.queue_high_water = (int)d_queue->high_water();
+          stats.stall_time = d_queue->stall_time();
+          stats.writer_backlog = d_queue->pending_items();
+        }
+        stats.boundary_count = d_boundary_latency.count();
+        stats.boundary_latency_avg = d_boundary_latency.mean();
+        stats.boundary_latency_max = d_boundary_latency.max();
+        if(d_closer) {
+          stats.close_queue_depth = (int)d_closer->in_flight();
+          stats.close_latency_avg = d_closer->close_latency().mean();
+          stats.close_stall_time = d_closer->stall_time();
+        }
+        stats.write_latency_p50 = d_write_latency.quantile(0.5);
+        stats.write_latency_p99 = d_write_latency.quantile(0.99);
+        stats.write_latency_max = d_write_latency.max();
+        stats.disk_latency_avg = d_disk_latency.mean();
+        stats.disk_latency_max = d_disk_latency.max();
+        if(d_mover) {
+          stats.staged_bytes = d_mover->staged_bytes();
+          stats.staged_files = (int)d_mover->staged_files();
+        }
+        if(d_policy) {
+          stats.writeback_latency_avg = d_policy->writeback_latency_avg();
+          stats.writeback_latency_max = d_policy->writeback_latency_max();
+        }
+
+        gr::thread::scoped_lock lock(d_stats_mutex);
+        stats.samples_written = d_samples_written;
+        stats.bytes_written = d_bytes_written;
+        stats.chunk_items = d_chunk_items;
+        stats.compression_level = d_level;
+        stats.compression_changes = d_level_changes;
+      }
+
+      gr::thread::scoped_lock lock(d_stats_mutex);
+      // drops are counted by work(), in this process
+      stats.samples_dropped = d_total_dropped;
+      stats.drop_count = d_drop_count;
+      stats.alignment = d_align_bytes;
+      return stats;
+    }
+
+    void
+    channel_writer::start()
+    {
+      size_t item_size = d_sample_size*d_num_subchannels;
+      uint64_t capacity;
+
+      d_events.reset(new event_log(d_logger, d_dir, d_log_interval, d_quiet));
+      if(!d_trace_path.empty()) {
+        d_trace = trace_file::open(d_trace_path);
+        d_trace_channel = d_trace->channel(d_dir);
+      }
+      d_align_bytes = (d_alignment < 0 ? detect_alignment()
+                       : (uint64_t)d_alignment);
+      d_align_items = 1;
+      if(d_align_bytes > 0) {
+        // fewest samples that make a whole number of aligned blocks
+        d_align_items = d_align_bytes / gcd(d_align_bytes,
+                                            d_sample_size*d_num_subchannels);
+      }
+      // the chunk size comes from the first file, see apply_chunk_items()
+      d_chunk_items = 0;
+      d_chunk_checked = false;
+      d_chunk_pending = d_chunk_writes && d_coalesce_items && !d_raw_capture;
+
+      // check the runs fit the buffers before starting anything
+      capacity = run_capacity(d_align_items);
+
+      // the level follows the samples waiting in the writer's buffers,
+      // which the worker process does with its own
+      d_adapting = (d_adapt_max_lag > 0 && !d_raw_capture
+                    && d_worker_buffers == 0
+                    && (d_async_buffers > 0 || d_backlog));
+      if(d_adapt_max_lag > 0 && !d_raw_capture && d_worker_buffers == 0
+         && !d_adapting) {
+        log(event_log::LEVEL_WARN,
+            "Adaptive compression needs an async writer or a worker "
+            "process, the level stays fixed");
+      }
+
+      if(d_worker_buffers > 0) {
+        start_worker();
+      }
+      else if(!d_raw_capture) {
+        d_layout.create_dirs();
+        if(d_ring_max_bytes > 0 || d_ring_max_seconds > 0) {
+          d_pruner.reset(new file_pruner(
+                  d_dir, d_file_cadence_ms, d_subdir_cadence_s,
+                  d_ring_max_bytes, d_ring_max_seconds));
+        }
+        if(!d_layout.staging_root().empty()) {
+          d_mover.reset(new file_mover(
+                  d_layout.write_dir(), d_dir, d_file_cadence_ms,
+                  d_subdir_cadence_s,
+                  d_staging_rate,
+                  boost::bind(&channel_writer::file_moved, this, _1)));
+        }
+        if(d_preallocate || d_writeback_on_close
+           || d_writeback_max_dirty > 0) {
+          d_policy.reset(new file_policy(
+                  d_preallocate, d_align_bytes, d_writeback_on_close,
+                  d_writeback_max_dirty));
+        }
+        if(d_close_max_files > 0) {
+          d_closer.reset(new file_closer(
+                  d_close_max_files,
+                  boost::bind(&channel_writer::file_closed, this, _1)));
+        }
+      }
+      if(d_start_sample) {
+        // do the slow setup now rather than in the first call to work()
+        d_t0 = d_start_sample;
+        open_writer();
+        if(!d_ring && !d_raw_capture) {
+          d_layout.prepare(drf_file_index(d_t0, d_sample_rate_numerator,
+                                          d_sample_rate_denominator,
+                                          d_file_cadence_ms));
+        }
+      }
+      if(!d_ring) {
+        // with a worker process, these are the worker's
+        if(d_lookahead_enabled && !d_raw_capture) {
+          d_lookahead.reset(new lookahead(
+                  boost::bind(&channel_writer::prepare_next, this, _1),
+                  boost::bind(&channel_writer::log, this,
+                              event_log::LEVEL_WARN, _1)));
+        }
+        if(d_async_buffers > 0) {
+          d_queue.reset(new write_queue(d_async_buffers,
+                                        d_async_buffer_items*item_size));
+        }
+      }
+
+      if(d_ring || d_queue) {
+        // gather straight into the buffers to avoid a second copy
+        d_gatherer.reset(new sample_gatherer(
+                item_size, capacity, d_align_items, d_coalesce_items > 0,
+                d_coalesce_delay,
+                boost::bind(&channel_writer::acquire_buffer, this, _1),
+                boost::bind(&channel_writer::submit_block, this, _1),
+                boost::bind(&channel_writer::file_bounds, this, _1, _2,
+                            _3)));
+      }
+      else if(d_coalesce_items) {
+        d_gatherer.reset(new sample_gatherer(
+                item_size, capacity, d_align_items, true, d_coalesce_delay,
+                sample_gatherer::acquire_func(),
+                boost::bind(&channel_writer::submit_block, this, _1),
+                boost::bind(&channel_writer::file_bounds, this, _1, _2,
+                            _3)));
+      }
+    }
+
+    void
+    channel_writer::set_pool(writer_pool *pool)
+    {
+      d_pool = pool;
+    }
+
+    void
+    channel_writer::flush()
+    {
+      if(d_gatherer) {
+        d_gatherer->flush();
+      }
+    }
+
+    void
+    channel_writer::stop()
+    {
+      // whatever the block did, nothing gathered is left behind
+      try {
+        flush();
+      }
+      catch(std::exception &e) {
+        log(event_log::LEVEL_ERROR, e.what());
+      }
+      d_gatherer.reset();
+      if(d_ring) {
+        // the worker exits once everything queued has been written
+        if(!d_ring->shutdown()) {
+          log(event_log::LEVEL_ERROR,
+              "Writer process did not finish cleanly");
+        }
+        d_ring.reset();
+      }
+      d_lookahead.reset();
+      if(d_next_drfo) {
+        digital_rf_close_write_hdf5(d_next_drfo);
+        d_next_drfo = NULL;
+      }
+      // waits for all finished files to be closed
+      d_closer.reset();
+      close_writer();
+      // waits for the closed files to be written back
+      d_policy.reset();
+      if(d_raw_capture && d_worker_buffers == 0) {
+        raw_writer::mark_stopped(raw_dir());
+      }
+      // waits for the staged files to be moved
+      d_mover.reset();
+      d_pruner.reset();
+      d_events.reset();
+      // a restarted flowgraph starts over from its first rx_time tag
+      d_first = 1;
+      d_opened = false;
+      d_local_index = 0;
+      {
+        gr::thread::scoped_lock lock(d_stats_mutex);
+        d_total_dropped = 0;
+      }
+      d_next_file_sample = 0;
+      // the last channel using the trace writes it out
+      d_trace.reset();
+    }
+
+    void
+    channel_writer::start_worker()
+    {
+      worker_config config;
+      std::string stripe = d_layout.stripe_roots();
+
+      memset(&config, 0, sizeof(config));
+      strncpy(config.dir, d_dir, sizeof(config.dir) - 1);
+      config.sample_size = d_sample_size;
+      config.subdir_cadence_s = d_subdir_cadence_s;
+      config.file_cadence_ms = d_file_cadence_ms;
+      config.sample_rate_numerator = d_sample_rate_numerator;
+      config.sample_rate_denominator = d_sample_rate_denominator;
+      strncpy(config.uuid, d_uuid, sizeof(config.uuid) - 1);
+      config.is_complex = d_is_complex;
+      config.num_subchannels = d_num_subchannels;
+      config.is_continuous = d_is_continuous;
+      config.compression_level = d_compression_level;
+      config.checksum = d_checksum;
+      config.lookahead = d_lookahead_enabled;
+      config.close_queue = d_close_max_files;
+      config.quiet = d_quiet;
+      config.log_interval = d_log_interval;
+      config.ring_max_bytes = d_ring_max_bytes;
+      config.ring_max_seconds = d_ring_max_seconds;
+      strncpy(config.staging, d_layout.staging_root().c_str(),
+              sizeof(config.staging) - 1);
+      config.staging_rate = d_staging_rate;
+      config.raw_capture = d_raw_capture;
+      config.preallocate = d_preallocate;
+      config.writeback_on_close = d_writeback_on_close;
+      config.writeback_max_dirty = d_writeback_max_dirty;
+      config.metadata_cache = d_metadata_cache;
+      config.alignment = (int)d_align_bytes;
+      config.chunk_writes = d_chunk_writes;
+      config.adapt_max_lag = d_adapt_max_lag;
+      if(stripe.size() >= sizeof(config.stripe)) {
+        throw std::invalid_argument("Stripe directory names are too long");
+      }
+      strcpy(config.stripe, stripe.c_str());
+      strncpy(config.trace, d_trace_path.c_str(), sizeof(config.trace) - 1);
+
+      d_ring.reset(new worker_ring(
+              d_worker_buffers,
+              d_worker_buffer_items*d_sample_size*d_num_subchannels,
+              config));
+      d_ring->spawn(d_worker_program);
+    }
+
+    void
+    channel_writer::open_writer()
+    {
+      worker_record record;
+
+      if(d_ring) {
+        // the worker creates the writer when it reaches this record
+        record.type = WORKER_START;
+        record.index = d_t0;
+        record.nitems = 0;
+        d_ring->submit(record);
+      }
+      else {
+        create_writer();
+      }
+      d_opened = true;
+    }
+
+    void
+    channel_writer::reopen(uint64_t t0)
+    {
+      close_writer();
+      d_t0 = t0;
+      create_writer();
+    }
+
+    void
+    channel_writer::close_writer()
+    {
+      if(d_raw) {
+        try {
+          d_raw->close();
+        }
+        catch(std::exception &e) {
+          log(event_log::LEVEL_ERROR, e.what());
+        }
+        d_raw.reset();
+      }
+      if(!d_drfo) {
+        return;
+      }
+      if(digital_rf_close_write_hdf5(d_drfo)) {
+        log(event_log::LEVEL_ERROR, "Nonzero result on close");
+      }
+      d_drfo = NULL;
+      if(d_drfo_written) {
+        d_drfo_written = false;
+        file_closed(d_open_file);
+      }
+    }
+
+    int
+    channel_writer::hdf5_fd() const
+    {
+      int *fd;
+
+      // the descriptor of the file HDF5 has open for the writer
+      if(H5Fget_vfd_handle(d_drfo->hdf5_file, H5P_DEFAULT,
+                           (void **)&fd) < 0) {
+        return -1;
+      }
+      return *fd;
+    }
+
+    void
+    channel_writer::file_closed(uint64_t file_index)
+    {
+      // called from the writing thread or the closer thread
+      std::string error;
+
+      if(d_policy) {
+        error = d_policy->closed(d_layout.file_path(file_index));
+        if(!error.empty()) {
+          log(event_log::LEVEL_WARN, error);
+        }
+      }
+      if(d_layout.striped()) {
+        error = d_layout.link(file_index);
+        if(!error.empty()) {
+          log(event_log::LEVEL_ERROR, error);
+        }
+      }
+      if(d_mover) {
+        d_mover->push(file_index);
+      }
+      else if(d_pruner) {
+        d_pruner->push(file_index);
+      }
+    }
+
+    void
+    channel_writer::file_moved(uint64_t file_index)
+    {
+      // called from the mover thread
+      if(d_pruner) {
+        d_pruner->push(file_index);
+      }
+    }
+
+    Digital_rf_write_object *
+    channel_writer::new_writer(uint64_t start_sample, int level)
+    {
+      Digital_rf_write_object *drfo;
+      std::string path = d_layout.file_dir(drf_file_index(
+              start_sample, d_sample_rate_numerator,
+              d_sample_rate_denominator, d_file_cadence_ms));
+      std::vector<char> dir(path.begin(), path.end());
+
+      dir.push_back('\0');
+
+      /*      Digital_rf_write_object * digital_rf_create_write_hdf5(
+                  char * directory, hid_t dtype_id, uint64_t subdir_cadence_secs,
+                  uint64_t file_cadence_millisecs, uint64_t global_start_sample,
+                  uint64_t sample_rate_numerator, uint64_t sample_rate_denominator,
+                  char * uuid_str, int compression_level, int checksum, int is_complex,
+                  int num_subchannels, int is_continuous, int marching_dots
+              )
+      */
+      drfo = digital_rf_create_write_hdf5(
+              &dir[0], d_dtype, d_subdir_cadence_s, d_file_cadence_ms,
+              start_sample, d_sample_rate_numerator, d_sample_rate_denominator,
+              d_uuid, level, d_checksum, d_is_complex,
+              d_num_subchannels, d_is_continuous, 0);
+      if(!drfo) {
+        throw std::runtime_error("Failed to create Digital RF writer object");
+      }
+      return drfo;
+    }
+
+    void
+    channel_writer::set_file_metadata_cache(Digital_rf_write_object *drfo)
+    {
+      H5AC_cache_config_t config;
+
+      config.version = H5AC__CURR_CACHE_CONFIG_VERSION;
+      if(H5Fget_mdc_config(drfo->hdf5_file, &config) < 0) {
+        log(event_log::LEVEL_WARN, "Failed to get HDF5 metadata cache");
+        return;
+      }
+      // a fixed size, since the metadata a writer touches barely changes
+      // over a file and resizing only costs time
+      config.set_initial_size = 1;
+      config.initial_size = d_metadata_cache;
+      config.min_size = d_metadata_cache;
+      config.max_size = d_metadata_cache;
+      config.incr_mode = H5C_incr__off;
+      config.flash_incr_mode = H5C_flash_incr__off;
+      config.decr_mode = H5C_decr__off;
+      if(H5Fset_mdc_config(drfo->hdf5_file, &config) < 0) {
+        log(event_log::LEVEL_WARN, "Failed to set HDF5 metadata cache");
+      }
+    }
+
+    std::string
+    channel_writer::raw_dir() const
+    {
+      return (boost::filesystem::path(d_dir) / "raw").string();
+    }
+
+    std::string
+    channel_writer::raw_properties() const
+    {
+      const uint16_t one = 1;
+      char order = *(const char *)&one ? '<' : '>';
+      char kind = (d_dtype == H5T_NATIVE_FLOAT
+                   || d_dtype == H5T_NATIVE_DOUBLE) ? 'f' : 'i';
+      size_t width = d_is_complex ? d_sample_size/2 : d_sample_size;
+
+      // everything the converter needs to create the same writer
+      return (boost::format(
+              "{\"dtype\": \"%c%c%d\", \"is_complex\": %s, "
+              "\"num_subchannels\": %d, \"sample_rate_numerator\": %lu, "
+              "\"sample_rate_denominator\": %lu, "
+              "\"subdir_cadence_secs\": %lu, "
+              "\"file_cadence_millisecs\": %lu, \"uuid_str\": \"%s\", "
+              "\"compression_level\": %d, \"checksum\": %s, "
+              "\"is_continuous\": %s}\n")
+              % order % kind % width % (d_is_complex ? "true" : "false")
+              % d_num_subchannels % d_sample_rate_numerator
+              % d_sample_rate_denominator % d_subdir_cadence_s
+              % d_file_cadence_ms % d_uuid % d_compression_level
+              % (d_checksum ? "true" : "false")
+              % (d_is_continuous ? "true" : "false")).str();
+    }
+
+    void
+    channel_writer::create_writer()
+    {
+      log(event_log::LEVEL_INFO,
+          (boost::format("Creating writer at t0 %lu") % d_t0).str());
+      if(d_raw_capture) {
+        d_raw.reset(new raw_writer(
+                raw_dir(), d_sample_size*d_num_subchannels,
+                d_sample_rate_numerator, d_sample_rate_denominator,
+                d_file_cadence_ms, raw_properties()));
+      }
+      else {
+        {
+          gr::thread::scoped_lock lock(d_stats_mutex);
+          d_drfo_level = d_level;
+        }
+        d_drfo = new_writer(d_t0, d_drfo_level);
+      }
+      d_drfo_start = d_t0;
+      d_drfo_written = false;
+      d_next_file_sample = 0;
+    }
+
+    void
+    channel_writer::rotate_writer(uint64_t sample)
+    {
+      Digital_rf_write_object *drfo = NULL, *stale = NULL;
+      uint64_t start = sample;
+      int level;
+
+      {
+        gr::thread::scoped_lock lock(d_stats_mutex);
+        level = d_level;
+      }
+      {
+        gr::thread::scoped_lock lock(d_next_drfo_mutex);
+        if(d_next_drfo && d_next_drfo_file == d_file_index) {
+          if(d_next_drfo_level == level) {
+            drfo = d_next_drfo;
+            start = d_next_drfo_start;
+          }
+          else {
+            // prepared before the compression level changed
+            stale = d_next_drfo;
+          }
+          d_next_drfo = NULL;
+        }
+      }
+      if(stale) {
+        digital_rf_close_write_hdf5(stale);
+      }
+      if(!drfo) {
+        drfo = new_writer(start, level);
+      }
+
+      if(!d_drfo_written) {
+        // striping moved on from a writer that never opened a file
+        digital_rf_close_write_hdf5(d_drfo);
+      }
+      else if(d_closer) {
+        // the finished file is closed on the closer thread
+        d_closer->push(d_drfo, d_open_file);
+      }
+      else {
+        if(digital_rf_close_write_hdf5(d_drfo)) {
+          log(event_log::LEVEL_ERROR, "Nonzero result on close");
+        }
+        file_closed(d_open_file);
+      }
+      d_drfo = drfo;
+      d_drfo_start = start;
+      d_drfo_written = false;
+      d_drfo_level = level;
+    }
+
+    void
+    channel_writer::prepare_next(uint64_t file_index)
+    {
+      Digital_rf_write_object *drfo, *stale = NULL;
+      uint64_t start;
+      int level;
+
+      d_layout.prepare(file_index);
+      if(!d_closer && !d_layout.striped() && !d_adapting) {
+        return;
+      }
+
+      // a writer for the next file, picked up by rotate_writer()
+      start = drf_file_start_sample(file_index, d_sample_rate_numerator,
+                                    d_sample_rate_denominator,
+                                    d_file_cadence_ms);
+      {
+        gr::thread::scoped_lock lock(d_stats_mutex);
+        level = d_level;
+      }
+      drfo = new_writer(start, level);
+      {
+        gr::thread::scoped_lock lock(d_next_drfo_mutex);
+        stale = d_next_drfo;
+        d_next_drfo = drfo;
+        d_next_drfo_file = file_index;
+        d_next_drfo_start = start;
+        d_next_drfo_level = level;
+      }
+      if(stale) {
+        // the writer skipped past it without writing
+        digital_rf_close_write_hdf5(stale);
+      }
+    }
+
+    static double
+    wall_time()
+    {
+      struct timeval tv;
+
+      gettimeofday(&tv, NULL);
+      return tv.tv_sec + tv.tv_usec*1e-6;
+    }
+
+    uint64_t
+    channel_writer::backlog_items() const
+    {
+      return d_queue ? d_queue->pending_items() : d_backlog();
+    }
+
+    void
+    channel_writer::adapt_compression()
+    {
+      // seconds of samples waiting to be written when the file is opened
+      double lag = (double)(backlog_items()/d_sample_rate);
+      int level = d_drfo_level;
+
+      if(lag > d_adapt_max_lag) {
+        level = 0;
+      }
+      else if(lag < d_adapt_max_lag/2 && level < d_compression_level) {
+        // one step per file, so a level that can't keep up isn't held long
+        level++;
+      }
+      if(level == d_drfo_level) {
+        return;
+      }
+      {
+        gr::thread::scoped_lock lock(d_stats_mutex);
+        d_level = level;
+        d_level_changes++;
+      }
+      log(event_log::LEVEL_INFO,
+          (boost::format("Compression level %d from file %lu, %.3f s behind")
+           % level % d_file_index % lag).str());
+      if(d_trace) {
+        d_trace->instant("compression", d_trace_channel, "level", level);
+      }
+    }
+
+    void
+    channel_writer::write_hdf5(uint64_t index, char *buf,
+                                     uint64_t nitems)
+    {
+      size_t item_size = d_sample_size*d_num_subchannels;
+      uint64_t sample = d_t0 + index;
+      uint64_t n;
+      bool boundary;
+      gr::high_res_timer_type t0 = 0, t1;
+      uint64_t trace_start = 0;
+      int result;
+
+      // split the write at file boundaries so that the write that opens
+      // a file can be timed and the writer can be rotated there
+      while(nitems > 0) {
+        boundary = (sample >= d_next_file_sample);
+        if(boundary) {
+          t0 = gr::high_res_timer_now();
+          d_file_index = drf_file_index(sample, d_sample_rate_numerator,
+                                        d_sample_rate_denominator,
+                                        d_file_cadence_ms);
+          d_next_file_sample = drf_file_start_sample(
+                  d_file_index + 1, d_sample_rate_numerator,
+                  d_sample_rate_denominator, d_file_cadence_ms);
+          if(d_adapting) {
+            adapt_compression();
+          }
+          if((d_closer && d_drfo_written)
+             || (d_adapting && d_level != d_drfo_level)
+             || (d_layout.striped() && !d_raw
+                 && d_file_index != drf_file_index(
+                         d_drfo_start, d_sample_rate_numerator,
+                         d_sample_rate_denominator, d_file_cadence_ms))) {
+            // each file gets its own writer, in its own directory
+            rotate_writer(sample);
+          }
+          if(d_trace) {
+            d_trace->instant("file", d_trace_channel, "file", d_file_index);
+          }
+        }
+
+        n = std::min(nitems, d_next_file_sample - sample);
+        if(d_trace) {
+          trace_start = trace_file::now();
+        }
+        t1 = gr::high_res_timer_now();
+        if(d_raw) {
+          d_raw->write(sample, buf, n);
+        }
+        else {
+          result = digital_rf_write_hdf5(d_drfo, sample - d_drfo_start,
+                                         buf, n);
+          if(result) {
+            throw std::runtime_error("Nonzero result on write");
+          }
+          if(d_drfo_written && d_open_file != d_file_index) {
+            // the writer closed its previous file to open this one
+            file_closed(d_open_file);
+          }
+          d_open_file = d_file_index;
+          d_drfo_written = true;
+        }
+        if(d_trace) {
+          d_trace->complete("write", d_trace_channel, trace_start, "items", n);
+        }
+        if(boundary && d_metadata_cache > 0 && !d_raw) {
+          // the library only opens the file on its first write
+          set_file_metadata_cache(d_drfo);
+        }
+        if(boundary && d_chunk_writes && !d_chunk_checked && !d_raw) {
+          read_chunk_items();
+        }
+        if(boundary && d_policy) {
+          // the write opened the file, which will hold this many samples
+          d_policy->opened(hdf5_fd(), (d_next_file_sample - sample)*item_size);
+        }
+        if(d_policy && d_policy->written(n*item_size)) {
+          d_policy->write_back(hdf5_fd());
+        }
+        d_write_latency.add((double)(gr::high_res_timer_now() - t1)
+                            / gr::high_res_timer_tps());
+        // only meaningful when rx_time and the host clock agree
+        d_disk_latency.add(wall_time()
+                           - (double)((sample + n)/d_sample_rate));
+        {
+          gr::thread::scoped_lock lock(d_stats_mutex);
+          d_samples_written += n;
+          d_bytes_written += n*item_size;
+        }
+
+        if(boundary) {
+          d_boundary_latency.add((double)(gr::high_res_timer_now() - t0)
+                                 / gr::high_res_timer_tps());
+          if(d_lookahead) {
+            d_lookahead->advance(d_file_index);
+          }
+        }
+
+        sample += n;
+        buf += n*item_size;
+        nitems -= n;
+      }
+    }
+
+    void
+    channel_writer::write_zeros_hdf5(uint64_t index, uint64_t nitems)
+    {
+      uint64_t filled;
+
+      if(d_raw) {
+        // zeros are only recorded in the index
+        d_raw->zeros(d_t0 + index, nitems);
+        return;
+      }
+      while(nitems > 0) {
+        if(nitems*d_sample_size*d_num_subchannels <= ZERO_BUFFER_SIZE) {
+          filled = nitems;
+        }
+        else {
+          filled = ZERO_BUFFER_SIZE/d_sample_size/d_num_subchannels;
+        }
+        // HDF5 only reads from the buffer
+        write_hdf5(index, const_cast<char *>(zero_buffer()), filled);
+        index += filled;
+        nitems -= filled;
+      }
+    }
+
+    char *
+    channel_writer::acquire_buffer(uint64_t index)
+    {
+      uint64_t trace_start = 0;
+      char *data;
+
+      if(d_trace) {
+        trace_start = trace_file::now();
+      }
+      data = d_ring ? d_ring->acquire() : d_queue->acquire();
+      if(d_trace) {
+        // time spent waiting for the writer to free a buffer
+        d_trace->complete("acquire", d_trace_channel, trace_start,
+                          "index", index);
+      }
+      return data;
+    }
+
+    void
+    channel_writer::submit_block(const write_block &block)
+    {
+      worker_record record;
+
+      if(d_ring) {
+        record.type = WORKER_DATA;
+        record.index = block.index;
+        record.nitems = block.nitems;
+        d_ring->submit(record);
+      }
+      else if(d_queue) {
+        d_queue->submit(block);
+        d_pool->notify();
+      }
+      else {
+        write_hdf5(block.index, block.data, block.nitems);
+      }
+    }
+
+    void
+    channel_writer::file_bounds(uint64_t index, uint64_t &first,
+                                uint64_t &end)
+    {
+      uint64_t file_index = drf_file_index(d_t0 + index,
+                                           d_sample_rate_numerator,
+                                           d_sample_rate_denominator,
+                                           d_file_cadence_ms);
+
+      // local indexes, and the writer's first file starts at d_t0
+      first = std::max(drf_file_start_sample(
+              file_index, d_sample_rate_numerator,
+              d_sample_rate_denominator, d_file_cadence_ms), d_t0) - d_t0;
+      end = drf_file_start_sample(
+              file_index + 1, d_sample_rate_numerator,
+              d_sample_rate_denominator, d_file_cadence_ms) - d_t0;
+    }
+
+    void
+    channel_writer::write_samples(char *buf, uint64_t nitems)
+    {
+      if(d_chunk_pending) {
+        apply_chunk_items();
+      }
+      if(d_gatherer) {
+        d_gatherer->add(d_local_index, buf, nitems);
+      }
+      else {
+        write_hdf5(d_local_index, buf, nitems);
+      }
+      d_local_index += nitems;
+    }
+
+    void
+    channel_writer::write_zeros(uint64_t nitems)
+    {
+      write_block block;
+      worker_record record;
+
+      flush();
+      if(d_ring) {
+        record.type = WORKER_ZEROS;
+        record.index = d_local_index;
+        record.nitems = nitems;
+        d_ring->submit(record);
+      }
+      else if(!d_queue) {
+        write_zeros_hdf5(d_local_index, nitems);
+      }
+      else {
+        // zeros come from zero_buffer() on the writer thread, no copy needed
+        block.index = d_local_index;
+        block.nitems = nitems;
+        block.data = NULL;
+        d_queue->submit(block);
+        d_pool->notify();
+      }
+      d_local_index += nitems;
+    }
+
+    void
+    channel_writer::skip_samples(uint64_t nitems)
+    {
+      // gathered samples must stay contiguous
+      flush();
+      d_local_index += nitems;
+    }
+
+    void
+    channel_writer::check_writer()
+    {
+      gr::thread::scoped_lock lock(d_writer_mutex);
+
+      if(d_ring) {
+        d_ring->check();
+      }
+      if(!d_writer_error.empty()) {
+        throw std::runtime_error(d_writer_error);
+      }
+      if(d_gatherer && !d_gatherer->error().empty()) {
+        throw std::runtime_error(d_gatherer->error());
+      }
+      if(d_closer && !d_closer->error().empty()) {
+        throw std::runtime_error(d_closer->error());
+      }
+      if(d_mover && !d_mover->error().empty()) {
+        throw std::runtime_error(d_mover->error());
+      }
+    }
+
+    void
+    channel_writer::write(const write_block &block)
+    {
+      if(block.data) {
+        write_hdf5(block.index, block.data, block.nitems);
+      }
+      else {
+        write_zeros_hdf5(block.index, block.nitems);
+      }
+    }
+
+    bool
+    channel_writer::has_queued()
+    {
+      return d_queue && d_queue->depth() > 0;
+    }
+
+    void
+    channel_writer::write_queued()
+    {
+      write_block block;
+
+      if(!d_queue->try_pop(block)) {
+        return;
+      }
+      // after a failure keep draining so that work() never blocks, it
+      // will raise the error on its next call
+      if(!d_writer_failed) {
+        try {
+          write(block);
+        }
+        catch(std::exception &e) {
+          gr::thread::scoped_lock lock(d_writer_mutex);
+          d_writer_error = e.what();
+          d_writer_failed = true;
+        }
+      }
+      d_queue->release(block);
+    }
+
+    void
+    channel_writer::get_rx_time(const std::vector<gr::tag_t> &rx_time_tags)
+    {
+      double t0_frac;
+      uint64_t t0_sec;
+
+      //print all tags
+      BOOST_FOREACH(const gr::tag_t &rx_time_tag, rx_time_tags) {
+        const uint64_t offset = rx_time_tag.offset;
+        const pmt::pmt_t &value = rx_time_tag.value;
+
+        t0_sec = pmt::to_uint64(pmt::tuple_ref(value, 0));
+        t0_frac = pmt::to_double(pmt::tuple_ref(value, 1));
+        d_t0 = (uint64_t)(d_sample_rate*t0_sec)
+                + (uint64_t)(d_sample_rate*t0_frac);
+        log(event_log::LEVEL_INFO,
+            (boost::format("Time tag @ sample %lu (%lu): %lu+%f")
+             % offset % d_t0 % t0_sec % t0_frac).str());
+      }
+    }
+
+    int
+    channel_writer::detect_and_handle_overflow(
+            const std::vector<gr::tag_t> &rx_time_tags, char *in)
+    {
+      uint64_t dt;
+      uint64_t dropped = 0;
+      uint64_t drop_index;
+      uint64_t nitems;
+      int consumed = 0;
+
+      //print all tags
+      BOOST_FOREACH(const gr::tag_t &rx_time_tag, rx_time_tags) {
+        const uint64_t offset = rx_time_tag.offset;
+        const pmt::pmt_t &value = rx_time_tag.value;
+
+        uint64_t tt0_sec = pmt::to_uint64(pmt::tuple_ref(value, 0));
+        double tt0_frac = pmt::to_double(pmt::tuple_ref(value, 1));
+
+        // get sample index of drop (as opposed to packet index == offset)
+        drop_index = offset + d_total_dropped;
+
+        // we should have this many samples
+        dt = ((uint64_t)(d_sample_rate*tt0_sec) + (uint64_t)(d_sample_rate*tt0_frac)
+              - d_t0 - d_total_dropped);
+
+        dropped = dt - offset;
+        {
+          gr::thread::scoped_lock lock(d_stats_mutex);
+          d_total_dropped += dropped;
+          if(dropped > 0) {
+            d_drop_count++;
+          }
+        }
+        if(dropped > 0) {
+          // reported in the next summary from the log thread
+          d_events->drop(dropped);
+          if(d_trace) {
+            d_trace->instant("drop", d_trace_channel, "samples", dropped);
+          }
+        }
+
+        // write in-sequence data up to drop_index
+        nitems = drop_index - d_local_index;
+        write_samples(in + consumed*d_sample_size*d_num_subchannels, nitems);
+        consumed += nitems;
+
+        if(d_stop_on_dropped_packet && dropped > 0) {
+          log(event_log::LEVEL_WARN,
+              (boost::format("Dropped %lu samples @ %lu, stopping as "
+                             "requested") % dropped % drop_index).str());
+          return gr::block::WORK_DONE;
+        }
+
+        // if we've dropped packets, write zeros or leave a gap
+        if(dropped > 0) {
+          if(d_is_continuous) {
+            write_zeros(dropped);
+          }
+          else {
+            // the next write lands past the drop, which the
+            // non-continuous writer records as a gap in its index
+            skip_samples(dropped);
+          }
+        }
+      }
+      return(consumed);
+    }
+
+
+    int
+    channel_writer::work(char *in, int noutput_items,
+                         const std::vector<gr::tag_t> &rx_time_tags)
+    {
+      uint64_t trace_start;
+      int result;
+
+      if(!d_trace) {
+        return write_input(in, noutput_items, rx_time_tags);
+      }
+      trace_start = trace_file::now();
+      result = write_input(in, noutput_items, rx_time_tags);
+      d_trace->complete("work", d_trace_channel, trace_start, "items",
+                        noutput_items);
+      return result;
+    }
+
+    int
+    channel_writer::write_input(char *in, int noutput_items,
+                                const std::vector<gr::tag_t> &rx_time_tags)
+    {
+      int samples_consumed = 0;
+
+      // raise any error from the writer thread
+      check_writer();
+
+      if(d_first) {
+        // sets start time d_t0
+        get_rx_time(rx_time_tags);
+
+        if(d_opened && d_t0 != d_start_sample) {
+          log(event_log::LEVEL_WARN,
+              (boost::format("Start sample %lu does not match prediction "
+                             "%lu") % d_t0 % d_start_sample).str());
+          close_writer();
+          d_opened = false;
+        }
+        if(!d_opened) {
+          open_writer();
+        }
+        d_first = 0;
+      }
+      else {
+        samples_consumed = detect_and_handle_overflow(rx_time_tags, in);
+        if(samples_consumed == gr::block::WORK_DONE) {
+          return gr::block::WORK_DONE;
+        }
+      }
+
+      in += samples_consumed*d_sample_size*d_num_subchannels;
+      write_samples(in, noutput_items - samples_consumed);
+
+      return noutput_items;
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
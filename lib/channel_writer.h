@@ -0,0 +1,301 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_CHANNEL_WRITER_H
+#define INCLUDED_GRDRF_CHANNEL_WRITER_H
+
+#include <string>
+#include <vector>
+#include <boost/scoped_ptr.hpp>
+#include <gnuradio/high_res_timer.h>
+#include <gnuradio/tags.h>
+#include <gnuradio/thread/thread.h>
+#include <gnuradio/logger.h>
+#include <gr_drf/api.h>
+#include <gr_drf/writer_stats.h>
+#include "event_log.h"
+#include "file_closer.h"
+#include "file_layout.h"
+#include "file_mover.h"
+#include "file_policy.h"
+#include "file_pruner.h"
+#include "latency_stats.h"
+#include "lookahead.h"
+#include "raw_writer.h"
+#include "sample_gatherer.h"
+#include "trace_file.h"
+#include "worker_ring.h"
+#include "write_queue.h"
+
+extern "C" {
+#include <digital_rf.h>
+}
+
+namespace gr {
+  namespace drf {
+
+    class writer_pool;
+
+    /*!
+     * \brief Writes one channel of samples to a Digital RF directory.
+     *
+     * Holds everything the sink blocks keep per channel: the Digital RF
+     * writer object, the time and drop bookkeeping from the rx_time tags,
+     * and the optional queue, coalescing, look-ahead and pipelined close
+     * machinery. The owning block calls work() from its own work() with
+     * the channel's input buffer and tags. Where files go is up to a
+     * file_layout, their disk space and page cache to a file_policy, and
+     * gathering samples into writes to a sample_gatherer.
+     *
+     * When asynchronous writing is enabled, blocks are queued by work()
+     * and written by a writer_pool thread calling write_queued(). With a
+     * worker process, blocks are passed through a worker_ring instead and
+     * the worker writes them with its own channel_writer, calling reopen()
+     * and write().
+     */
+    class GRDRF_API channel_writer
+    {
+     public:
+      typedef boost::function<uint64_t ()> backlog_func;
+
+     private:
+      char d_dir[4096];
+      size_t d_sample_size;
+      uint64_t d_subdir_cadence_s;
+      uint64_t d_file_cadence_ms;
+      uint64_t d_sample_rate_numerator;
+      uint64_t d_sample_rate_denominator;
+      long double d_sample_rate;
+      char d_uuid[512];
+      bool d_is_complex;
+      int d_num_subchannels;
+      bool d_stop_on_dropped_packet;
+      bool d_is_continuous;
+      int d_compression_level;
+      bool d_checksum;
+
+      Digital_rf_write_object *d_drfo;
+      uint64_t d_drfo_start; // global start sample of d_drfo
+      bool d_drfo_written;
+      uint64_t d_open_file; // file d_drfo has open once d_drfo_written
+      hid_t d_dtype;
+      uint64_t d_t0; // start time in samples from unix epoch
+      uint64_t d_local_index;
+      uint64_t d_total_dropped; // written by work() under d_stats_mutex
+      uint64_t d_start_sample;
+      bool d_first;
+      uint64_t d_drop_count; // written by work() under d_stats_mutex
+
+      // updated by the thread that writes, read from any
+      mutable gr::thread::mutex d_stats_mutex;
+      uint64_t d_samples_written;
+      uint64_t d_bytes_written;
+      latency_stats d_write_latency; // each digital_rf_write_hdf5() call
+      latency_stats d_disk_latency; // rx_time of last sample to written
+
+      int d_async_buffers;
+      int d_async_buffer_items;
+      boost::scoped_ptr<write_queue> d_queue;
+      writer_pool *d_pool;
+      gr::thread::mutex d_writer_mutex;
+      std::string d_writer_error;
+      bool d_writer_failed;
+
+      int d_worker_buffers;
+      int d_worker_buffer_items;
+      std::string d_worker_program;
+      boost::scoped_ptr<worker_ring> d_ring;
+      bool d_opened; // writer created here or start sent to the worker
+
+      gr::logger_ptr d_logger;
+      double d_log_interval;
+      bool d_quiet;
+      boost::scoped_ptr<event_log> d_events;
+
+      uint64_t d_ring_max_bytes;
+      double d_ring_max_seconds;
+      boost::scoped_ptr<file_pruner> d_pruner;
+
+      file_layout d_layout;
+      double d_staging_rate;
+      boost::scoped_ptr<file_mover> d_mover;
+
+      bool d_preallocate;
+      bool d_writeback_on_close;
+      uint64_t d_writeback_max_dirty;
+      boost::scoped_ptr<file_policy> d_policy; // NULL if nothing to do
+
+      uint64_t d_metadata_cache; // bytes, or 0 for HDF5's default
+
+      int d_alignment; // as set: bytes, -1 to detect or 0 for none
+      uint64_t d_align_bytes; // in use since start(), or 0
+      uint64_t d_align_items; // samples in a whole number of d_align_bytes
+
+      bool d_chunk_writes;
+      uint64_t d_chunk_items; // rows per rf_data chunk, or 0 if unknown
+      bool d_chunk_checked; // d_chunk_items read from the first file
+      bool d_chunk_pending; // work() waiting for d_chunk_items
+
+      double d_adapt_max_lag; // seconds, or 0 for a fixed level
+      bool d_adapting; // since start(), if there's a backlog to follow
+      backlog_func d_backlog;
+      // the level for new writers; only the writing thread changes it,
+      // under d_stats_mutex, so that thread reads it without the lock and
+      // the lookahead thread and stats() read it with the lock
+      int d_level;
+      int d_drfo_level; // of d_drfo
+      uint64_t d_level_changes; // as d_level
+
+      bool d_raw_capture;
+      boost::scoped_ptr<raw_writer> d_raw; // replaces d_drfo when capturing
+
+      std::string d_trace_path;
+      boost::shared_ptr<trace_file> d_trace; // NULL unless tracing
+      int d_trace_channel;
+
+      bool d_lookahead_enabled;
+      boost::scoped_ptr<lookahead> d_lookahead;
+      uint64_t d_file_index; // file being written
+      uint64_t d_next_file_sample; // first sample of the following file
+      latency_stats d_boundary_latency;
+
+      int d_close_max_files;
+      boost::scoped_ptr<file_closer> d_closer;
+      Digital_rf_write_object *d_next_drfo; // created ahead for d_next_drfo_file
+      uint64_t d_next_drfo_file;
+      uint64_t d_next_drfo_start;
+      int d_next_drfo_level;
+      gr::thread::mutex d_next_drfo_mutex;
+
+      int d_coalesce_items;
+      double d_coalesce_delay;
+      // NULL if work() writes straight to the writer
+      boost::scoped_ptr<sample_gatherer> d_gatherer;
+
+      void log(event_log::level lvl, const std::string &msg);
+      void start_worker();
+      void open_writer();
+      Digital_rf_write_object *new_writer(uint64_t start_sample, int level);
+      uint64_t backlog_items() const;
+      void adapt_compression();
+      void set_file_metadata_cache(Digital_rf_write_object *drfo);
+      uint64_t detect_alignment() const;
+      void read_chunk_items();
+      void apply_chunk_items();
+      uint64_t run_capacity(uint64_t align_items) const;
+      int hdf5_fd() const;
+      std::string raw_dir() const;
+      std::string raw_properties() const;
+      void create_writer();
+      void close_writer();
+      void file_closed(uint64_t file_index);
+      void file_moved(uint64_t file_index);
+      void rotate_writer(uint64_t sample);
+      void prepare_next(uint64_t file_index);
+      void write_hdf5(uint64_t index, char *buf, uint64_t nitems);
+      void write_zeros_hdf5(uint64_t index, uint64_t nitems);
+      char *acquire_buffer(uint64_t index);
+      void submit_block(const write_block &block);
+      void file_bounds(uint64_t index, uint64_t &first, uint64_t &end);
+      void write_samples(char *buf, uint64_t nitems);
+      void write_zeros(uint64_t nitems);
+      void skip_samples(uint64_t nitems);
+      void check_writer();
+      int write_input(char *in, int noutput_items,
+                      const std::vector<gr::tag_t> &rx_time_tags);
+      void get_rx_time(const std::vector<gr::tag_t> &rx_time_tags);
+      int detect_and_handle_overflow(const std::vector<gr::tag_t> &rx_time_tags,
+                                     char *in);
+
+      // make copy constructor private with no implementation to prevent copying
+      channel_writer(const channel_writer& that);
+
+     public:
+      channel_writer(const char *dir, size_t sample_size,
+                     uint64_t subdir_cadence_s, uint64_t file_cadence_ms,
+                     uint64_t sample_rate_numerator,
+                     uint64_t sample_rate_denominator,
+                     const char *uuid, bool is_complex,
+                     int num_subchannels, bool stop_on_dropped_packet,
+                     bool is_continuous, int compression_level,
+                     bool checksum, gr::logger_ptr logger);
+      ~channel_writer();
+
+      void set_start_sample(uint64_t start_sample);
+      void set_async_writer(int num_buffers, int buffer_items);
+      void set_coalesce(int items, double max_delay);
+      void set_lookahead(bool enable);
+      void set_pipelined_close(int max_files);
+      void set_worker_process(int num_buffers, int buffer_items,
+                              const std::string &program);
+      void set_quiet(bool quiet);
+      void set_log_interval(double seconds);
+      void set_trace(const std::string &path);
+      void set_ring_buffer(uint64_t max_bytes, double max_seconds);
+      void set_staging(const std::string &root, double max_rate);
+      void set_raw_capture(bool enable);
+      void set_stripe(const std::vector<std::string> &roots);
+      void set_preallocate(bool enable);
+      void set_writeback(bool on_close, uint64_t max_dirty);
+      void set_metadata_cache(uint64_t bytes);
+      void set_alignment(int bytes);
+      void set_chunk_writes(bool enable);
+      void set_adaptive_compression(double max_lag);
+
+      /*!
+       * \brief Samples waiting to be written, for adaptive compression
+       * without a queue of this writer's own, as in the worker process.
+       */
+      void set_backlog(const backlog_func &backlog);
+
+      //! True if set_async_writer() asked for a queue in this process.
+      bool async() const
+      {
+        return d_async_buffers > 0 && d_worker_buffers == 0;
+      }
+
+      //! Snapshot of the writer's statistics.
+      writer_stats stats() const;
+
+      //! Set up the queue and helper threads; call from the block's start().
+      void start();
+
+      //! Pool whose threads write this channel's queue.
+      void set_pool(writer_pool *pool);
+
+      //! Hand any gathered samples to the writer.
+      void flush();
+
+      //! Shut down the helper threads once the queue has been drained.
+      void stop();
+
+      /*!
+       * \brief Write \p noutput_items items from \p in.
+       *
+       * \p rx_time_tags are the channel's rx_time tags in the range being
+       * written. Returns gr::block::WORK_DONE if the channel should stop,
+       * \p noutput_items otherwise.
+       */
+      int work(char *in, int noutput_items,
+               const std::vector<gr::tag_t> &rx_time_tags);
+
+      //! True if there are queued blocks waiting for write_queued().
+      bool has_queued();
+
+      //! Write the next queued block; called from a writer_pool thread.
+      void write_queued();
+
+      //! Close the current writer and create one starting at sample \p t0.
+      void reopen(uint64_t t0);
+
+      //! Write \p block to the current writer.
+      void write(const write_block &block);
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_CHANNEL_WRITER_H */
@@ -0,0 +1,435 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <algorithm>
+#include <stdexcept>
+#include <gnuradio/io_signature.h>
+#include "digital_rf_multi_sink_impl.h"
+
+#define DEFAULT_BUFFERS 4
+#define DEFAULT_BUFFER_ITEMS 262144
+
+namespace gr {
+  namespace drf {
+
+    digital_rf_multi_sink::sptr
+    digital_rf_multi_sink::make(const std::vector<std::string> &dirs,
+                                size_t sample_size,
+                                uint64_t subdir_cadence_s,
+                                uint64_t file_cadence_ms,
+                                uint64_t sample_rate_numerator,
+                                uint64_t sample_rate_denominator,
+                                char *uuid, bool is_complex,
+                                int num_subchannels,
+                                bool stop_on_dropped_packet,
+                                bool is_continuous, int compression_level,
+                                bool checksum, int num_threads)
+    {
+      return gnuradio::get_initial_sptr
+        (new digital_rf_multi_sink_impl(dirs, sample_size, subdir_cadence_s,
+                                        file_cadence_ms,
+                                        sample_rate_numerator,
+                                        sample_rate_denominator, uuid,
+                                        is_complex, num_subchannels,
+                                        stop_on_dropped_packet,
+                                        is_continuous, compression_level,
+                                        checksum, num_threads));
+    }
+
+
+    /*
+     * The private constructor
+     */
+    digital_rf_multi_sink_impl::digital_rf_multi_sink_impl(
+            const std::vector<std::string> &dirs, size_t sample_size,
+            uint64_t subdir_cadence_s, uint64_t file_cadence_ms,
+            uint64_t sample_rate_numerator, uint64_t sample_rate_denominator,
+            char* uuid, bool is_complex, int num_subchannels,
+            bool stop_on_dropped_packet, bool is_continuous,
+            int compression_level, bool checksum, int num_threads
+    )
+      : gr::sync_block("digital_rf_multi_sink",
+               gr::io_signature::make(dirs.size(), dirs.size(),
+                                      sample_size*num_subchannels),
+               gr::io_signature::make(0, 0, 0)),
+        d_num_threads(num_threads)
+    {
+      size_t k;
+
+      if(dirs.empty()) {
+        throw std::invalid_argument("At least one directory is required");
+      }
+      if(num_threads < 1) {
+        throw std::invalid_argument("Number of writer threads must be >= 1");
+      }
+
+      for(k=0; k<dirs.size(); k++) {
+        d_writers.push_back(boost::shared_ptr<channel_writer>(
+                new channel_writer(dirs[k].c_str(), sample_size,
+                                   subdir_cadence_s, file_cadence_ms,
+                                   sample_rate_numerator,
+                                   sample_rate_denominator, uuid,
+                                   is_complex, num_subchannels,
+                                   stop_on_dropped_packet, is_continuous,
+                                   compression_level, checksum,
+                                   d_logger)));
+        d_writers[k]->set_async_writer(DEFAULT_BUFFERS, DEFAULT_BUFFER_ITEMS);
+      }
+    }
+
+    /*
+     * Our virtual destructor.
+     */
+    digital_rf_multi_sink_impl::~digital_rf_multi_sink_impl()
+    {
+    }
+
+    const channel_writer &
+    digital_rf_multi_sink_impl::writer(int channel) const
+    {
+      if(channel < 0 || channel >= (int)d_writers.size()) {
+        throw std::out_of_range("Channel index out of range");
+      }
+      return *d_writers[channel];
+    }
+
+    writer_stats
+    digital_rf_multi_sink_impl::stats(int channel) const
+    {
+      return writer(channel).stats();
+    }
+
+    writer_stats
+    digital_rf_multi_sink_impl::rpc_stats() const
+    {
+      writer_stats total, ch;
+      size_t k;
+
+      total = d_writers[0]->stats();
+      for(k=1; k<d_writers.size(); k++) {
+        ch = d_writers[k]->stats();
+        total.queue_depth += ch.queue_depth;
+        total.queue_high_water += ch.queue_high_water;
+        total.stall_time += ch.stall_time;
+        total.writer_backlog += ch.writer_backlog;
+        total.boundary_count += ch.boundary_count;
+        total.boundary_latency_avg = std::max(total.boundary_latency_avg,
+                                              ch.boundary_latency_avg);
+        total.boundary_latency_max = std::max(total.boundary_latency_max,
+                                              ch.boundary_latency_max);
+        total.close_queue_depth += ch.close_queue_depth;
+        total.close_latency_avg = std::max(total.close_latency_avg,
+                                           ch.close_latency_avg);
+        total.close_stall_time += ch.close_stall_time;
+        total.samples_written += ch.samples_written;
+        total.samples_dropped += ch.samples_dropped;
+        total.drop_count += ch.drop_count;
+        total.bytes_written += ch.bytes_written;
+        total.write_latency_p50 = std::max(total.write_latency_p50,
+                                           ch.write_latency_p50);
+        total.write_latency_p99 = std::max(total.write_latency_p99,
+                                           ch.write_latency_p99);
+        total.write_latency_max = std::max(total.write_latency_max,
+                                           ch.write_latency_max);
+        total.disk_latency_avg = std::max(total.disk_latency_avg,
+                                          ch.disk_latency_avg);
+        total.disk_latency_max = std::max(total.disk_latency_max,
+                                          ch.disk_latency_max);
+        total.staged_bytes += ch.staged_bytes;
+        total.staged_files += ch.staged_files;
+        total.writeback_latency_avg = std::max(total.writeback_latency_avg,
+                                               ch.writeback_latency_avg);
+        total.writeback_latency_max = std::max(total.writeback_latency_max,
+                                               ch.writeback_latency_max);
+        total.alignment = std::max(total.alignment, ch.alignment);
+        total.chunk_items = std::max(total.chunk_items, ch.chunk_items);
+        total.compression_level = std::max(total.compression_level,
+                                           ch.compression_level);
+        total.compression_changes += ch.compression_changes;
+      }
+      return total;
+    }
+
+    void
+    digital_rf_multi_sink_impl::setup_rpc()
+    {
+#ifdef GR_CTRLPORT
+      std::vector<rpcbasic_sptr> vars = rpc_variables(alias());
+      size_t k;
+
+      for(k=0; k<vars.size(); k++) {
+        add_rpc_variable(vars[k]);
+      }
+#endif /* GR_CTRLPORT */
+    }
+
+    int
+    digital_rf_multi_sink_impl::num_channels() const
+    {
+      return d_writers.size();
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_start_sample(uint64_t start_sample)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_start_sample(start_sample);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_async_writer(int num_buffers,
+                                                 int buffer_items)
+    {
+      size_t k;
+
+      if(num_buffers < 1) {
+        throw std::invalid_argument("Number of buffers must be >= 1");
+      }
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_async_writer(num_buffers, buffer_items);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_coalesce(int items, double max_delay)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_coalesce(items, max_delay);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_lookahead(bool enable)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_lookahead(enable);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_pipelined_close(int max_files)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_pipelined_close(max_files);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_worker_process(int num_buffers,
+                                                   int buffer_items,
+                                                   const std::string &program)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_worker_process(num_buffers, buffer_items, program);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_quiet(bool quiet)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_quiet(quiet);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_log_interval(double seconds)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_log_interval(seconds);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_trace(const std::string &path)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_trace(path);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_ring_buffer(uint64_t max_bytes,
+                                                double max_seconds)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_ring_buffer(max_bytes, max_seconds);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_staging(const std::string &dir,
+                                            double max_rate)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_staging(dir, max_rate);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_raw_capture(bool enable)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_raw_capture(enable);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_stripe(
+            const std::vector<std::string> &dirs)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_stripe(dirs);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_preallocate(bool enable)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_preallocate(enable);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_writeback(bool on_close,
+                                              uint64_t max_dirty)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_writeback(on_close, max_dirty);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_metadata_cache(uint64_t bytes)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_metadata_cache(bytes);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_alignment(int bytes)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_alignment(bytes);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_chunk_writes(bool enable)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_chunk_writes(enable);
+      }
+    }
+
+    void
+    digital_rf_multi_sink_impl::set_adaptive_compression(double max_lag)
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_adaptive_compression(max_lag);
+      }
+    }
+
+    bool
+    digital_rf_multi_sink_impl::start()
+    {
+      std::vector<channel_writer *> channels;
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->start();
+        channels.push_back(d_writers[k].get());
+      }
+      d_pool.reset(new writer_pool(channels, d_num_threads));
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->set_pool(d_pool.get());
+      }
+      return true;
+    }
+
+    bool
+    digital_rf_multi_sink_impl::stop()
+    {
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->flush();
+      }
+      // the pool writes everything queued before its threads exit
+      d_pool.reset();
+      for(k=0; k<d_writers.size(); k++) {
+        d_writers[k]->stop();
+      }
+      return true;
+    }
+
+    int
+    digital_rf_multi_sink_impl::work(int noutput_items,
+                                     gr_vector_const_void_star &input_items,
+                                     gr_vector_void_star &output_items)
+    {
+      std::vector<gr::tag_t> rx_time_tags;
+      bool done = false;
+      size_t k;
+
+      for(k=0; k<d_writers.size(); k++) {
+        get_tags_in_range(rx_time_tags, k, nitems_read(k),
+                          nitems_read(k) + noutput_items,
+                          pmt::string_to_symbol("rx_time"));
+        if(d_writers[k]->work((char *)input_items[k], noutput_items,
+                              rx_time_tags) == WORK_DONE) {
+          done = true;
+        }
+      }
+
+      return done ? WORK_DONE : noutput_items;
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,89 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_DIGITAL_RF_MULTI_SINK_IMPL_H
+#define INCLUDED_GRDRF_DIGITAL_RF_MULTI_SINK_IMPL_H
+
+#include <vector>
+#include <gr_drf/digital_rf_multi_sink.h>
+#include <boost/scoped_ptr.hpp>
+#include <boost/shared_ptr.hpp>
+#include "channel_writer.h"
+#include "stats_rpc.h"
+#include "writer_pool.h"
+
+namespace gr {
+  namespace drf {
+
+    class digital_rf_multi_sink_impl : public digital_rf_multi_sink,
+                                       public stats_rpc
+    {
+     private:
+      std::vector<boost::shared_ptr<channel_writer> > d_writers;
+      int d_num_threads;
+      boost::scoped_ptr<writer_pool> d_pool;
+
+      const channel_writer &writer(int channel) const;
+
+      // make copy constructor private with no implementation to prevent copying
+      digital_rf_multi_sink_impl(const digital_rf_multi_sink_impl& that);
+
+     protected:
+      // totals over the channels, and the worst of their latencies
+      writer_stats rpc_stats() const;
+
+     public:
+      digital_rf_multi_sink_impl(const std::vector<std::string> &dirs,
+                                 size_t sample_size,
+                                 uint64_t subdir_cadence_s,
+                                 uint64_t file_cadence_ms,
+                                 uint64_t sample_rate_numerator,
+                                 uint64_t sample_rate_denominator,
+                                 char* uuid, bool is_complex,
+                                 int num_subchannels,
+                                 bool stop_on_dropped_packet,
+                                 bool is_continuous, int compression_level,
+                                 bool checksum, int num_threads);
+      ~digital_rf_multi_sink_impl();
+
+      int num_channels() const;
+      void set_start_sample(uint64_t start_sample);
+      void set_async_writer(int num_buffers, int buffer_items);
+      void set_coalesce(int items, double max_delay);
+      void set_lookahead(bool enable);
+      void set_pipelined_close(int max_files);
+      void set_worker_process(int num_buffers, int buffer_items,
+                              const std::string &program);
+      void set_quiet(bool quiet);
+      void set_log_interval(double seconds);
+      void set_trace(const std::string &path);
+      void set_ring_buffer(uint64_t max_bytes, double max_seconds);
+      void set_staging(const std::string &dir, double max_rate);
+      void set_raw_capture(bool enable);
+      void set_stripe(const std::vector<std::string> &dirs);
+      void set_preallocate(bool enable);
+      void set_writeback(bool on_close, uint64_t max_dirty);
+      void set_metadata_cache(uint64_t bytes);
+      void set_alignment(int bytes);
+      void set_chunk_writes(bool enable);
+      void set_adaptive_compression(double max_lag);
+      writer_stats stats(int channel) const;
+
+      void setup_rpc();
+
+      bool start();
+      bool stop();
+
+      // Where all the action really happens
+      int work(int noutput_items,
+               gr_vector_const_void_star &input_items,
+               gr_vector_void_star &output_items);
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_DIGITAL_RF_MULTI_SINK_IMPL_H */
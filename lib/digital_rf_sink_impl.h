@@ -8,52 +8,63 @@
 #define INCLUDED_GRDRF_DIGITAL_RF_SINK_IMPL_H
 
 #include <gr_drf/digital_rf_sink.h>
-
-extern "C" {
-#include <digital_rf.h>
-}
+#include <boost/scoped_ptr.hpp>
+#include "channel_writer.h"
+#include "stats_rpc.h"
+#include "writer_pool.h"
 
 namespace gr {
   namespace drf {
 
-    class digital_rf_sink_impl : public digital_rf_sink
+    class digital_rf_sink_impl : public digital_rf_sink, public stats_rpc
     {
      private:
-      char d_dir[4096];
-      size_t d_sample_size;
-      uint64_t d_subdir_cadence_s;
-      uint64_t d_file_cadence_ms;
-      uint64_t d_sample_rate_numerator;
-      uint64_t d_sample_rate_denominator;
-      long double d_sample_rate;
-      char d_uuid[512];
-      bool d_is_complex;
-      int d_num_subchannels;
-      bool d_stop_on_dropped_packet;
-
-      Digital_rf_write_object *d_drfo;
-      hid_t d_dtype;
-      uint64_t d_t0; // start time in samples from unix epoch
-      uint64_t d_local_index;
-      uint64_t d_total_dropped;
-      bool d_first;
-
-      char *d_zero_buffer;
+      channel_writer d_writer;
+      boost::scoped_ptr<writer_pool> d_pool;
 
       // make copy constructor private with no implementation to prevent copying
       digital_rf_sink_impl(const digital_rf_sink_impl& that);
 
+     protected:
+      writer_stats rpc_stats() const;
+
      public:
       digital_rf_sink_impl(char *dir, size_t sample_size,
                            uint64_t subdir_cadence_s, uint64_t file_cadence_ms,
                            uint64_t sample_rate_numerator,
                            uint64_t sample_rate_denominator,
                            char* uuid, bool is_complex,
-                           int num_subchannels, bool stop_on_dropped_packet);
+                           int num_subchannels, bool stop_on_dropped_packet,
+                           bool is_continuous, int compression_level,
+                           bool checksum);
       ~digital_rf_sink_impl();
 
-      void get_rx_time(int n);
-      int detect_and_handle_overflow(uint64_t start, uint64_t end, char *in);
+      void set_start_sample(uint64_t start_sample);
+      void set_async_writer(int num_buffers, int buffer_items);
+      void set_coalesce(int items, double max_delay);
+      void set_lookahead(bool enable);
+      void set_pipelined_close(int max_files);
+      void set_worker_process(int num_buffers, int buffer_items,
+                              const std::string &program);
+      void set_quiet(bool quiet);
+      void set_log_interval(double seconds);
+      void set_trace(const std::string &path);
+      void set_ring_buffer(uint64_t max_bytes, double max_seconds);
+      void set_staging(const std::string &dir, double max_rate);
+      void set_raw_capture(bool enable);
+      void set_stripe(const std::vector<std::string> &dirs);
+      void set_preallocate(bool enable);
+      void set_writeback(bool on_close, uint64_t max_dirty);
+      void set_metadata_cache(uint64_t bytes);
+      void set_alignment(int bytes);
+      void set_chunk_writes(bool enable);
+      void set_adaptive_compression(double max_lag);
+      writer_stats stats() const;
+
+      void setup_rpc();
+
+      bool start();
+      bool stop();
 
       // Where all the action really happens
       int work(int noutput_items,
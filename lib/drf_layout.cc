@@ -0,0 +1,75 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <stdio.h>
+#include <time.h>
+#include "drf_layout.h"
+
+namespace gr {
+  namespace drf {
+
+    // products of sample indices and rates overflow 64 bits
+    typedef unsigned __int128 uint128_t;
+
+    uint64_t
+    drf_file_index(uint64_t sample, uint64_t sample_rate_numerator,
+                   uint64_t sample_rate_denominator, uint64_t file_cadence_ms)
+    {
+      uint128_t num, den;
+
+      // floor(time_ms/file_cadence_ms) with time_ms = 1000*sample/rate
+      num = (uint128_t)sample*sample_rate_denominator*1000;
+      den = (uint128_t)sample_rate_numerator*file_cadence_ms;
+      return (uint64_t)(num/den);
+    }
+
+    uint64_t
+    drf_file_start_sample(uint64_t file_index, uint64_t sample_rate_numerator,
+                          uint64_t sample_rate_denominator,
+                          uint64_t file_cadence_ms)
+    {
+      uint128_t num, den;
+
+      // ceil(file_start_ms*rate/1000)
+      num = (uint128_t)file_index*file_cadence_ms*sample_rate_numerator;
+      den = (uint128_t)sample_rate_denominator*1000;
+      return (uint64_t)((num + den - 1)/den);
+    }
+
+    std::string
+    drf_subdir_name(uint64_t file_index, uint64_t file_cadence_ms,
+                    uint64_t subdir_cadence_s)
+    {
+      char name[64];
+      struct tm tm;
+      uint64_t sec;
+      time_t subdir_sec;
+
+      sec = file_index*file_cadence_ms/1000;
+      subdir_sec = (time_t)(sec - sec % subdir_cadence_s);
+      gmtime_r(&subdir_sec, &tm);
+      strftime(name, sizeof(name), "%Y-%m-%dT%H-%M-%S", &tm);
+      return std::string(name);
+    }
+
+    std::string
+    drf_file_name(uint64_t file_index, uint64_t file_cadence_ms)
+    {
+      char name[64];
+      uint64_t ms;
+
+      ms = file_index*file_cadence_ms;
+      snprintf(name, sizeof(name), "rf@%llu.%03llu.h5",
+               (unsigned long long)(ms/1000), (unsigned long long)(ms % 1000));
+      return std::string(name);
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,55 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_DRF_LAYOUT_H
+#define INCLUDED_GRDRF_DRF_LAYOUT_H
+
+#include <string>
+#include <stdint.h>
+#include <gr_drf/api.h>
+
+namespace gr {
+  namespace drf {
+
+    /*
+     * Where the Digital RF writer puts each sample.
+     *
+     * Files are numbered by how many file cadences have passed since the
+     * epoch, so file n holds the samples whose time falls in
+     * [n*file_cadence_ms, (n+1)*file_cadence_ms) milliseconds. Sample times
+     * are computed exactly from the rational sample rate.
+     */
+
+    //! Index since the epoch of the file holding \p sample.
+    GRDRF_API uint64_t drf_file_index(uint64_t sample,
+                                      uint64_t sample_rate_numerator,
+                                      uint64_t sample_rate_denominator,
+                                      uint64_t file_cadence_ms);
+
+    //! Index since the epoch of the first sample in file \p file_index.
+    GRDRF_API uint64_t drf_file_start_sample(uint64_t file_index,
+                                             uint64_t sample_rate_numerator,
+                                             uint64_t sample_rate_denominator,
+                                             uint64_t file_cadence_ms);
+
+    /*!
+     * \brief Name of the subdirectory holding file \p file_index.
+     *
+     * Subdirectories are named for the UTC time of their start, e.g.
+     * "2017-01-01T00-00-00", and start on multiples of \p subdir_cadence_s.
+     */
+    GRDRF_API std::string drf_subdir_name(uint64_t file_index,
+                                          uint64_t file_cadence_ms,
+                                          uint64_t subdir_cadence_s);
+
+    //! Name of file \p file_index within its subdirectory, e.g. "rf@1483228800.000.h5".
+    GRDRF_API std::string drf_file_name(uint64_t file_index,
+                                        uint64_t file_cadence_ms);
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_DRF_LAYOUT_H */
@@ -0,0 +1,158 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <boost/bind.hpp>
+#include <boost/format.hpp>
+#include <boost/thread/thread_time.hpp>
+#include "event_log.h"
+
+#define MAX_MESSAGES 64
+
+namespace gr {
+  namespace drf {
+
+    event_log::event_log(gr::logger_ptr logger, const std::string &name,
+                         double interval, bool quiet)
+      : d_logger(logger), d_name(name), d_interval(interval), d_quiet(quiet),
+        d_suppressed(0), d_drop_events(0), d_drop_samples(0),
+        d_total_drop_samples(0), d_done(false)
+    {
+      d_output = boost::bind(&event_log::write, this, _1, _2);
+      d_thread = gr::thread::thread(boost::bind(&event_log::run, this));
+    }
+
+    event_log::event_log(const output_func &output, const std::string &name,
+                         double interval, bool quiet)
+      : d_output(output), d_name(name), d_interval(interval), d_quiet(quiet),
+        d_suppressed(0), d_drop_events(0), d_drop_samples(0),
+        d_total_drop_samples(0), d_done(false)
+    {
+      d_thread = gr::thread::thread(boost::bind(&event_log::run, this));
+    }
+
+    event_log::~event_log()
+    {
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_done = true;
+        d_cond.notify_one();
+      }
+      d_thread.join();
+    }
+
+    void
+    event_log::post(level lvl, const std::string &msg)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      if(d_messages.size() >= MAX_MESSAGES) {
+        d_suppressed++;
+        return;
+      }
+      d_messages.push_back(std::make_pair(lvl, msg));
+      d_cond.notify_one();
+    }
+
+    void
+    event_log::drop(uint64_t samples)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      d_drop_events++;
+      d_drop_samples += samples;
+      d_total_drop_samples += samples;
+    }
+
+    void
+    event_log::flush(gr::thread::scoped_lock &lock, bool summary)
+    {
+      std::deque<std::pair<level, std::string> > messages;
+      uint64_t suppressed, events = 0, samples = 0, total = 0;
+
+      messages.swap(d_messages);
+      suppressed = d_suppressed;
+      d_suppressed = 0;
+      if(summary) {
+        events = d_drop_events;
+        samples = d_drop_samples;
+        total = d_total_drop_samples;
+        d_drop_events = 0;
+        d_drop_samples = 0;
+      }
+
+      // log without holding the lock so callers never wait on output
+      lock.unlock();
+      while(!messages.empty()) {
+        level lvl = messages.front().first;
+        if(lvl == LEVEL_INFO && d_quiet) {
+          lvl = LEVEL_DEBUG;
+        }
+        d_output(lvl, d_name + ": " + messages.front().second);
+        messages.pop_front();
+      }
+      if(suppressed) {
+        d_output(LEVEL_WARN,
+                 boost::str(boost::format("%s: %d messages suppressed")
+                            % d_name % suppressed));
+      }
+      if(events) {
+        d_output(LEVEL_WARN,
+                 boost::str(boost::format("%s: %d drop(s), %d samples in "
+                                          "the last %.1f s, %d samples "
+                                          "dropped in total")
+                            % d_name % events % samples % d_interval
+                            % total));
+      }
+      lock.lock();
+    }
+
+    void
+    event_log::write(level lvl, const std::string &msg)
+    {
+      switch(lvl) {
+      case LEVEL_ERROR:
+        GR_LOG_ERROR(d_logger, msg);
+        break;
+      case LEVEL_WARN:
+        GR_LOG_WARN(d_logger, msg);
+        break;
+      case LEVEL_INFO:
+        GR_LOG_INFO(d_logger, msg);
+        break;
+      default:
+        GR_LOG_DEBUG(d_logger, msg);
+      }
+    }
+
+    void
+    event_log::run()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      boost::posix_time::microseconds interval((int64_t)(d_interval*1e6));
+      boost::system_time next = boost::get_system_time() + interval;
+
+      while(!d_done) {
+        // messages go out as they arrive, drops once per interval
+        if(d_messages.empty()) {
+          d_cond.timed_wait(lock, next);
+        }
+        if(boost::get_system_time() >= next) {
+          flush(lock, true);
+          next = boost::get_system_time() + interval;
+        }
+        else if(!d_messages.empty()) {
+          flush(lock, false);
+        }
+      }
+      flush(lock, true);
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,82 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_EVENT_LOG_H
+#define INCLUDED_GRDRF_EVENT_LOG_H
+
+#include <deque>
+#include <string>
+#include <utility>
+#include <stdint.h>
+#include <boost/function.hpp>
+#include <gr_drf/api.h>
+#include <gnuradio/logger.h>
+#include <gnuradio/thread/thread.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Logs a writer's events from a thread of its own.
+     *
+     * Callers only queue messages and count drops, so nothing they do
+     * waits on the terminal or a log file. The thread passes queued
+     * messages to the GNU Radio logger and, once per interval, logs one
+     * summary of the drops counted since the last one. At most a fixed
+     * number of messages are held, further ones are counted and reported
+     * as suppressed.
+     *
+     * In quiet mode informational messages are logged at debug level.
+     * Instead of a logger, the messages can go to an output function,
+     * called from the thread.
+     */
+    class GRDRF_API event_log
+    {
+     public:
+      enum level { LEVEL_DEBUG, LEVEL_INFO, LEVEL_WARN, LEVEL_ERROR };
+      typedef boost::function<void (level, const std::string &)> output_func;
+
+     private:
+      gr::logger_ptr d_logger;
+      output_func d_output;
+      std::string d_name;
+      double d_interval;
+      bool d_quiet;
+
+      std::deque<std::pair<level, std::string> > d_messages;
+      uint64_t d_suppressed;
+      uint64_t d_drop_events;
+      uint64_t d_drop_samples;
+      uint64_t d_total_drop_samples;
+      bool d_done;
+
+      gr::thread::thread d_thread;
+      gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_cond;
+
+      void run();
+      void flush(gr::thread::scoped_lock &lock, bool summary);
+      void write(level lvl, const std::string &msg);
+
+     public:
+      event_log(gr::logger_ptr logger, const std::string &name,
+                double interval, bool quiet);
+      event_log(const output_func &output, const std::string &name,
+                double interval, bool quiet);
+
+      //! Logs everything still queued before returning.
+      ~event_log();
+
+      void post(level lvl, const std::string &msg);
+
+      //! Count a drop of \p samples samples for the next summary.
+      void drop(uint64_t samples);
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_EVENT_LOG_H */
@@ -0,0 +1,117 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <boost/bind.hpp>
+#include <gnuradio/high_res_timer.h>
+#include "file_closer.h"
+
+namespace gr {
+  namespace drf {
+
+    file_closer::file_closer(size_t max_in_flight, const closed_func &closed)
+      : d_max_in_flight(max_in_flight), d_closed(closed), d_closing(0),
+        d_done(false),
+        d_stall_time(0)
+    {
+      d_thread = gr::thread::thread(boost::bind(&file_closer::run, this));
+    }
+
+    file_closer::~file_closer()
+    {
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_done = true;
+        d_pop_cond.notify_one();
+      }
+      d_thread.join();
+    }
+
+    void
+    file_closer::push(Digital_rf_write_object *drfo, uint64_t file_index)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      if(d_queue.size() + d_closing >= d_max_in_flight) {
+        gr::high_res_timer_type t0 = gr::high_res_timer_now();
+        while(d_queue.size() + d_closing >= d_max_in_flight) {
+          d_push_cond.wait(lock);
+        }
+        d_stall_time += ((double)(gr::high_res_timer_now() - t0)
+                         / gr::high_res_timer_tps());
+      }
+      d_queue.push_back(std::make_pair(drfo, file_index));
+      d_pop_cond.notify_one();
+    }
+
+    size_t
+    file_closer::in_flight() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_queue.size() + d_closing;
+    }
+
+    double
+    file_closer::stall_time() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_stall_time;
+    }
+
+    std::string
+    file_closer::error() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_error;
+    }
+
+    void
+    file_closer::run()
+    {
+      Digital_rf_write_object *drfo;
+      uint64_t file_index;
+      gr::high_res_timer_type t0;
+      int result;
+
+      while(true) {
+        {
+          gr::thread::scoped_lock lock(d_mutex);
+          while(d_queue.empty() && !d_done) {
+            d_pop_cond.wait(lock);
+          }
+          if(d_queue.empty()) {
+            return;
+          }
+          drfo = d_queue.front().first;
+          file_index = d_queue.front().second;
+          d_queue.pop_front();
+          d_closing++;
+        }
+
+        t0 = gr::high_res_timer_now();
+        result = digital_rf_close_write_hdf5(drfo);
+        d_close_latency.add((double)(gr::high_res_timer_now() - t0)
+                            / gr::high_res_timer_tps());
+        if(!result && d_closed) {
+          d_closed(file_index);
+        }
+
+        {
+          gr::thread::scoped_lock lock(d_mutex);
+          if(result && d_error.empty()) {
+            d_error = "Nonzero result on close";
+          }
+          d_closing--;
+          d_push_cond.notify_one();
+        }
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
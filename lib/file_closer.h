@@ -0,0 +1,83 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_FILE_CLOSER_H
+#define INCLUDED_GRDRF_FILE_CLOSER_H
+
+#include <deque>
+#include <string>
+#include <utility>
+#include <boost/function.hpp>
+#include <gnuradio/thread/thread.h>
+#include "latency_stats.h"
+
+extern "C" {
+#include <digital_rf.h>
+}
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Thread that closes finished Digital RF writers.
+     *
+     * Closing a writer flushes and closes its HDF5 file. Handing finished
+     * writers to this thread lets writing continue in the next file while
+     * the previous one is finalized. At most \p max_in_flight writers wait
+     * to be closed; push() blocks beyond that. Once a writer is closed,
+     * the closed function is called from this thread with the index of
+     * the file it had open.
+     */
+    class file_closer
+    {
+     public:
+      typedef boost::function<void (uint64_t)> closed_func;
+
+     private:
+      size_t d_max_in_flight;
+      closed_func d_closed;
+      std::deque<std::pair<Digital_rf_write_object *, uint64_t> > d_queue;
+      size_t d_closing;
+      bool d_done;
+      double d_stall_time;
+      std::string d_error;
+      latency_stats d_close_latency;
+
+      gr::thread::thread d_thread;
+      mutable gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_push_cond;
+      gr::thread::condition_variable d_pop_cond;
+
+      void run();
+
+     public:
+      file_closer(size_t max_in_flight, const closed_func &closed);
+
+      //! Close all queued writers and stop the thread.
+      ~file_closer();
+
+      /*!
+       * \brief Queue \p drfo, which has file \p file_index open, to be
+       * closed, waiting if too many are in flight.
+       */
+      void push(Digital_rf_write_object *drfo, uint64_t file_index);
+
+      //! Writers queued or being closed.
+      size_t in_flight() const;
+
+      //! Total seconds push() has waited for room.
+      double stall_time() const;
+
+      //! Description of the first failed close, empty if none failed.
+      std::string error() const;
+
+      const latency_stats &close_latency() const { return d_close_latency; }
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_FILE_CLOSER_H */
@@ -0,0 +1,84 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <fcntl.h>
+#include <unistd.h>
+#include <boost/bind.hpp>
+#include <gnuradio/high_res_timer.h>
+#include "file_flusher.h"
+
+namespace gr {
+  namespace drf {
+
+    file_flusher::file_flusher()
+      : d_done(false)
+    {
+      d_thread = gr::thread::thread(boost::bind(&file_flusher::run, this));
+    }
+
+    file_flusher::~file_flusher()
+    {
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_done = true;
+        d_cond.notify_one();
+      }
+      d_thread.join();
+    }
+
+    void
+    file_flusher::push(int fd)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      d_queue.push_back(fd);
+      d_cond.notify_one();
+    }
+
+    void
+    file_flusher::flush(int fd)
+    {
+#ifdef __linux__
+      gr::high_res_timer_type t0 = gr::high_res_timer_now();
+
+      // a length of 0 means to the end of the file
+      sync_file_range(fd, 0, 0,
+                      SYNC_FILE_RANGE_WAIT_BEFORE | SYNC_FILE_RANGE_WRITE
+                      | SYNC_FILE_RANGE_WAIT_AFTER);
+      posix_fadvise(fd, 0, 0, POSIX_FADV_DONTNEED);
+      d_latency.add((double)(gr::high_res_timer_now() - t0)
+                    / gr::high_res_timer_tps());
+#endif
+      close(fd);
+    }
+
+    void
+    file_flusher::run()
+    {
+      int fd;
+
+      while(true) {
+        {
+          gr::thread::scoped_lock lock(d_mutex);
+          while(d_queue.empty() && !d_done) {
+            d_cond.wait(lock);
+          }
+          if(d_queue.empty()) {
+            return;
+          }
+          fd = d_queue.front();
+          d_queue.pop_front();
+        }
+        flush(fd);
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,62 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_FILE_FLUSHER_H
+#define INCLUDED_GRDRF_FILE_FLUSHER_H
+
+#include <deque>
+#include <stdint.h>
+#include <gnuradio/thread/thread.h>
+#include "latency_stats.h"
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Thread that writes files back to disk and drops them from
+     * the page cache.
+     *
+     * Left alone, the kernel lets written data pile up in the page cache
+     * and then writes it back in bursts that stall the writer. The writer
+     * instead push()es a descriptor for each file once it is closed, or
+     * for the open file every so many bytes, and this thread waits for
+     * the dirty pages to be written (sync_file_range()) and then drops
+     * them (posix_fadvise(POSIX_FADV_DONTNEED)). Only pages that are
+     * still dirty are written, so flushing a growing file again is cheap.
+     * Does nothing but close the descriptors on systems without
+     * sync_file_range().
+     */
+    class file_flusher
+    {
+     private:
+      std::deque<int> d_queue;
+      bool d_done;
+      latency_stats d_latency;
+
+      gr::thread::thread d_thread;
+      mutable gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_cond;
+
+      void flush(int fd);
+      void run();
+
+     public:
+      file_flusher();
+
+      //! Flush all pushed files and stop the thread.
+      ~file_flusher();
+
+      //! Flush the file open as \p fd, which is closed afterwards.
+      void push(int fd);
+
+      //! Seconds taken to flush and drop a file.
+      const latency_stats &latency() const { return d_latency; }
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_FILE_FLUSHER_H */
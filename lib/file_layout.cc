@@ -0,0 +1,174 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <stdexcept>
+#include <boost/filesystem.hpp>
+#include "drf_layout.h"
+#include "file_layout.h"
+
+namespace gr {
+  namespace drf {
+
+    file_layout::file_layout(const std::string &dir,
+                             uint64_t subdir_cadence_s,
+                             uint64_t file_cadence_ms)
+      : d_dir(dir), d_write_dir(dir), d_subdir_cadence_s(subdir_cadence_s),
+        d_file_cadence_ms(file_cadence_ms), d_stripe_linked(false)
+    {
+    }
+
+    std::string
+    file_layout::channel_name() const
+    {
+      boost::filesystem::path dir(d_dir);
+
+      if(dir.filename() == ".") {
+        dir = dir.parent_path();
+      }
+      return dir.filename().string();
+    }
+
+    void
+    file_layout::set_staging(const std::string &root)
+    {
+      if(!root.empty() && !d_stripe_dirs.empty()) {
+        throw std::invalid_argument("Staging can't be combined with striping");
+      }
+      d_staging_root = root;
+      if(root.empty()) {
+        d_write_dir = d_dir;
+        return;
+      }
+      // each channel stages in a directory named like its own
+      d_write_dir = (boost::filesystem::path(root) / channel_name()).string();
+    }
+
+    void
+    file_layout::set_stripe(const std::vector<std::string> &roots)
+    {
+      size_t k;
+
+      if(!roots.empty() && !d_staging_root.empty()) {
+        throw std::invalid_argument("Striping can't be combined with staging");
+      }
+      d_stripe_dirs.clear();
+      if(roots.empty()) {
+        return;
+      }
+      d_stripe_dirs.push_back(d_dir);
+      for(k=0; k<roots.size(); k++) {
+        // absolute, since the links in d_dir point here
+        d_stripe_dirs.push_back(
+                (boost::filesystem::absolute(roots[k])
+                 / channel_name()).string());
+      }
+    }
+
+    std::string
+    file_layout::stripe_roots() const
+    {
+      std::string roots;
+      size_t k;
+
+      for(k=1; k<d_stripe_dirs.size(); k++) {
+        roots += boost::filesystem::path(d_stripe_dirs[k]).parent_path()
+                .string() + "\n";
+      }
+      return roots;
+    }
+
+    void
+    file_layout::create_dirs()
+    {
+      size_t k;
+
+      boost::filesystem::create_directories(d_write_dir);
+      for(k=1; k<d_stripe_dirs.size(); k++) {
+        boost::filesystem::create_directories(d_stripe_dirs[k]);
+      }
+    }
+
+    std::string
+    file_layout::file_dir(uint64_t file_index) const
+    {
+      if(d_stripe_dirs.empty()) {
+        return d_write_dir;
+      }
+      return d_stripe_dirs[file_index % d_stripe_dirs.size()];
+    }
+
+    std::string
+    file_layout::file_path(uint64_t file_index) const
+    {
+      return (boost::filesystem::path(file_dir(file_index))
+              / drf_subdir_name(file_index, d_file_cadence_ms,
+                                d_subdir_cadence_s)
+              / drf_file_name(file_index, d_file_cadence_ms)).string();
+    }
+
+    void
+    file_layout::prepare(uint64_t file_index)
+    {
+      std::string subdir;
+      size_t k;
+
+      subdir = drf_subdir_name(file_index, d_file_cadence_ms,
+                               d_subdir_cadence_s);
+      if(subdir != d_prepared_subdir) {
+        if(d_stripe_dirs.empty()) {
+          boost::filesystem::create_directories(
+                  boost::filesystem::path(d_write_dir) / subdir);
+        }
+        for(k=0; k<d_stripe_dirs.size(); k++) {
+          boost::filesystem::create_directories(
+                  boost::filesystem::path(d_stripe_dirs[k]) / subdir);
+        }
+        d_prepared_subdir = subdir;
+      }
+    }
+
+    std::string
+    file_layout::link(uint64_t file_index)
+    {
+      std::string dir = file_dir(file_index);
+      std::string subdir = drf_subdir_name(file_index, d_file_cadence_ms,
+                                           d_subdir_cadence_s);
+      std::string name = drf_file_name(file_index, d_file_cadence_ms);
+      boost::filesystem::path link =
+              boost::filesystem::path(d_dir) / subdir / name;
+      boost::filesystem::path props =
+              boost::filesystem::path(d_dir) / "drf_properties.h5";
+      boost::system::error_code ec;
+      std::string error;
+
+      if(dir == d_dir) {
+        return error;
+      }
+      // readers of d_dir see the file where it would have been
+      boost::filesystem::create_directories(link.parent_path(), ec);
+      boost::filesystem::create_symlink(
+              boost::filesystem::path(dir) / subdir / name, link, ec);
+      if(ec) {
+        error = link.string() + ": " + ec.message();
+      }
+      if(!d_stripe_linked) {
+        // the first file may not have been written to d_dir
+        if(!boost::filesystem::exists(props)) {
+          boost::filesystem::create_symlink(
+                  boost::filesystem::path(dir) / props.filename(), props,
+                  ec);
+        }
+        d_stripe_linked = true;
+      }
+      return error;
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,85 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_FILE_LAYOUT_H
+#define INCLUDED_GRDRF_FILE_LAYOUT_H
+
+#include <string>
+#include <vector>
+#include <stdint.h>
+#include <gr_drf/api.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Where the files of one channel are written.
+     *
+     * Files go to the channel directory, or to a staging directory that a
+     * file_mover empties into it, or rotate over the channel directory and
+     * stripe directories on other disks, linked back into the channel
+     * directory once closed. Staging and striping can't be combined.
+     */
+    class GRDRF_API file_layout
+    {
+     private:
+      std::string d_dir;
+      std::string d_write_dir; // d_dir, or the staging directory
+      std::string d_staging_root;
+      uint64_t d_subdir_cadence_s;
+      uint64_t d_file_cadence_ms;
+
+      // channel directories that files rotate over, d_dir first; empty
+      // unless striping
+      std::vector<std::string> d_stripe_dirs;
+      bool d_stripe_linked; // drf_properties.h5 linked into d_dir
+      std::string d_prepared_subdir;
+
+      std::string channel_name() const;
+
+     public:
+      file_layout(const std::string &dir, uint64_t subdir_cadence_s,
+                  uint64_t file_cadence_ms);
+
+      //! Write files under \p root instead, or to the channel if empty.
+      void set_staging(const std::string &root);
+
+      //! Rotate files over the channel and a directory under each root.
+      void set_stripe(const std::vector<std::string> &roots);
+
+      const std::string &dir() const { return d_dir; }
+      const std::string &write_dir() const { return d_write_dir; }
+      const std::string &staging_root() const { return d_staging_root; }
+      bool striped() const { return !d_stripe_dirs.empty(); }
+
+      //! The stripe roots, one per line.
+      std::string stripe_roots() const;
+
+      //! Create the staging and stripe directories.
+      void create_dirs();
+
+      //! Directory file \p file_index is written to.
+      std::string file_dir(uint64_t file_index) const;
+
+      //! Path file \p file_index is written to.
+      std::string file_path(uint64_t file_index) const;
+
+      //! Create the subdirectory of file \p file_index if it is new.
+      void prepare(uint64_t file_index);
+
+      /*!
+       * \brief Link closed file \p file_index into the channel directory
+       * if it was written elsewhere.
+       *
+       * Returns a description of what failed, empty if nothing did.
+       */
+      std::string link(uint64_t file_index);
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_FILE_LAYOUT_H */
@@ -0,0 +1,242 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <cerrno>
+#include <cstdio>
+#include <cstring>
+#include <stdexcept>
+#include <vector>
+#include <unistd.h>
+#include <boost/bind.hpp>
+#include <boost/filesystem.hpp>
+#include <boost/thread/thread.hpp>
+#include <gnuradio/high_res_timer.h>
+#ifdef __linux__
+#include <sys/resource.h>
+#include <sys/syscall.h>
+#endif
+#include "drf_layout.h"
+#include "file_mover.h"
+
+// bytes copied at a time between file systems
+#define COPY_BLOCK (1 << 20)
+
+namespace gr {
+  namespace drf {
+
+    file_mover::file_mover(const std::string &staging_dir,
+                           const std::string &dir, uint64_t file_cadence_ms,
+                           uint64_t subdir_cadence_s, double max_rate,
+                           const moved_func &moved)
+      : d_staging_dir(staging_dir), d_dir(dir),
+        d_file_cadence_ms(file_cadence_ms),
+        d_subdir_cadence_s(subdir_cadence_s), d_max_rate(max_rate),
+        d_moved(moved), d_staged_bytes(0), d_done(false)
+    {
+      d_thread = gr::thread::thread(boost::bind(&file_mover::run, this));
+    }
+
+    file_mover::~file_mover()
+    {
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_done = true;
+        d_cond.notify_one();
+      }
+      d_thread.join();
+    }
+
+    void
+    file_mover::push(uint64_t file_index)
+    {
+      boost::system::error_code ec;
+      uint64_t size;
+
+      size = boost::filesystem::file_size(path(d_staging_dir, file_index),
+                                          ec);
+      if(ec) {
+        size = 0;
+      }
+
+      gr::thread::scoped_lock lock(d_mutex);
+      d_queue.push_back(std::make_pair(file_index, size));
+      d_staged_bytes += size;
+      d_cond.notify_one();
+    }
+
+    uint64_t
+    file_mover::staged_bytes() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_staged_bytes;
+    }
+
+    size_t
+    file_mover::staged_files() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_queue.size();
+    }
+
+    std::string
+    file_mover::error() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_error;
+    }
+
+    std::string
+    file_mover::path(const std::string &dir, uint64_t file_index) const
+    {
+      return (boost::filesystem::path(dir)
+              / drf_subdir_name(file_index, d_file_cadence_ms,
+                                d_subdir_cadence_s)
+              / drf_file_name(file_index, d_file_cadence_ms)).string();
+    }
+
+    void
+    file_mover::copy(const std::string &src, const std::string &dst)
+    {
+      std::vector<char> buf(COPY_BLOCK);
+      gr::high_res_timer_type t0 = gr::high_res_timer_now();
+      double ahead;
+      uint64_t copied = 0;
+      size_t n;
+      FILE *in, *out;
+
+      in = fopen(src.c_str(), "rb");
+      if(!in) {
+        throw std::runtime_error(src + ": " + strerror(errno));
+      }
+      out = fopen(dst.c_str(), "wb");
+      if(!out) {
+        fclose(in);
+        throw std::runtime_error(dst + ": " + strerror(errno));
+      }
+      while((n = fread(&buf[0], 1, buf.size(), in)) > 0) {
+        if(fwrite(&buf[0], 1, n, out) != n) {
+          break;
+        }
+        copied += n;
+        if(d_max_rate > 0) {
+          // sleep off any time the copy is ahead of the allowed rate
+          ahead = (copied/d_max_rate
+                   - ((double)(gr::high_res_timer_now() - t0)
+                      / gr::high_res_timer_tps()));
+          if(ahead > 0) {
+            boost::this_thread::sleep(
+                    boost::posix_time::microseconds((int64_t)(ahead*1e6)));
+          }
+        }
+      }
+      if(ferror(in) || ferror(out) || fflush(out) || fsync(fileno(out))) {
+        fclose(in);
+        fclose(out);
+        unlink(dst.c_str());
+        throw std::runtime_error(dst + ": copy failed");
+      }
+      fclose(in);
+      if(fclose(out)) {
+        unlink(dst.c_str());
+        throw std::runtime_error(dst + ": copy failed");
+      }
+    }
+
+    // hidden name for a file while it is being copied
+    static boost::filesystem::path
+    part_name(const boost::filesystem::path &path)
+    {
+      return path.parent_path() / ("." + path.filename().string() + ".part");
+    }
+
+    void
+    file_mover::move(uint64_t file_index)
+    {
+      boost::filesystem::path src(path(d_staging_dir, file_index));
+      boost::filesystem::path dst(path(d_dir, file_index));
+      boost::filesystem::path tmp;
+      boost::filesystem::path props =
+              boost::filesystem::path(d_dir) / "drf_properties.h5";
+      boost::system::error_code ec;
+
+      boost::filesystem::create_directories(dst.parent_path());
+      if(!boost::filesystem::exists(props)) {
+        tmp = part_name(props);
+        copy((boost::filesystem::path(d_staging_dir)
+              / props.filename()).string(), tmp.string());
+        boost::filesystem::rename(tmp, props);
+      }
+
+      if(rename(src.c_str(), dst.c_str())) {
+        if(errno != EXDEV) {
+          throw std::runtime_error(src.string() + ": " + strerror(errno));
+        }
+        // on another file system, readers only ever see the whole file
+        tmp = part_name(dst);
+        copy(src.string(), tmp.string());
+        if(rename(tmp.c_str(), dst.c_str())) {
+          throw std::runtime_error(dst.string() + ": " + strerror(errno));
+        }
+        boost::filesystem::remove(src);
+      }
+
+      // the writer is past a subdirectory once files come from the next
+      if(!d_last_subdir.empty()
+         && d_last_subdir != src.parent_path().string()) {
+        boost::filesystem::remove(d_last_subdir, ec);
+      }
+      d_last_subdir = src.parent_path().string();
+    }
+
+    void
+    file_mover::run()
+    {
+      uint64_t file_index;
+
+#ifdef __linux__
+      setpriority(PRIO_PROCESS, syscall(SYS_gettid), 10);
+#endif
+
+      while(true) {
+        {
+          gr::thread::scoped_lock lock(d_mutex);
+          while(d_queue.empty() && !d_done) {
+            d_cond.wait(lock);
+          }
+          if(d_queue.empty()) {
+            return;
+          }
+          file_index = d_queue.front().first;
+        }
+
+        try {
+          move(file_index);
+          if(d_moved) {
+            d_moved(file_index);
+          }
+        }
+        catch(std::exception &e) {
+          // the file stays in the staging directory
+          gr::thread::scoped_lock lock(d_mutex);
+          if(d_error.empty()) {
+            d_error = e.what();
+          }
+        }
+
+        {
+          gr::thread::scoped_lock lock(d_mutex);
+          d_staged_bytes -= d_queue.front().second;
+          d_queue.pop_front();
+        }
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,92 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_FILE_MOVER_H
+#define INCLUDED_GRDRF_FILE_MOVER_H
+
+#include <deque>
+#include <string>
+#include <utility>
+#include <stdint.h>
+#include <boost/function.hpp>
+#include <gnuradio/thread/thread.h>
+#include <gr_drf/api.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Thread that moves closed files from a staging directory into
+     * the channel directory.
+     *
+     * The writer writes into a Digital RF directory on fast storage and
+     * push()es each file once it is closed. The mover puts it at the same
+     * place in the channel directory, renaming it if both are on one file
+     * system and copying it otherwise. A copy goes through a temporary
+     * name so readers never see part of a file, and is limited to
+     * \p max_rate bytes per second so that it doesn't compete with the
+     * writer for the bulk storage. Once a file has been moved, the moved
+     * function is called with its index.
+     */
+    class GRDRF_API file_mover
+    {
+     public:
+      typedef boost::function<void (uint64_t)> moved_func;
+
+     private:
+      std::string d_staging_dir;
+      std::string d_dir;
+      uint64_t d_file_cadence_ms;
+      uint64_t d_subdir_cadence_s;
+      double d_max_rate;
+      moved_func d_moved;
+
+      // files waiting to be moved with their sizes, including the one
+      // being moved
+      std::deque<std::pair<uint64_t, uint64_t> > d_queue;
+      uint64_t d_staged_bytes;
+      bool d_done;
+      std::string d_error;
+      std::string d_last_subdir;
+
+      gr::thread::thread d_thread;
+      mutable gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_cond;
+
+      std::string path(const std::string &dir, uint64_t file_index) const;
+      void copy(const std::string &src, const std::string &dst);
+      void move(uint64_t file_index);
+      void run();
+
+     public:
+      /*!
+       * \param max_rate Most bytes per second to copy between file
+       *        systems, 0 for no limit.
+       */
+      file_mover(const std::string &staging_dir, const std::string &dir,
+                 uint64_t file_cadence_ms, uint64_t subdir_cadence_s,
+                 double max_rate, const moved_func &moved);
+
+      //! Move all pushed files and stop the thread.
+      ~file_mover();
+
+      //! Move file \p file_index, which has been closed.
+      void push(uint64_t file_index);
+
+      //! Bytes in closed files that have not been moved yet.
+      uint64_t staged_bytes() const;
+
+      //! Number of closed files that have not been moved yet.
+      size_t staged_files() const;
+
+      //! Description of the first failed move, empty if none failed.
+      std::string error() const;
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_FILE_MOVER_H */
@@ -0,0 +1,115 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <cerrno>
+#include <cstring>
+#include <sys/stat.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include "file_policy.h"
+
+namespace gr {
+  namespace drf {
+
+    file_policy::file_policy(bool preallocate, uint64_t align_bytes,
+                             bool writeback_on_close,
+                             uint64_t writeback_max_dirty)
+      : d_preallocate(preallocate), d_align_bytes(align_bytes),
+        d_writeback_on_close(writeback_on_close),
+        d_writeback_max_dirty(writeback_max_dirty), d_dirty_bytes(0)
+    {
+      if(d_writeback_on_close || d_writeback_max_dirty > 0) {
+        d_flusher.reset(new file_flusher());
+      }
+    }
+
+    file_policy::~file_policy()
+    {
+    }
+
+    void
+    file_policy::opened(int fd, uint64_t bytes)
+    {
+      d_dirty_bytes = 0;
+#ifdef __linux__
+      if(!d_preallocate || fd < 0) {
+        return;
+      }
+      if(d_align_bytes > 0) {
+        bytes = ((bytes + d_align_bytes - 1)/d_align_bytes)*d_align_bytes;
+      }
+      // reserve the space past the end of the file HDF5 has just opened
+      // without changing its size, so HDF5 doesn't notice; a file system
+      // without support just grows the file as usual
+      fallocate(fd, FALLOC_FL_KEEP_SIZE, 0, bytes);
+#endif
+    }
+
+    bool
+    file_policy::written(uint64_t bytes)
+    {
+      if(d_writeback_max_dirty == 0) {
+        return false;
+      }
+      d_dirty_bytes += bytes;
+      return d_dirty_bytes >= d_writeback_max_dirty;
+    }
+
+    void
+    file_policy::write_back(int fd)
+    {
+      // a descriptor of its own, as HDF5 may close the file first
+      if(fd >= 0 && (fd = dup(fd)) >= 0) {
+        d_flusher->push(fd);
+      }
+      d_dirty_bytes = 0;
+    }
+
+    std::string
+    file_policy::closed(const std::string &path)
+    {
+      std::string error;
+      struct stat st;
+      int fd;
+
+      if(d_preallocate) {
+        // give back the space that HDF5 didn't use, e.g. with compression
+        fd = ::open(path.c_str(), O_WRONLY);
+        if(fd >= 0) {
+          if(fstat(fd, &st) || ftruncate(fd, st.st_size)) {
+            error = path + ": " + strerror(errno);
+          }
+          ::close(fd);
+        }
+      }
+      if(d_writeback_on_close) {
+        // opened here so the flusher doesn't mind the file being moved
+        fd = ::open(path.c_str(), O_RDONLY);
+        if(fd >= 0) {
+          d_flusher->push(fd);
+        }
+      }
+      return error;
+    }
+
+    double
+    file_policy::writeback_latency_avg() const
+    {
+      return d_flusher ? d_flusher->latency().mean() : 0;
+    }
+
+    double
+    file_policy::writeback_latency_max() const
+    {
+      return d_flusher ? d_flusher->latency().max() : 0;
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,68 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_FILE_POLICY_H
+#define INCLUDED_GRDRF_FILE_POLICY_H
+
+#include <string>
+#include <stdint.h>
+#include <boost/scoped_ptr.hpp>
+#include "file_flusher.h"
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief How the disk space and page cache of each file are managed.
+     *
+     * The writer tells it when a file is opened, written and closed. With
+     * preallocation, the space a file will need is reserved when it is
+     * opened and whatever is left over is given back when it is closed.
+     * With writeback, closed files and every so many bytes of the open
+     * one are handed to a file_flusher.
+     */
+    class file_policy
+    {
+     private:
+      bool d_preallocate;
+      uint64_t d_align_bytes;
+      bool d_writeback_on_close;
+      uint64_t d_writeback_max_dirty;
+      uint64_t d_dirty_bytes; // written since the open file was flushed
+      boost::scoped_ptr<file_flusher> d_flusher;
+
+     public:
+      file_policy(bool preallocate, uint64_t align_bytes,
+                  bool writeback_on_close, uint64_t writeback_max_dirty);
+
+      //! Flush all files handed over so far.
+      ~file_policy();
+
+      //! The file open as \p fd has just been opened to hold \p bytes.
+      void opened(int fd, uint64_t bytes);
+
+      //! Returns true once the open file is due to be written back.
+      bool written(uint64_t bytes);
+
+      //! Write back the open file, which HDF5 has open as \p fd.
+      void write_back(int fd);
+
+      /*!
+       * \brief The file at \p path has been closed.
+       *
+       * Returns a description of what failed, empty if nothing did.
+       */
+      std::string closed(const std::string &path);
+
+      //! Seconds taken to write back a file.
+      double writeback_latency_avg() const;
+      double writeback_latency_max() const;
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_FILE_POLICY_H */
@@ -0,0 +1,175 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <boost/bind.hpp>
+#include <boost/filesystem.hpp>
+#ifdef __linux__
+#include <sys/resource.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+#endif
+#include "drf_layout.h"
+#include "file_pruner.h"
+
+#ifdef __linux__
+// from linux/ioprio.h, which is not always installed
+#define IOPRIO_CLASS_IDLE 3
+#define IOPRIO_CLASS_SHIFT 13
+#define IOPRIO_WHO_PROCESS 1
+#endif
+
+namespace gr {
+  namespace drf {
+
+    file_pruner::file_pruner(const std::string &dir, uint64_t file_cadence_ms,
+                             uint64_t subdir_cadence_s, uint64_t max_bytes,
+                             double max_seconds)
+      : d_dir(dir), d_file_cadence_ms(file_cadence_ms),
+        d_subdir_cadence_s(subdir_cadence_s), d_max_bytes(max_bytes),
+        d_max_seconds(max_seconds), d_done(false), d_bytes(0), d_deleted(0)
+    {
+      d_thread = gr::thread::thread(boost::bind(&file_pruner::run, this));
+    }
+
+    file_pruner::~file_pruner()
+    {
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_done = true;
+        d_cond.notify_one();
+      }
+      d_thread.join();
+    }
+
+    void
+    file_pruner::push(uint64_t file_index)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      d_queue.push_back(file_index);
+      d_cond.notify_one();
+    }
+
+    uint64_t
+    file_pruner::bytes() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_bytes;
+    }
+
+    uint64_t
+    file_pruner::deleted() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_deleted;
+    }
+
+    std::string
+    file_pruner::subdir(uint64_t file_index) const
+    {
+      return (boost::filesystem::path(d_dir)
+              / drf_subdir_name(file_index, d_file_cadence_ms,
+                                d_subdir_cadence_s)).string();
+    }
+
+    bool
+    file_pruner::over_limit() const
+    {
+      uint64_t span_ms;
+
+      // always keep the newest file
+      if(d_files.size() < 2) {
+        return false;
+      }
+      if(d_max_bytes && d_bytes > d_max_bytes) {
+        return true;
+      }
+      span_ms = ((d_files.back().first + 1 - d_files.front().first)
+                 * d_file_cadence_ms);
+      return d_max_seconds > 0 && span_ms > d_max_seconds*1000;
+    }
+
+    void
+    file_pruner::remove_oldest()
+    {
+      boost::system::error_code ec;
+      uint64_t file_index = d_files.front().first;
+      std::string dir = subdir(file_index);
+      boost::filesystem::path file, target;
+
+      file = (boost::filesystem::path(dir)
+              / drf_file_name(file_index, d_file_cadence_ms));
+      if(boost::filesystem::is_symlink(file, ec)) {
+        // a striped file, the data is where the link points
+        target = boost::filesystem::read_symlink(file, ec);
+        boost::filesystem::remove(target, ec);
+      }
+      // a file that is already gone doesn't need deleting
+      boost::filesystem::remove(file, ec);
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_bytes -= d_files.front().second;
+        d_deleted++;
+        d_files.pop_front();
+      }
+      if(d_files.empty() || subdir(d_files.front().first) != dir) {
+        // fails harmlessly if anything else was put there
+        boost::filesystem::remove(dir, ec);
+        if(!target.empty()) {
+          boost::filesystem::remove(target.parent_path(), ec);
+        }
+      }
+    }
+
+    void
+    file_pruner::run()
+    {
+      boost::system::error_code ec;
+      uint64_t file_index, size;
+
+#ifdef __linux__
+      // only delete when nothing else wants the CPU or the disk
+      setpriority(PRIO_PROCESS, syscall(SYS_gettid), 19);
+      syscall(SYS_ioprio_set, IOPRIO_WHO_PROCESS, syscall(SYS_gettid),
+              IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT);
+#endif
+
+      while(true) {
+        {
+          gr::thread::scoped_lock lock(d_mutex);
+          while(d_queue.empty() && !d_done) {
+            d_cond.wait(lock);
+          }
+          if(d_queue.empty()) {
+            return;
+          }
+          file_index = d_queue.front();
+          d_queue.pop_front();
+        }
+
+        size = boost::filesystem::file_size(
+                boost::filesystem::path(subdir(file_index))
+                / drf_file_name(file_index, d_file_cadence_ms), ec);
+        if(ec) {
+          size = 0;
+        }
+        {
+          gr::thread::scoped_lock lock(d_mutex);
+          d_files.push_back(std::make_pair(file_index, size));
+          d_bytes += size;
+        }
+        while(over_limit()) {
+          remove_oldest();
+        }
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,84 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_FILE_PRUNER_H
+#define INCLUDED_GRDRF_FILE_PRUNER_H
+
+#include <deque>
+#include <string>
+#include <utility>
+#include <stdint.h>
+#include <gnuradio/thread/thread.h>
+#include <gr_drf/api.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Thread that deletes a channel's oldest files to bound its
+     * size or duration.
+     *
+     * The writer push()es each file once it has been closed, so the
+     * pruner knows every file it is responsible for without scanning the
+     * directory. Files that were already there when it started are left
+     * alone. Subdirectories are removed once their last file is deleted.
+     * A file that is a symbolic link, as left by striping, is deleted
+     * along with the file it points to.
+     * The thread runs at the lowest CPU and I/O priority.
+     */
+    class GRDRF_API file_pruner
+    {
+     private:
+      std::string d_dir;
+      uint64_t d_file_cadence_ms;
+      uint64_t d_subdir_cadence_s;
+      uint64_t d_max_bytes;
+      double d_max_seconds;
+
+      std::deque<uint64_t> d_queue; // closed files not yet accounted for
+      bool d_done;
+
+      // kept files, oldest first, with their sizes; only the thread
+      // changes them
+      std::deque<std::pair<uint64_t, uint64_t> > d_files;
+      uint64_t d_bytes;
+      uint64_t d_deleted;
+
+      gr::thread::thread d_thread;
+      mutable gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_cond;
+
+      std::string subdir(uint64_t file_index) const;
+      bool over_limit() const;
+      void remove_oldest();
+      void run();
+
+     public:
+      /*!
+       * \param max_bytes Most bytes of files to keep, 0 for no limit.
+       * \param max_seconds Most seconds of data to keep, 0 for no limit.
+       */
+      file_pruner(const std::string &dir, uint64_t file_cadence_ms,
+                  uint64_t subdir_cadence_s, uint64_t max_bytes,
+                  double max_seconds);
+
+      //! Account for all pushed files and stop the thread.
+      ~file_pruner();
+
+      //! Note that file \p file_index has been closed.
+      void push(uint64_t file_index);
+
+      //! Bytes in the files being kept.
+      uint64_t bytes() const;
+
+      //! Number of files deleted so far.
+      uint64_t deleted() const;
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_FILE_PRUNER_H */
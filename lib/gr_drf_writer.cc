@@ -0,0 +1,128 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+/*
+ * Worker process for a Digital RF sink in worker process mode.
+ *
+ * Started by the sink with the name of a shared memory worker_ring, it
+ * writes the records the sink queues there with a channel_writer of its
+ * own, so that its HDF5 library and global lock are not shared with the
+ * flowgraph or with other channels.
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <signal.h>
+#include <stdio.h>
+#include <sstream>
+#include <stdexcept>
+#include <unistd.h>
+#include <boost/bind.hpp>
+#include <boost/format.hpp>
+#ifdef __linux__
+#include <sys/prctl.h>
+#endif
+#include "channel_writer.h"
+#include "worker_ring.h"
+
+using namespace gr::drf;
+
+static void
+publish_stats(worker_ring &ring, const channel_writer &writer)
+{
+  ring.set_stats(writer.stats());
+}
+
+int
+main(int argc, char **argv)
+{
+  gr::logger_ptr logger, debug_logger;
+  worker_record record;
+  write_block block;
+  char *data;
+  bool failed = false;
+
+  if(argc != 2) {
+    fprintf(stderr, "usage: %s SHM_NAME\n", argv[0]);
+    return 2;
+  }
+#ifdef __linux__
+  // don't outlive a sink that was killed
+  prctl(PR_SET_PDEATHSIG, SIGTERM);
+#endif
+
+  gr::configure_default_loggers(logger, debug_logger, "gr_drf_writer");
+
+  try {
+    worker_ring ring(argv[1]);
+    const worker_config &c = ring.config();
+    std::istringstream stripe_roots(c.stripe);
+    std::vector<std::string> stripe;
+    std::string root;
+    channel_writer writer(c.dir, c.sample_size, c.subdir_cadence_s,
+                          c.file_cadence_ms, c.sample_rate_numerator,
+                          c.sample_rate_denominator, c.uuid, c.is_complex,
+                          c.num_subchannels, false, c.is_continuous,
+                          c.compression_level, c.checksum, logger);
+
+    writer.set_quiet(c.quiet);
+    writer.set_log_interval(c.log_interval);
+    writer.set_ring_buffer(c.ring_max_bytes, c.ring_max_seconds);
+    writer.set_staging(c.staging, c.staging_rate);
+    writer.set_raw_capture(c.raw_capture);
+    writer.set_preallocate(c.preallocate);
+    writer.set_writeback(c.writeback_on_close, c.writeback_max_dirty);
+    writer.set_metadata_cache(c.metadata_cache);
+    writer.set_alignment(c.alignment);
+    writer.set_chunk_writes(c.chunk_writes);
+    writer.set_adaptive_compression(c.adapt_max_lag);
+    // the samples the sink has queued that this process hasn't written
+    writer.set_backlog(boost::bind(&worker_ring::pending_items, &ring));
+    while(std::getline(stripe_roots, root)) {
+      stripe.push_back(root);
+    }
+    writer.set_stripe(stripe);
+    if(c.trace[0]) {
+      // a file of its own, on the same clock as the sink's
+      writer.set_trace((boost::format("%s.%d") % c.trace % getpid()).str());
+    }
+    writer.set_lookahead(c.lookahead);
+    writer.set_pipelined_close(c.close_queue);
+    writer.start();
+
+    while(ring.pop(record, data)) {
+      // after a failure keep draining so that the sink never blocks, it
+      // raises the error on its next call to work()
+      if(!failed) {
+        try {
+          if(record.type == WORKER_START) {
+            writer.reopen(record.index);
+          }
+          else {
+            block.index = record.index;
+            block.nitems = record.nitems;
+            block.data = (record.type == WORKER_DATA) ? data : NULL;
+            writer.write(block);
+          }
+          publish_stats(ring, writer);
+        }
+        catch(std::exception &e) {
+          ring.fail(e.what());
+          failed = true;
+        }
+      }
+      ring.release(record);
+    }
+    writer.stop();
+  }
+  catch(std::exception &e) {
+    fprintf(stderr, "%s: %s\n", argv[0], e.what());
+    return 1;
+  }
+  return failed ? 1 : 0;
+}
@@ -0,0 +1,102 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <algorithm>
+#include <cmath>
+#include <cstring>
+#include "latency_stats.h"
+
+// upper edge of the lowest histogram bucket
+#define MIN_LATENCY 1e-6
+
+namespace gr {
+  namespace drf {
+
+    latency_stats::latency_stats()
+      : d_count(0), d_total(0), d_max(0)
+    {
+      memset(d_buckets, 0, sizeof(d_buckets));
+    }
+
+    static double
+    bucket_edge(int bucket)
+    {
+      return MIN_LATENCY*std::pow(2.0, bucket/2.0);
+    }
+
+    void
+    latency_stats::add(double seconds)
+    {
+      int bucket = 0;
+
+      if(seconds > MIN_LATENCY) {
+        bucket = (int)std::ceil(2*std::log(seconds/MIN_LATENCY)/std::log(2.0));
+        if(bucket >= NUM_BUCKETS) {
+          bucket = NUM_BUCKETS - 1;
+        }
+      }
+
+      gr::thread::scoped_lock lock(d_mutex);
+
+      d_count++;
+      d_total += seconds;
+      if(seconds > d_max) {
+        d_max = seconds;
+      }
+      d_buckets[bucket]++;
+    }
+
+    uint64_t
+    latency_stats::count() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_count;
+    }
+
+    double
+    latency_stats::mean() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_count ? d_total/d_count : 0;
+    }
+
+    double
+    latency_stats::max() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_max;
+    }
+
+    double
+    latency_stats::quantile(double q) const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      uint64_t rank, seen = 0;
+      int k;
+
+      if(d_count == 0) {
+        return 0;
+      }
+      rank = (uint64_t)std::ceil(q*d_count);
+      if(rank < 1) {
+        rank = 1;
+      }
+      for(k=0; k<NUM_BUCKETS; k++) {
+        seen += d_buckets[k];
+        if(seen >= rank) {
+          break;
+        }
+      }
+      // the bucket's upper edge, but never more than was actually seen
+      return std::min(bucket_edge(k), d_max);
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
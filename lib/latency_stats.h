@@ -0,0 +1,53 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_LATENCY_STATS_H
+#define INCLUDED_GRDRF_LATENCY_STATS_H
+
+#include <stdint.h>
+#include <gnuradio/thread/thread.h>
+#include <gr_drf/api.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Running count, mean, maximum and histogram of a latency in
+     * seconds.
+     *
+     * Samples are added from a writing thread and read from any other.
+     * The histogram has logarithmic buckets a factor of sqrt(2) apart
+     * from 1 us, so quantiles are accurate to within that factor.
+     */
+    class GRDRF_API latency_stats
+    {
+     public:
+      static const int NUM_BUCKETS = 64;
+
+     private:
+      uint64_t d_count;
+      double d_total;
+      double d_max;
+      uint64_t d_buckets[NUM_BUCKETS];
+      mutable gr::thread::mutex d_mutex;
+
+     public:
+      latency_stats();
+
+      void add(double seconds);
+
+      uint64_t count() const;
+      double mean() const;
+      double max() const;
+
+      //! Upper bound of the \p q quantile (0-1), 0 if nothing was added.
+      double quantile(double q) const;
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_LATENCY_STATS_H */
@@ -0,0 +1,76 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <stdexcept>
+#include <boost/bind.hpp>
+#include <boost/format.hpp>
+#include "lookahead.h"
+
+namespace gr {
+  namespace drf {
+
+    lookahead::lookahead(const prepare_func &prepare,
+                         const error_func &error)
+      : d_prepare(prepare), d_error(error), d_next(0), d_pending(false), d_done(false)
+    {
+      d_thread = gr::thread::thread(boost::bind(&lookahead::run, this));
+    }
+
+    lookahead::~lookahead()
+    {
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_done = true;
+        d_cond.notify_one();
+      }
+      d_thread.join();
+    }
+
+    void
+    lookahead::advance(uint64_t file_index)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      d_next = file_index + 1;
+      d_pending = true;
+      d_cond.notify_one();
+    }
+
+    void
+    lookahead::run()
+    {
+      uint64_t next;
+
+      while(true) {
+        {
+          gr::thread::scoped_lock lock(d_mutex);
+          while(!d_pending && !d_done) {
+            d_cond.wait(lock);
+          }
+          if(d_done) {
+            return;
+          }
+          next = d_next;
+          d_pending = false;
+        }
+        // preparing is only an optimization, the writer does the same
+        // work itself if it has to
+        try {
+          d_prepare(next);
+        }
+        catch(std::exception &e) {
+          d_error(boost::str(boost::format("Failed to prepare file %d: %s")
+                             % next % e.what()));
+        }
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,58 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_LOOKAHEAD_H
+#define INCLUDED_GRDRF_LOOKAHEAD_H
+
+#include <stdint.h>
+#include <string>
+#include <boost/function.hpp>
+#include <gnuradio/thread/thread.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Helper thread that prepares the next file before the writer
+     * reaches it.
+     *
+     * Each time the writer moves into a new file it calls advance(), and the
+     * helper runs the prepare function for the file after that one. If the
+     * writer advances again before the helper gets to it, only the newest
+     * file is prepared. A file that fails to prepare is reported to the
+     * error function, and left for the writer to set up itself.
+     */
+    class lookahead
+    {
+     public:
+      typedef boost::function<void (uint64_t)> prepare_func;
+      typedef boost::function<void (const std::string &)> error_func;
+
+     private:
+      prepare_func d_prepare;
+      error_func d_error;
+      uint64_t d_next;
+      bool d_pending;
+      bool d_done;
+
+      gr::thread::thread d_thread;
+      gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_cond;
+
+      void run();
+
+     public:
+      lookahead(const prepare_func &prepare, const error_func &error);
+      ~lookahead();
+
+      //! Note that the writer is now in file \p file_index.
+      void advance(uint64_t file_index);
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_LOOKAHEAD_H */
@@ -26,11 +26,34 @@
  */
 
 #include "qa_drf.h"
+#include "qa_drf_layout.h"
+#include "qa_event_log.h"
+#include "qa_file_layout.h"
+#include "qa_file_mover.h"
+#include "qa_file_pruner.h"
+#include "qa_latency_stats.h"
+#include "qa_raw_writer.h"
+#include "qa_sample_gatherer.h"
+#include "qa_trace_file.h"
+#include "qa_worker_ring.h"
+#include "qa_write_queue.h"
 
 CppUnit::TestSuite *
 qa_drf::suite()
 {
   CppUnit::TestSuite *s = new CppUnit::TestSuite("drf");
 
+  s->addTest(gr::drf::qa_drf_layout::suite());
+  s->addTest(gr::drf::qa_event_log::suite());
+  s->addTest(gr::drf::qa_file_layout::suite());
+  s->addTest(gr::drf::qa_file_mover::suite());
+  s->addTest(gr::drf::qa_file_pruner::suite());
+  s->addTest(gr::drf::qa_latency_stats::suite());
+  s->addTest(gr::drf::qa_raw_writer::suite());
+  s->addTest(gr::drf::qa_sample_gatherer::suite());
+  s->addTest(gr::drf::qa_trace_file::suite());
+  s->addTest(gr::drf::qa_worker_ring::suite());
+  s->addTest(gr::drf::qa_write_queue::suite());
+
   return s;
 }
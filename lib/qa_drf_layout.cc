@@ -0,0 +1,77 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <cppunit/TestAssert.h>
+#include "qa_drf_layout.h"
+#include "drf_layout.h"
+
+namespace gr {
+  namespace drf {
+
+    void
+    qa_drf_layout::t_file_index()
+    {
+      // 1 MHz, 1 s files
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, drf_file_index(0, 1000000, 1, 1000));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0,
+                           drf_file_index(999999, 1000000, 1, 1000));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1,
+                           drf_file_index(1000000, 1000000, 1, 1000));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1000000,
+                           drf_file_start_sample(1, 1000000, 1, 1000));
+
+      // 100 MHz, 100 ms files, at a present day time without overflowing
+      CPPUNIT_ASSERT_EQUAL((uint64_t)14832288000ULL,
+                           drf_file_index(148322880000000000ULL, 100000000, 1,
+                                          100));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)148322880010000000ULL,
+                           drf_file_start_sample(14832288001ULL, 100000000, 1,
+                                                 100));
+    }
+
+    void
+    qa_drf_layout::t_fractional_rate()
+    {
+      uint64_t k, start;
+
+      // 1e6/3 Hz, so file boundaries fall between samples
+      CPPUNIT_ASSERT_EQUAL((uint64_t)333334,
+                           drf_file_start_sample(1, 1000000, 3, 1000));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, drf_file_index(333333, 1000000, 3,
+                                                       1000));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1, drf_file_index(333334, 1000000, 3,
+                                                       1000));
+
+      // each file starts at the first sample the index maps into it
+      for(k=0; k<100; k++) {
+        start = drf_file_start_sample(k, 1000000, 3, 10);
+        CPPUNIT_ASSERT_EQUAL(k, drf_file_index(start, 1000000, 3, 10));
+        if(start > 0) {
+          CPPUNIT_ASSERT_EQUAL(k - 1, drf_file_index(start - 1, 1000000, 3,
+                                                     10));
+        }
+      }
+    }
+
+    void
+    qa_drf_layout::t_names()
+    {
+      CPPUNIT_ASSERT_EQUAL(std::string("2017-01-01T00-00-00"),
+                           drf_subdir_name(1483228800ULL, 1000, 3600));
+      CPPUNIT_ASSERT_EQUAL(std::string("2017-01-01T01-00-00"),
+                           drf_subdir_name(1483232461ULL, 1000, 3600));
+      CPPUNIT_ASSERT_EQUAL(std::string("2017-01-01T00-00-00"),
+                           drf_subdir_name(14832288001ULL, 100, 3600));
+
+      CPPUNIT_ASSERT_EQUAL(std::string("rf@1483228800.000.h5"),
+                           drf_file_name(1483228800ULL, 1000));
+      CPPUNIT_ASSERT_EQUAL(std::string("rf@1483228800.100.h5"),
+                           drf_file_name(14832288001ULL, 100));
+      CPPUNIT_ASSERT_EQUAL(std::string("rf@0.010.h5"), drf_file_name(1, 10));
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,34 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_DRF_LAYOUT_H_
+#define _QA_DRF_LAYOUT_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_drf_layout : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_drf_layout);
+      CPPUNIT_TEST(t_file_index);
+      CPPUNIT_TEST(t_fractional_rate);
+      CPPUNIT_TEST(t_names);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_file_index();
+      void t_fractional_rate();
+      void t_names();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_DRF_LAYOUT_H_ */
@@ -0,0 +1,156 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <string>
+#include <utility>
+#include <vector>
+#include <boost/bind.hpp>
+#include <cppunit/TestAssert.h>
+#include "qa_event_log.h"
+#include "event_log.h"
+
+namespace gr {
+  namespace drf {
+
+    namespace {
+
+      // collects what the log thread outputs, optionally holding it in
+      // the output function until released
+      class collector
+      {
+       public:
+        std::vector<std::pair<event_log::level, std::string> > lines;
+        bool hold;
+        gr::thread::mutex mutex;
+        gr::thread::condition_variable cond;
+
+        collector() : hold(false) {}
+
+        event_log::output_func
+        output()
+        {
+          return boost::bind(&collector::write, this, _1, _2);
+        }
+
+        void
+        write(event_log::level lvl, const std::string &msg)
+        {
+          gr::thread::scoped_lock lock(mutex);
+
+          lines.push_back(std::make_pair(lvl, msg));
+          cond.notify_all();
+          while(hold) {
+            cond.wait(lock);
+          }
+        }
+
+        void
+        wait_for(size_t n)
+        {
+          gr::thread::scoped_lock lock(mutex);
+
+          while(lines.size() < n) {
+            cond.wait(lock);
+          }
+        }
+
+        void
+        release()
+        {
+          gr::thread::scoped_lock lock(mutex);
+
+          hold = false;
+          cond.notify_all();
+        }
+      };
+
+    } // anonymous namespace
+
+    void
+    qa_event_log::t_messages()
+    {
+      collector out;
+
+      {
+        event_log events(out.output(), "ch0", 60.0, false);
+
+        events.post(event_log::LEVEL_INFO, "Opened");
+        events.post(event_log::LEVEL_WARN, "Slow");
+        events.post(event_log::LEVEL_ERROR, "Failed");
+      }
+      // the destructor logs everything queued, in order
+      CPPUNIT_ASSERT_EQUAL((size_t)3, out.lines.size());
+      CPPUNIT_ASSERT_EQUAL(event_log::LEVEL_INFO, out.lines[0].first);
+      CPPUNIT_ASSERT_EQUAL(std::string("ch0: Opened"), out.lines[0].second);
+      CPPUNIT_ASSERT_EQUAL(event_log::LEVEL_WARN, out.lines[1].first);
+      CPPUNIT_ASSERT_EQUAL(std::string("ch0: Slow"), out.lines[1].second);
+      CPPUNIT_ASSERT_EQUAL(event_log::LEVEL_ERROR, out.lines[2].first);
+      CPPUNIT_ASSERT_EQUAL(std::string("ch0: Failed"), out.lines[2].second);
+    }
+
+    void
+    qa_event_log::t_quiet()
+    {
+      collector out;
+
+      {
+        event_log events(out.output(), "ch0", 60.0, true);
+
+        events.post(event_log::LEVEL_INFO, "Opened");
+        events.post(event_log::LEVEL_WARN, "Slow");
+      }
+      CPPUNIT_ASSERT_EQUAL((size_t)2, out.lines.size());
+      CPPUNIT_ASSERT_EQUAL(event_log::LEVEL_DEBUG, out.lines[0].first);
+      CPPUNIT_ASSERT_EQUAL(event_log::LEVEL_WARN, out.lines[1].first);
+    }
+
+    void
+    qa_event_log::t_suppressed()
+    {
+      collector out;
+      int k;
+
+      out.hold = true;
+      {
+        event_log events(out.output(), "ch0", 60.0, false);
+
+        // with the thread stuck in the output, the queue fills up
+        events.post(event_log::LEVEL_WARN, "first");
+        out.wait_for(1);
+        for(k=0; k<100; k++) {
+          events.post(event_log::LEVEL_WARN, "more");
+        }
+        out.release();
+      }
+      CPPUNIT_ASSERT_EQUAL((size_t)66, out.lines.size());
+      CPPUNIT_ASSERT_EQUAL(std::string("ch0: more"), out.lines[64].second);
+      CPPUNIT_ASSERT_EQUAL(event_log::LEVEL_WARN, out.lines[65].first);
+      CPPUNIT_ASSERT_EQUAL(std::string("ch0: 36 messages suppressed"),
+                           out.lines[65].second);
+    }
+
+    void
+    qa_event_log::t_drops()
+    {
+      collector out;
+
+      {
+        event_log events(out.output(), "ch0", 60.0, false);
+
+        events.drop(10);
+        events.drop(5);
+      }
+      // one summary rather than a message per drop
+      CPPUNIT_ASSERT_EQUAL((size_t)1, out.lines.size());
+      CPPUNIT_ASSERT_EQUAL(event_log::LEVEL_WARN, out.lines[0].first);
+      CPPUNIT_ASSERT_EQUAL(std::string("ch0: 2 drop(s), 15 samples in the "
+                                       "last 60.0 s, 15 samples dropped in "
+                                       "total"),
+                           out.lines[0].second);
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
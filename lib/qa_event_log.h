@@ -0,0 +1,36 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_EVENT_LOG_H_
+#define _QA_EVENT_LOG_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_event_log : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_event_log);
+      CPPUNIT_TEST(t_messages);
+      CPPUNIT_TEST(t_quiet);
+      CPPUNIT_TEST(t_suppressed);
+      CPPUNIT_TEST(t_drops);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_messages();
+      void t_quiet();
+      void t_suppressed();
+      void t_drops();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_EVENT_LOG_H_ */
@@ -0,0 +1,164 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <fstream>
+#include <stdexcept>
+#include <string>
+#include <vector>
+#include <boost/filesystem.hpp>
+#include <cppunit/TestAssert.h>
+#include "qa_file_layout.h"
+#include "file_layout.h"
+
+namespace gr {
+  namespace drf {
+
+    static boost::filesystem::path
+    temp_dir()
+    {
+      return boost::filesystem::temp_directory_path()
+              / boost::filesystem::unique_path("qa_file_layout-%%%%%%%%");
+    }
+
+    static void
+    touch(const std::string &path)
+    {
+      std::ofstream out(path.c_str());
+
+      CPPUNIT_ASSERT(out.good());
+    }
+
+    void
+    qa_file_layout::t_channel()
+    {
+      boost::filesystem::path root = temp_dir();
+      boost::filesystem::path dir = root / "ch0";
+      // 1 s files in 1 hour subdirectories, file 1483228800 is 2017-01-01
+      file_layout layout(dir.string(), 3600, 1000);
+      boost::filesystem::path subdir = dir / "2017-01-01T00-00-00";
+
+      CPPUNIT_ASSERT(!layout.striped());
+      CPPUNIT_ASSERT_EQUAL(dir.string(), layout.write_dir());
+      CPPUNIT_ASSERT_EQUAL(dir.string(), layout.file_dir(1483228800ULL));
+      CPPUNIT_ASSERT_EQUAL((subdir / "rf@1483228800.000.h5").string(),
+                           layout.file_path(1483228800ULL));
+
+      layout.create_dirs();
+      CPPUNIT_ASSERT(boost::filesystem::is_directory(dir));
+      layout.prepare(1483228800ULL);
+      CPPUNIT_ASSERT(boost::filesystem::is_directory(subdir));
+
+      // files written to the channel need no link
+      CPPUNIT_ASSERT_EQUAL(std::string(), layout.link(1483228800ULL));
+      CPPUNIT_ASSERT(!boost::filesystem::exists(
+                             subdir / "rf@1483228800.000.h5"));
+
+      boost::filesystem::remove_all(root);
+    }
+
+    void
+    qa_file_layout::t_staging()
+    {
+      boost::filesystem::path root = temp_dir();
+      boost::filesystem::path dir = root / "ch0";
+      boost::filesystem::path staging = root / "staging";
+      file_layout layout((dir / ".").string(), 3600, 1000);
+
+      // staged like the channel, a trailing "." doesn't change the name
+      layout.set_staging(staging.string());
+      CPPUNIT_ASSERT_EQUAL(staging.string(), layout.staging_root());
+      CPPUNIT_ASSERT_EQUAL((staging / "ch0").string(), layout.write_dir());
+      CPPUNIT_ASSERT_EQUAL((staging / "ch0").string(), layout.file_dir(0));
+
+      layout.create_dirs();
+      layout.prepare(1483228800ULL);
+      CPPUNIT_ASSERT(boost::filesystem::is_directory(
+                             staging / "ch0" / "2017-01-01T00-00-00"));
+      CPPUNIT_ASSERT(!boost::filesystem::exists(dir));
+
+      layout.set_staging("");
+      CPPUNIT_ASSERT_EQUAL((dir / ".").string(), layout.write_dir());
+
+      boost::filesystem::remove_all(root);
+    }
+
+    void
+    qa_file_layout::t_stripe()
+    {
+      boost::filesystem::path root = temp_dir();
+      boost::filesystem::path dir = root / "ch0";
+      std::vector<std::string> roots;
+      std::string subdir = "2017-01-01T00-00-00";
+      boost::filesystem::path a, b;
+      // 1483228800 is a multiple of 3, so it goes to the channel
+      uint64_t first = 1483228801ULL;
+      std::string name = "rf@1483228801.000.h5";
+
+      roots.push_back((root / "a").string());
+      roots.push_back((root / "b").string());
+      a = root / "a" / "ch0";
+      b = root / "b" / "ch0";
+      {
+        file_layout layout(dir.string(), 3600, 1000);
+
+        layout.set_stripe(roots);
+        CPPUNIT_ASSERT(layout.striped());
+        CPPUNIT_ASSERT_EQUAL(roots[0] + "\n" + roots[1] + "\n",
+                             layout.stripe_roots());
+
+        // files rotate over the channel and each stripe by index
+        CPPUNIT_ASSERT_EQUAL(a.string(), layout.file_dir(first));
+        CPPUNIT_ASSERT_EQUAL(b.string(), layout.file_dir(first + 1));
+        CPPUNIT_ASSERT_EQUAL(dir.string(), layout.file_dir(first + 2));
+        CPPUNIT_ASSERT_EQUAL((a / subdir / name).string(),
+                             layout.file_path(first));
+
+        layout.create_dirs();
+        layout.prepare(first);
+        CPPUNIT_ASSERT(boost::filesystem::is_directory(dir / subdir));
+        CPPUNIT_ASSERT(boost::filesystem::is_directory(a / subdir));
+        CPPUNIT_ASSERT(boost::filesystem::is_directory(b / subdir));
+
+        // the first file went to a stripe, so the properties are there
+        touch((a / "drf_properties.h5").string());
+        touch(layout.file_path(first));
+        CPPUNIT_ASSERT_EQUAL(std::string(), layout.link(first));
+        CPPUNIT_ASSERT(boost::filesystem::is_symlink(dir / subdir / name));
+        CPPUNIT_ASSERT_EQUAL((a / subdir / name).string(),
+                             boost::filesystem::read_symlink(
+                                     dir / subdir / name).string());
+        CPPUNIT_ASSERT(boost::filesystem::is_symlink(
+                               dir / "drf_properties.h5"));
+        CPPUNIT_ASSERT(boost::filesystem::exists(dir / "drf_properties.h5"));
+
+        // linking the same file again is reported rather than thrown
+        CPPUNIT_ASSERT(!layout.link(first).empty());
+        // files in the channel aren't linked
+        CPPUNIT_ASSERT_EQUAL(std::string(), layout.link(first + 2));
+      }
+
+      boost::filesystem::remove_all(root);
+    }
+
+    void
+    qa_file_layout::t_exclusive()
+    {
+      file_layout layout("ch0", 3600, 1000);
+      std::vector<std::string> roots(1, "a");
+
+      layout.set_staging("staging");
+      CPPUNIT_ASSERT_THROW(layout.set_stripe(roots), std::invalid_argument);
+      layout.set_staging("");
+      layout.set_stripe(roots);
+      CPPUNIT_ASSERT_THROW(layout.set_staging("staging"),
+                           std::invalid_argument);
+      layout.set_stripe(std::vector<std::string>());
+      CPPUNIT_ASSERT(!layout.striped());
+      layout.set_staging("staging");
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
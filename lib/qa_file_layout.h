@@ -0,0 +1,36 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_FILE_LAYOUT_H_
+#define _QA_FILE_LAYOUT_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_file_layout : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_file_layout);
+      CPPUNIT_TEST(t_channel);
+      CPPUNIT_TEST(t_staging);
+      CPPUNIT_TEST(t_stripe);
+      CPPUNIT_TEST(t_exclusive);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_channel();
+      void t_staging();
+      void t_stripe();
+      void t_exclusive();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_FILE_LAYOUT_H_ */
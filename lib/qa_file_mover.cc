@@ -0,0 +1,218 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <fstream>
+#include <iterator>
+#include <string>
+#include <vector>
+#include <boost/bind.hpp>
+#include <boost/filesystem.hpp>
+#include <cppunit/TestAssert.h>
+#include "qa_file_mover.h"
+#include "drf_layout.h"
+#include "file_mover.h"
+
+namespace gr {
+  namespace drf {
+
+    // 1 s files in 2 s subdirectories
+    static const uint64_t FILE_MS = 1000;
+    static const uint64_t SUBDIR_S = 2;
+
+    namespace {
+
+      // records the moved files, optionally holding the mover in the
+      // callback until released
+      class mover_events
+      {
+       public:
+        std::vector<uint64_t> moved;
+        bool hold;
+        gr::thread::mutex mutex;
+        gr::thread::condition_variable cond;
+
+        mover_events() : hold(false) {}
+
+        file_mover::moved_func
+        callback()
+        {
+          return boost::bind(&mover_events::file_moved, this, _1);
+        }
+
+        void
+        file_moved(uint64_t file_index)
+        {
+          gr::thread::scoped_lock lock(mutex);
+
+          moved.push_back(file_index);
+          cond.notify_all();
+          while(hold) {
+            cond.wait(lock);
+          }
+        }
+
+        void
+        wait_for(size_t n)
+        {
+          gr::thread::scoped_lock lock(mutex);
+
+          while(moved.size() < n) {
+            cond.wait(lock);
+          }
+        }
+
+        void
+        release()
+        {
+          gr::thread::scoped_lock lock(mutex);
+
+          hold = false;
+          cond.notify_all();
+        }
+      };
+
+    } // anonymous namespace
+
+    static boost::filesystem::path
+    temp_dir()
+    {
+      return boost::filesystem::temp_directory_path()
+              / boost::filesystem::unique_path("qa_file_mover-%%%%%%%%");
+    }
+
+    static boost::filesystem::path
+    file(const boost::filesystem::path &dir, uint64_t file_index)
+    {
+      return (dir / drf_subdir_name(file_index, FILE_MS, SUBDIR_S)
+              / drf_file_name(file_index, FILE_MS));
+    }
+
+    static void
+    write_file(const boost::filesystem::path &path,
+               const std::string &data)
+    {
+      boost::filesystem::create_directories(path.parent_path());
+      std::ofstream out(path.c_str(), std::ios::binary);
+
+      out << data;
+      CPPUNIT_ASSERT(out.good());
+    }
+
+    static std::string
+    read_file(const boost::filesystem::path &path)
+    {
+      std::ifstream in(path.c_str(), std::ios::binary);
+
+      CPPUNIT_ASSERT(in.good());
+      return std::string(std::istreambuf_iterator<char>(in),
+                         std::istreambuf_iterator<char>());
+    }
+
+    void
+    qa_file_mover::t_move()
+    {
+      boost::filesystem::path root = temp_dir();
+      boost::filesystem::path staging = root / "staging";
+      boost::filesystem::path dir = root / "ch0";
+      mover_events events;
+      uint64_t k;
+
+      write_file(staging / "drf_properties.h5", "properties");
+      {
+        file_mover mover(staging.string(), dir.string(), FILE_MS, SUBDIR_S,
+                         0, events.callback());
+
+        for(k=0; k<3; k++) {
+          write_file(file(staging, k), std::string(k + 1, 'x'));
+          mover.push(k);
+        }
+      }
+
+      // in order, each to the same place in the channel directory
+      CPPUNIT_ASSERT_EQUAL((size_t)3, events.moved.size());
+      for(k=0; k<3; k++) {
+        CPPUNIT_ASSERT_EQUAL(k, events.moved[k]);
+        CPPUNIT_ASSERT(!boost::filesystem::exists(file(staging, k)));
+        CPPUNIT_ASSERT_EQUAL(std::string(k + 1, 'x'),
+                             read_file(file(dir, k)));
+      }
+      CPPUNIT_ASSERT_EQUAL(std::string("properties"),
+                           read_file(dir / "drf_properties.h5"));
+      // the subdirectory the writer has moved past is removed, the one
+      // it may still write to is not
+      CPPUNIT_ASSERT(!boost::filesystem::exists(file(staging, 0)
+                                                .parent_path()));
+      CPPUNIT_ASSERT(boost::filesystem::exists(file(staging, 2)
+                                               .parent_path()));
+
+      boost::filesystem::remove_all(root);
+    }
+
+    void
+    qa_file_mover::t_staged()
+    {
+      boost::filesystem::path root = temp_dir();
+      boost::filesystem::path staging = root / "staging";
+      boost::filesystem::path dir = root / "ch0";
+      mover_events events;
+      uint64_t k;
+
+      write_file(staging / "drf_properties.h5", "properties");
+      events.hold = true;
+      {
+        file_mover mover(staging.string(), dir.string(), FILE_MS, SUBDIR_S,
+                         0, events.callback());
+
+        for(k=0; k<3; k++) {
+          write_file(file(staging, k), std::string(100, 'x'));
+          mover.push(k);
+        }
+        // the first file stays counted until its callback returns
+        events.wait_for(1);
+        CPPUNIT_ASSERT_EQUAL((size_t)3, mover.staged_files());
+        CPPUNIT_ASSERT_EQUAL((uint64_t)300, mover.staged_bytes());
+        events.release();
+        events.wait_for(3);
+      }
+      CPPUNIT_ASSERT_EQUAL((size_t)3, events.moved.size());
+
+      boost::filesystem::remove_all(root);
+    }
+
+    void
+    qa_file_mover::t_error()
+    {
+      boost::filesystem::path root = temp_dir();
+      boost::filesystem::path staging = root / "staging";
+      boost::filesystem::path dir = root / "ch0";
+      mover_events events;
+      std::string error;
+
+      write_file(staging / "drf_properties.h5", "properties");
+      write_file(file(staging, 1), "data");
+      {
+        file_mover mover(staging.string(), dir.string(), FILE_MS, SUBDIR_S,
+                         0, events.callback());
+
+        // file 0 was never written
+        mover.push(0);
+        mover.push(1);
+        events.wait_for(1);
+        error = mover.error();
+      }
+
+      // reported, and the next file is still moved
+      CPPUNIT_ASSERT(error.find(file(staging, 0).string())
+                     != std::string::npos);
+      CPPUNIT_ASSERT_EQUAL((size_t)1, events.moved.size());
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1, events.moved[0]);
+      CPPUNIT_ASSERT_EQUAL(std::string("data"), read_file(file(dir, 1)));
+
+      boost::filesystem::remove_all(root);
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
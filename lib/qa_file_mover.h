@@ -0,0 +1,34 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_FILE_MOVER_H_
+#define _QA_FILE_MOVER_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_file_mover : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_file_mover);
+      CPPUNIT_TEST(t_move);
+      CPPUNIT_TEST(t_staged);
+      CPPUNIT_TEST(t_error);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_move();
+      void t_staged();
+      void t_error();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_FILE_MOVER_H_ */
@@ -0,0 +1,162 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <fstream>
+#include <string>
+#include <boost/filesystem.hpp>
+#include <boost/thread/thread.hpp>
+#include <cppunit/TestAssert.h>
+#include "qa_file_pruner.h"
+#include "drf_layout.h"
+#include "file_pruner.h"
+
+namespace gr {
+  namespace drf {
+
+    // 1 s files in 2 s subdirectories
+    static const uint64_t FILE_MS = 1000;
+    static const uint64_t SUBDIR_S = 2;
+
+    static boost::filesystem::path
+    temp_dir()
+    {
+      return boost::filesystem::temp_directory_path()
+              / boost::filesystem::unique_path("qa_file_pruner-%%%%%%%%");
+    }
+
+    static boost::filesystem::path
+    subdir(const boost::filesystem::path &dir, uint64_t file_index)
+    {
+      return dir / drf_subdir_name(file_index, FILE_MS, SUBDIR_S);
+    }
+
+    static boost::filesystem::path
+    file(const boost::filesystem::path &dir, uint64_t file_index)
+    {
+      return subdir(dir, file_index) / drf_file_name(file_index, FILE_MS);
+    }
+
+    static void
+    write_file(const boost::filesystem::path &path, size_t size)
+    {
+      boost::filesystem::create_directories(path.parent_path());
+      std::ofstream out(path.c_str(), std::ios::binary);
+
+      out << std::string(size, 'x');
+      CPPUNIT_ASSERT(out.good());
+    }
+
+    // the pruner works on a thread of its own
+    static void
+    wait_deleted(const file_pruner &pruner, uint64_t deleted)
+    {
+      int k;
+
+      for(k=0; k<500 && pruner.deleted() < deleted; k++) {
+        boost::this_thread::sleep(boost::posix_time::milliseconds(10));
+      }
+      CPPUNIT_ASSERT_EQUAL(deleted, pruner.deleted());
+    }
+
+    void
+    qa_file_pruner::t_bytes()
+    {
+      boost::filesystem::path dir = temp_dir();
+      uint64_t k;
+
+      // already there when the pruner started, so left alone
+      write_file(file(dir, 100), 1000);
+      {
+        file_pruner pruner(dir.string(), FILE_MS, SUBDIR_S, 250, 0);
+
+        for(k=0; k<5; k++) {
+          write_file(file(dir, k), 100);
+          pruner.push(k);
+        }
+        // at most 250 bytes, so the two newest files are kept
+        wait_deleted(pruner, 3);
+        CPPUNIT_ASSERT_EQUAL((uint64_t)200, pruner.bytes());
+      }
+
+      for(k=0; k<3; k++) {
+        CPPUNIT_ASSERT(!boost::filesystem::exists(file(dir, k)));
+      }
+      CPPUNIT_ASSERT(boost::filesystem::exists(file(dir, 3)));
+      CPPUNIT_ASSERT(boost::filesystem::exists(file(dir, 4)));
+      CPPUNIT_ASSERT(boost::filesystem::exists(file(dir, 100)));
+      // emptied subdirectories go, the one still holding file 3 stays
+      CPPUNIT_ASSERT(!boost::filesystem::exists(subdir(dir, 0)));
+      CPPUNIT_ASSERT(boost::filesystem::exists(subdir(dir, 2)));
+
+      boost::filesystem::remove_all(dir);
+    }
+
+    void
+    qa_file_pruner::t_seconds()
+    {
+      boost::filesystem::path dir = temp_dir();
+      uint64_t k;
+
+      {
+        file_pruner pruner(dir.string(), FILE_MS, SUBDIR_S, 0, 2.5);
+
+        for(k=10; k<15; k++) {
+          write_file(file(dir, k), 100);
+          pruner.push(k);
+        }
+        // files 13 and 14 span 2 s
+        wait_deleted(pruner, 3);
+        CPPUNIT_ASSERT_EQUAL((uint64_t)200, pruner.bytes());
+      }
+      CPPUNIT_ASSERT(!boost::filesystem::exists(file(dir, 12)));
+      CPPUNIT_ASSERT(boost::filesystem::exists(file(dir, 13)));
+
+      // a single file is kept however large it is
+      {
+        file_pruner pruner(dir.string(), FILE_MS, SUBDIR_S, 10, 0.5);
+
+        write_file(file(dir, 20), 100);
+        pruner.push(20);
+      }
+      CPPUNIT_ASSERT(boost::filesystem::exists(file(dir, 20)));
+
+      boost::filesystem::remove_all(dir);
+    }
+
+    void
+    qa_file_pruner::t_symlink()
+    {
+      boost::filesystem::path dir = temp_dir();
+      boost::filesystem::path stripe = temp_dir();
+      uint64_t k;
+
+      {
+        file_pruner pruner(dir.string(), FILE_MS, SUBDIR_S, 150, 0);
+
+        // as striping leaves them, files linked from another disk
+        for(k=1; k<3; k++) {
+          write_file(file(stripe, k), 100);
+          boost::filesystem::create_directories(subdir(dir, k));
+          boost::filesystem::create_symlink(file(stripe, k), file(dir, k));
+          pruner.push(k);
+        }
+        wait_deleted(pruner, 1);
+        CPPUNIT_ASSERT_EQUAL((uint64_t)100, pruner.bytes());
+      }
+
+      // the link, the data, and both emptied subdirectories are gone
+      CPPUNIT_ASSERT(!boost::filesystem::exists(file(stripe, 1)));
+      CPPUNIT_ASSERT(!boost::filesystem::is_symlink(file(dir, 1)));
+      CPPUNIT_ASSERT(!boost::filesystem::exists(subdir(dir, 1)));
+      CPPUNIT_ASSERT(!boost::filesystem::exists(subdir(stripe, 1)));
+      CPPUNIT_ASSERT(boost::filesystem::exists(file(dir, 2)));
+
+      boost::filesystem::remove_all(dir);
+      boost::filesystem::remove_all(stripe);
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
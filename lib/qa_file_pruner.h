@@ -0,0 +1,34 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_FILE_PRUNER_H_
+#define _QA_FILE_PRUNER_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_file_pruner : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_file_pruner);
+      CPPUNIT_TEST(t_bytes);
+      CPPUNIT_TEST(t_seconds);
+      CPPUNIT_TEST(t_symlink);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_bytes();
+      void t_seconds();
+      void t_symlink();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_FILE_PRUNER_H_ */
@@ -0,0 +1,69 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <cmath>
+#include <cppunit/TestAssert.h>
+#include "qa_latency_stats.h"
+#include "latency_stats.h"
+
+namespace gr {
+  namespace drf {
+
+    void
+    qa_latency_stats::t_empty()
+    {
+      latency_stats stats;
+
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, stats.count());
+      CPPUNIT_ASSERT_EQUAL(0.0, stats.mean());
+      CPPUNIT_ASSERT_EQUAL(0.0, stats.max());
+      CPPUNIT_ASSERT_EQUAL(0.0, stats.quantile(0.5));
+      CPPUNIT_ASSERT_EQUAL(0.0, stats.quantile(1.0));
+    }
+
+    void
+    qa_latency_stats::t_quantiles()
+    {
+      latency_stats stats;
+      double p50;
+      int k;
+
+      for(k=0; k<98; k++) {
+        stats.add(1e-3);
+      }
+      stats.add(0.5);
+      stats.add(0.5);
+
+      CPPUNIT_ASSERT_EQUAL((uint64_t)100, stats.count());
+      CPPUNIT_ASSERT_DOUBLES_EQUAL((98*1e-3 + 1.0)/100, stats.mean(), 1e-12);
+      CPPUNIT_ASSERT_EQUAL(0.5, stats.max());
+
+      // within the half octave bucket holding the median
+      p50 = stats.quantile(0.5);
+      CPPUNIT_ASSERT(p50 >= 1e-3);
+      CPPUNIT_ASSERT(p50 <= 1e-3*std::sqrt(2.0));
+      CPPUNIT_ASSERT_EQUAL(stats.quantile(0.98), p50);
+      CPPUNIT_ASSERT_EQUAL(stats.quantile(0), p50);
+
+      // the tail is capped at the largest latency seen
+      CPPUNIT_ASSERT_EQUAL(0.5, stats.quantile(0.99));
+      CPPUNIT_ASSERT_EQUAL(0.5, stats.quantile(1.0));
+    }
+
+    void
+    qa_latency_stats::t_tiny()
+    {
+      latency_stats stats;
+
+      stats.add(0);
+      stats.add(1e-7);
+
+      CPPUNIT_ASSERT_EQUAL(1e-7, stats.quantile(0.5));
+      CPPUNIT_ASSERT_EQUAL(1e-7, stats.quantile(1.0));
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
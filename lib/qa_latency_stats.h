@@ -0,0 +1,34 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_LATENCY_STATS_H_
+#define _QA_LATENCY_STATS_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_latency_stats : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_latency_stats);
+      CPPUNIT_TEST(t_empty);
+      CPPUNIT_TEST(t_quantiles);
+      CPPUNIT_TEST(t_tiny);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_empty();
+      void t_quantiles();
+      void t_tiny();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_LATENCY_STATS_H_ */
@@ -0,0 +1,128 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <fstream>
+#include <iterator>
+#include <string>
+#include <vector>
+#include <boost/filesystem.hpp>
+#include <cppunit/TestAssert.h>
+#include "qa_raw_writer.h"
+#include "raw_writer.h"
+
+namespace gr {
+  namespace drf {
+
+    static std::string
+    read_file(const boost::filesystem::path &path)
+    {
+      std::ifstream in(path.c_str(), std::ios::binary);
+
+      CPPUNIT_ASSERT(in.good());
+      return std::string(std::istreambuf_iterator<char>(in),
+                         std::istreambuf_iterator<char>());
+    }
+
+    static std::vector<raw_run>
+    read_index(const boost::filesystem::path &path)
+    {
+      std::string data = read_file(path);
+      std::vector<raw_run> runs(data.size()/sizeof(raw_run));
+
+      CPPUNIT_ASSERT_EQUAL((size_t)0, data.size() % sizeof(raw_run));
+      if(!runs.empty()) {
+        data.copy((char *)&runs[0], data.size());
+      }
+      return runs;
+    }
+
+    static void
+    check_run(const raw_run &run, uint64_t start, uint64_t nitems,
+              uint64_t offset)
+    {
+      CPPUNIT_ASSERT_EQUAL(start, run.start);
+      CPPUNIT_ASSERT_EQUAL(nitems, run.nitems);
+      CPPUNIT_ASSERT_EQUAL(offset, run.offset);
+    }
+
+    // 4 byte samples that hold their own index
+    static std::vector<uint32_t>
+    samples(uint64_t index, uint64_t nitems)
+    {
+      std::vector<uint32_t> buf(nitems);
+      uint64_t k;
+
+      for(k=0; k<nitems; k++) {
+        buf[k] = index + k;
+      }
+      return buf;
+    }
+
+    static void
+    write(raw_writer &writer, uint64_t index, uint64_t nitems)
+    {
+      std::vector<uint32_t> buf = samples(index, nitems);
+      writer.write(index, (const char *)&buf[0], nitems);
+    }
+
+    void
+    qa_raw_writer::t_round_trip()
+    {
+      boost::filesystem::path dir =
+              boost::filesystem::temp_directory_path()
+              / boost::filesystem::unique_path("qa_raw_writer-%%%%%%%%");
+      std::vector<uint32_t> expected, tail;
+      std::vector<raw_run> runs;
+      std::string data;
+
+      {
+        // 1 kHz, so 1000 samples per 1 s file
+        raw_writer writer(dir.string(), 4, 1000, 1, 1000, "{}\n");
+
+        write(writer, 500, 700);
+        writer.zeros(1200, 100);
+        write(writer, 1300, 50);
+        write(writer, 1350, 50);
+        // skipped samples just leave a gap in the index
+        write(writer, 1500, 10);
+        writer.close();
+        raw_writer::mark_stopped(dir.string());
+      }
+
+      CPPUNIT_ASSERT_EQUAL(std::string("{}\n"),
+                           read_file(dir / "properties.json"));
+      CPPUNIT_ASSERT(boost::filesystem::exists(dir / "stopped"));
+
+      // the first file holds the start of the write
+      runs = read_index(dir / "rf@0.000.idx");
+      CPPUNIT_ASSERT_EQUAL((size_t)1, runs.size());
+      check_run(runs[0], 500, 500, 0);
+      expected = samples(500, 500);
+      CPPUNIT_ASSERT(read_file(dir / "rf@0.000.raw")
+                     == std::string((const char *)&expected[0], 500*4));
+
+      // the second the rest, with contiguous writes merged into one run
+      runs = read_index(dir / "rf@1.000.idx");
+      CPPUNIT_ASSERT_EQUAL((size_t)4, runs.size());
+      check_run(runs[0], 1000, 200, 0);
+      check_run(runs[1], 1200, 100, RAW_ZEROS);
+      check_run(runs[2], 1300, 100, 200*4);
+      check_run(runs[3], 1500, 10, 300*4);
+      expected = samples(1000, 200);
+      tail = samples(1300, 100);
+      expected.insert(expected.end(), tail.begin(), tail.end());
+      tail = samples(1500, 10);
+      expected.insert(expected.end(), tail.begin(), tail.end());
+      data = read_file(dir / "rf@1.000.raw");
+      CPPUNIT_ASSERT_EQUAL(expected.size()*4, data.size());
+      CPPUNIT_ASSERT(data == std::string((const char *)&expected[0],
+                                         data.size()));
+
+      boost::filesystem::remove_all(dir);
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
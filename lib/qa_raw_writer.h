@@ -0,0 +1,30 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_RAW_WRITER_H_
+#define _QA_RAW_WRITER_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_raw_writer : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_raw_writer);
+      CPPUNIT_TEST(t_round_trip);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_round_trip();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_RAW_WRITER_H_ */
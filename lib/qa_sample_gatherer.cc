@@ -0,0 +1,255 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <stdexcept>
+#include <string>
+#include <vector>
+#include <boost/bind.hpp>
+#include <boost/scoped_ptr.hpp>
+#include <boost/thread/thread.hpp>
+#include <cppunit/TestAssert.h>
+#include "qa_sample_gatherer.h"
+#include "sample_gatherer.h"
+
+// samples per file in these tests
+#define FILE_ITEMS 20
+
+namespace gr {
+  namespace drf {
+
+    // copies of the runs passed to the submit function
+    struct submitted_runs
+    {
+      std::vector<uint64_t> index;
+      std::vector<std::string> data;
+
+      void submit(const write_block &block)
+      {
+        index.push_back(block.index);
+        data.push_back(std::string(block.data, block.nitems));
+      }
+    };
+
+    // a buffer from the writer, noting the index of each run it's for
+    struct run_buffers
+    {
+      std::vector<char> buffer;
+      std::vector<uint64_t> index;
+
+      run_buffers(size_t size) : buffer(size) {}
+
+      char *acquire(uint64_t run_index)
+      {
+        index.push_back(run_index);
+        return &buffer[0];
+      }
+    };
+
+    static void
+    file_bounds(uint64_t index, uint64_t &first, uint64_t &end)
+    {
+      first = index - index % FILE_ITEMS;
+      end = first + FILE_ITEMS;
+    }
+
+    // one byte samples that hold their own index
+    static std::string
+    samples(uint64_t index, uint64_t nitems)
+    {
+      std::string buf;
+      uint64_t k;
+
+      for(k=0; k<nitems; k++) {
+        buf += (char)(index + k);
+      }
+      return buf;
+    }
+
+    static void
+    add(sample_gatherer &gatherer, uint64_t index, uint64_t nitems)
+    {
+      std::string buf = samples(index, nitems);
+      gatherer.add(index, buf.data(), nitems);
+    }
+
+    static sample_gatherer *
+    make_gatherer(submitted_runs &runs, uint64_t capacity,
+                  uint64_t align_items, bool coalesce, double max_delay,
+                  const sample_gatherer::acquire_func &acquire =
+                          sample_gatherer::acquire_func())
+    {
+      return new sample_gatherer(1, capacity, align_items, coalesce,
+                                 max_delay, acquire,
+                                 boost::bind(&submitted_runs::submit, &runs,
+                                             _1),
+                                 &file_bounds);
+    }
+
+    static void
+    check_run(const submitted_runs &runs, size_t k, uint64_t index,
+              uint64_t nitems)
+    {
+      CPPUNIT_ASSERT(k < runs.index.size());
+      CPPUNIT_ASSERT_EQUAL(index, runs.index[k]);
+      CPPUNIT_ASSERT_EQUAL(samples(index, nitems), runs.data[k]);
+    }
+
+    void
+    qa_sample_gatherer::t_aligned_capacity()
+    {
+      // rounded up to whole blocks
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1024,
+                           sample_gatherer::aligned_capacity(1000, 4096, 256));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1024,
+                           sample_gatherer::aligned_capacity(1024, 4096, 256));
+      // or down if that won't fit in the buffers
+      CPPUNIT_ASSERT_EQUAL((uint64_t)3840,
+                           sample_gatherer::aligned_capacity(4000, 4000, 256));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)4096,
+                           sample_gatherer::aligned_capacity(5000, 4096, 256));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)256,
+                           sample_gatherer::aligned_capacity(1, 256, 256));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1000,
+                           sample_gatherer::aligned_capacity(1000, 4096, 1));
+
+      // buffers smaller than the alignment can't hold an aligned run
+      CPPUNIT_ASSERT_THROW(sample_gatherer::aligned_capacity(100, 100, 256),
+                           std::invalid_argument);
+      CPPUNIT_ASSERT_THROW(sample_gatherer::aligned_capacity(1, 255, 256),
+                           std::invalid_argument);
+    }
+
+    void
+    qa_sample_gatherer::t_run_limit()
+    {
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1024,
+                           sample_gatherer::run_limit(1024, 256, 0));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)924,
+                           sample_gatherer::run_limit(1024, 256, 100));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)924,
+                           sample_gatherer::run_limit(1024, 256, 5*256 + 100));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)769,
+                           sample_gatherer::run_limit(1024, 256, 255));
+
+      // never empty or past the capacity, even when it's not aligned
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1,
+                           sample_gatherer::run_limit(100, 256, 200));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)100,
+                           sample_gatherer::run_limit(100, 256, 0));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, sample_gatherer::run_limit(0, 256, 3));
+    }
+
+    void
+    qa_sample_gatherer::t_coalesce()
+    {
+      submitted_runs runs;
+      boost::scoped_ptr<sample_gatherer> gatherer(
+              make_gatherer(runs, 8, 4, true, 10.0));
+
+      // full runs, cut short at the end of the file
+      add(*gatherer, 0, 30);
+      CPPUNIT_ASSERT_EQUAL((size_t)4, runs.index.size());
+      check_run(runs, 0, 0, 8);
+      check_run(runs, 1, 8, 8);
+      check_run(runs, 2, 16, 4);
+      check_run(runs, 3, 20, 8);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)2, gatherer->pending_items());
+
+      // small adds are gathered into one run
+      add(*gatherer, 30, 3);
+      add(*gatherer, 33, 3);
+      CPPUNIT_ASSERT_EQUAL((size_t)5, runs.index.size());
+      check_run(runs, 4, 28, 8);
+
+      add(*gatherer, 36, 2);
+      gatherer->flush();
+      CPPUNIT_ASSERT_EQUAL((size_t)6, runs.index.size());
+      check_run(runs, 5, 36, 2);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, gatherer->pending_items());
+    }
+
+    void
+    qa_sample_gatherer::t_realign()
+    {
+      submitted_runs runs;
+      boost::scoped_ptr<sample_gatherer> gatherer(
+              make_gatherer(runs, 8, 4, true, 10.0));
+
+      // after a run cut short the next one ends aligned again
+      add(*gatherer, 0, 5);
+      gatherer->flush();
+      add(*gatherer, 5, 15);
+      CPPUNIT_ASSERT_EQUAL((size_t)3, runs.index.size());
+      check_run(runs, 0, 0, 5);
+      check_run(runs, 1, 5, 7);
+      check_run(runs, 2, 12, 8);
+
+      // and after samples were dropped
+      add(*gatherer, 43, 10);
+      CPPUNIT_ASSERT_EQUAL((size_t)4, runs.index.size());
+      check_run(runs, 3, 43, 5);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)5, gatherer->pending_items());
+      add(*gatherer, 53, 3);
+      CPPUNIT_ASSERT_EQUAL((size_t)5, runs.index.size());
+      check_run(runs, 4, 48, 8);
+
+      // a new alignment takes effect from the next run
+      gatherer->set_alignment(6, 3);
+      add(*gatherer, 61, 10);
+      CPPUNIT_ASSERT_EQUAL((size_t)6, runs.index.size());
+      check_run(runs, 5, 61, 5);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)5, gatherer->pending_items());
+    }
+
+    void
+    qa_sample_gatherer::t_passthrough()
+    {
+      submitted_runs runs;
+      run_buffers buffers(4);
+      boost::scoped_ptr<sample_gatherer> gatherer(
+              make_gatherer(runs, 4, 4, false, 0,
+                            boost::bind(&run_buffers::acquire, &buffers,
+                                        _1)));
+
+      // runs of at most capacity samples, each add() submitted in full
+      add(*gatherer, 0, 10);
+      CPPUNIT_ASSERT_EQUAL((size_t)3, runs.index.size());
+      check_run(runs, 0, 0, 4);
+      check_run(runs, 1, 4, 4);
+      check_run(runs, 2, 8, 2);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, gatherer->pending_items());
+
+      // without coalescing a run may cross into the next file
+      add(*gatherer, 18, 4);
+      CPPUNIT_ASSERT_EQUAL((size_t)4, runs.index.size());
+      check_run(runs, 3, 18, 4);
+
+      CPPUNIT_ASSERT_EQUAL((size_t)4, buffers.index.size());
+      CPPUNIT_ASSERT_EQUAL((uint64_t)8, buffers.index[2]);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)18, buffers.index[3]);
+    }
+
+    void
+    qa_sample_gatherer::t_deadline()
+    {
+      submitted_runs runs;
+      boost::scoped_ptr<sample_gatherer> gatherer(
+              make_gatherer(runs, 8, 4, true, 0.05));
+      int k;
+
+      // a stalled run is submitted once it has waited max_delay
+      add(*gatherer, 0, 3);
+      for(k=0; k<200 && gatherer->pending_items() > 0; k++) {
+        boost::this_thread::sleep(boost::posix_time::milliseconds(10));
+      }
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, gatherer->pending_items());
+      CPPUNIT_ASSERT_EQUAL((size_t)1, runs.index.size());
+      check_run(runs, 0, 0, 3);
+      CPPUNIT_ASSERT(gatherer->error().empty());
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
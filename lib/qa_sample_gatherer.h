@@ -0,0 +1,40 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_SAMPLE_GATHERER_H_
+#define _QA_SAMPLE_GATHERER_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_sample_gatherer : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_sample_gatherer);
+      CPPUNIT_TEST(t_aligned_capacity);
+      CPPUNIT_TEST(t_run_limit);
+      CPPUNIT_TEST(t_coalesce);
+      CPPUNIT_TEST(t_realign);
+      CPPUNIT_TEST(t_passthrough);
+      CPPUNIT_TEST(t_deadline);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_aligned_capacity();
+      void t_run_limit();
+      void t_coalesce();
+      void t_realign();
+      void t_passthrough();
+      void t_deadline();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_SAMPLE_GATHERER_H_ */
@@ -0,0 +1,152 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <fstream>
+#include <iterator>
+#include <string>
+#include <boost/bind.hpp>
+#include <boost/filesystem.hpp>
+#include <cppunit/TestAssert.h>
+#include "qa_trace_file.h"
+#include "trace_file.h"
+
+namespace gr {
+  namespace drf {
+
+    static boost::filesystem::path
+    temp_path()
+    {
+      return boost::filesystem::temp_directory_path()
+              / boost::filesystem::unique_path("qa_trace_file-%%%%%%%%.json");
+    }
+
+    static std::string
+    read_file(const boost::filesystem::path &path)
+    {
+      std::ifstream in(path.c_str());
+
+      CPPUNIT_ASSERT(in.good());
+      return std::string(std::istreambuf_iterator<char>(in),
+                         std::istreambuf_iterator<char>());
+    }
+
+    static size_t
+    count(const std::string &s, const std::string &what)
+    {
+      size_t n = 0, pos = 0;
+
+      while((pos = s.find(what, pos)) != std::string::npos) {
+        n++;
+        pos += what.size();
+      }
+      return n;
+    }
+
+    static void
+    record(boost::shared_ptr<trace_file> trace, int channel, int n)
+    {
+      int k;
+
+      for(k=0; k<n; k++) {
+        trace->complete("write", channel, trace_file::now(), "items", k);
+      }
+    }
+
+    void
+    qa_trace_file::t_shared()
+    {
+      boost::filesystem::path path = temp_path();
+      boost::shared_ptr<trace_file> a = trace_file::open(path.string());
+      boost::shared_ptr<trace_file> b = trace_file::open(path.string());
+      boost::shared_ptr<trace_file> other =
+              trace_file::open(path.string() + ".2");
+
+      // sinks tracing to one path share the file and its channel numbers
+      CPPUNIT_ASSERT(a == b);
+      CPPUNIT_ASSERT(a != other);
+      CPPUNIT_ASSERT_EQUAL(0, a->channel("ch0"));
+      CPPUNIT_ASSERT_EQUAL(1, b->channel("ch1"));
+      CPPUNIT_ASSERT_EQUAL(0, b->channel("ch0"));
+      CPPUNIT_ASSERT_EQUAL(0, other->channel("ch1"));
+
+      // written once the last user lets go
+      a.reset();
+      CPPUNIT_ASSERT(!boost::filesystem::exists(path));
+      b.reset();
+      CPPUNIT_ASSERT(boost::filesystem::exists(path));
+      other.reset();
+
+      boost::filesystem::remove(path);
+      boost::filesystem::remove(path.string() + ".2");
+    }
+
+    void
+    qa_trace_file::t_events()
+    {
+      boost::filesystem::path path = temp_path();
+      std::string json;
+
+      {
+        boost::shared_ptr<trace_file> trace =
+                trace_file::open(path.string());
+        int ch0 = trace->channel("ch0");
+        int ch1 = trace->channel("ch\"1");
+        gr::thread::thread thread(boost::bind(&record, trace, ch1, 3));
+
+        record(trace, ch0, 2);
+        trace->instant("drop", ch0, "samples", 100);
+        thread.join();
+      }
+
+      json = read_file(path);
+      CPPUNIT_ASSERT_EQUAL((size_t)0,
+                           json.find("{\"displayTimeUnit\": \"ms\", "
+                                     "\"traceEvents\": [\n"));
+      CPPUNIT_ASSERT_EQUAL(json.size() - 4, json.rfind("\n]}\n"));
+      // one named timeline per thread
+      CPPUNIT_ASSERT_EQUAL((size_t)2, count(json, "\"ph\": \"M\""));
+      CPPUNIT_ASSERT_EQUAL((size_t)2, count(json, "(0 events lost)"));
+      CPPUNIT_ASSERT_EQUAL((size_t)5, count(json, "\"name\": \"write\""));
+      CPPUNIT_ASSERT_EQUAL((size_t)5, count(json, "\"dur\": "));
+      CPPUNIT_ASSERT_EQUAL((size_t)1,
+                           count(json, "\"name\": \"drop\", \"ph\": \"i\""));
+      CPPUNIT_ASSERT_EQUAL((size_t)1,
+                           count(json, "\"channel\": \"ch0\", "
+                                       "\"samples\": 100}"));
+      // channel names are escaped
+      CPPUNIT_ASSERT_EQUAL((size_t)3,
+                           count(json, "\"channel\": \"ch\\\"1\""));
+
+      boost::filesystem::remove(path);
+    }
+
+    void
+    qa_trace_file::t_reopen()
+    {
+      boost::filesystem::path path = temp_path();
+      std::string json;
+      int k;
+
+      // as when a flowgraph is stopped and started again, each time
+      // recording from this thread into a new file at the same path
+      for(k=0; k<3; k++) {
+        boost::shared_ptr<trace_file> trace =
+                trace_file::open(path.string());
+
+        record(trace, trace->channel("ch0"), k + 1);
+        trace.reset();
+
+        json = read_file(path);
+        CPPUNIT_ASSERT_EQUAL((size_t)1, count(json, "\"ph\": \"M\""));
+        CPPUNIT_ASSERT_EQUAL((size_t)(k + 1),
+                             count(json, "\"name\": \"write\""));
+      }
+
+      boost::filesystem::remove(path);
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,34 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_TRACE_FILE_H_
+#define _QA_TRACE_FILE_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_trace_file : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_trace_file);
+      CPPUNIT_TEST(t_shared);
+      CPPUNIT_TEST(t_events);
+      CPPUNIT_TEST(t_reopen);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_shared();
+      void t_events();
+      void t_reopen();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_TRACE_FILE_H_ */
@@ -0,0 +1,156 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <string.h>
+#include <stdexcept>
+#include <string>
+#include <cppunit/TestAssert.h>
+#include "qa_worker_ring.h"
+#include "worker_ring.h"
+
+namespace gr {
+  namespace drf {
+
+    static worker_config
+    make_config()
+    {
+      worker_config config;
+
+      memset(&config, 0, sizeof(config));
+      strcpy(config.dir, "/data/ch0");
+      config.sample_size = 4;
+      config.num_subchannels = 1;
+      return config;
+    }
+
+    static worker_record
+    make_record(int type, uint64_t index, uint64_t nitems)
+    {
+      worker_record record;
+
+      record.type = type;
+      record.index = index;
+      record.nitems = nitems;
+      return record;
+    }
+
+    void
+    qa_worker_ring::t_records()
+    {
+      // both ends in one process, the worker attaching by name
+      worker_ring sink(2, 16, make_config());
+      worker_ring worker(sink.name());
+      worker_record record;
+      char *buf, *data;
+
+      CPPUNIT_ASSERT_EQUAL(std::string("/data/ch0"),
+                           std::string(worker.config().dir));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)4, worker.config().sample_size);
+
+      buf = sink.acquire();
+      memcpy(buf, "0123456789abcdef", 16);
+      sink.submit(make_record(WORKER_DATA, 0, 4));
+      // zeros carry no samples but still take a slot
+      sink.submit(make_record(WORKER_ZEROS, 4, 100));
+      CPPUNIT_ASSERT_EQUAL((size_t)2, sink.depth());
+      CPPUNIT_ASSERT_EQUAL((size_t)2, sink.high_water());
+      CPPUNIT_ASSERT_EQUAL((uint64_t)104, sink.pending_items());
+
+      // with every slot in use and no worker running, acquire() gives up
+      CPPUNIT_ASSERT_THROW(sink.acquire(), std::runtime_error);
+
+      CPPUNIT_ASSERT(worker.pop(record, data));
+      CPPUNIT_ASSERT_EQUAL((int)WORKER_DATA, record.type);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, record.index);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)4, record.nitems);
+      CPPUNIT_ASSERT(memcmp(data, "0123456789abcdef", 16) == 0);
+      CPPUNIT_ASSERT_EQUAL((size_t)1, sink.depth());
+      worker.release(record);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)100, sink.pending_items());
+
+      // the freed slot is reused from the start of the buffers
+      CPPUNIT_ASSERT(sink.acquire() == buf);
+
+      CPPUNIT_ASSERT(worker.pop(record, data));
+      CPPUNIT_ASSERT_EQUAL((int)WORKER_ZEROS, record.type);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)4, record.index);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)100, record.nitems);
+      worker.release(record);
+      CPPUNIT_ASSERT_EQUAL((size_t)0, sink.depth());
+      CPPUNIT_ASSERT_EQUAL((size_t)2, sink.high_water());
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, sink.pending_items());
+      CPPUNIT_ASSERT_EQUAL(0.0, sink.stall_time());
+    }
+
+    void
+    qa_worker_ring::t_stats()
+    {
+      worker_ring sink(1, 16, make_config());
+      worker_ring worker(sink.name());
+      writer_stats stats;
+
+      memset(&stats, 0, sizeof(stats));
+      stats.samples_written = 1000;
+      stats.write_latency_max = 0.25;
+      stats.compression_level = 3;
+      worker.set_stats(stats);
+
+      stats = sink.stats();
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1000, stats.samples_written);
+      CPPUNIT_ASSERT_EQUAL(0.25, stats.write_latency_max);
+      CPPUNIT_ASSERT_EQUAL(3, stats.compression_level);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, stats.bytes_written);
+    }
+
+    void
+    qa_worker_ring::t_fail()
+    {
+      worker_ring sink(1, 16, make_config());
+      worker_ring worker(sink.name());
+
+      worker.fail("Disk full");
+      try {
+        sink.acquire();
+        CPPUNIT_FAIL("acquire() after a failure did not throw");
+      }
+      catch(std::runtime_error &e) {
+        CPPUNIT_ASSERT_EQUAL(std::string("Disk full"),
+                             std::string(e.what()));
+      }
+      CPPUNIT_ASSERT_THROW(sink.submit(make_record(WORKER_ZEROS, 0, 1)),
+                           std::runtime_error);
+      CPPUNIT_ASSERT_THROW(sink.check(), std::runtime_error);
+    }
+
+    void
+    qa_worker_ring::t_shutdown()
+    {
+      worker_record record;
+      char *data;
+
+      {
+        worker_ring sink(1, 16, make_config());
+        worker_ring worker(sink.name());
+
+        sink.submit(make_record(WORKER_START, 0, 0));
+        // without a worker process shutdown() can only report failure
+        CPPUNIT_ASSERT(!sink.shutdown());
+        // the worker still gets what was queued before it is told to stop
+        CPPUNIT_ASSERT(worker.pop(record, data));
+        CPPUNIT_ASSERT_EQUAL((int)WORKER_START, record.type);
+        worker.release(record);
+        CPPUNIT_ASSERT(!worker.pop(record, data));
+      }
+      {
+        worker_ring sink(1, 16, make_config());
+
+        sink.spawn("true");
+        CPPUNIT_ASSERT(sink.shutdown());
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
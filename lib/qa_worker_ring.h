@@ -0,0 +1,36 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_WORKER_RING_H_
+#define _QA_WORKER_RING_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_worker_ring : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_worker_ring);
+      CPPUNIT_TEST(t_records);
+      CPPUNIT_TEST(t_stats);
+      CPPUNIT_TEST(t_fail);
+      CPPUNIT_TEST(t_shutdown);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_records();
+      void t_stats();
+      void t_fail();
+      void t_shutdown();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_WORKER_RING_H_ */
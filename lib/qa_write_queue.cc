@@ -0,0 +1,118 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#include <cstring>
+#include <set>
+#include <boost/bind.hpp>
+#include <boost/thread/thread.hpp>
+#include <cppunit/TestAssert.h>
+#include "qa_write_queue.h"
+#include "write_queue.h"
+
+namespace gr {
+  namespace drf {
+
+    static void
+    acquire_into(write_queue *queue, char **buf)
+    {
+      *buf = queue->acquire();
+    }
+
+    void
+    qa_write_queue::t_wraparound()
+    {
+      write_queue queue(3, 4);
+      std::set<char *> buffers;
+      write_block block;
+      uint64_t next = 0;
+      int k;
+
+      // many more blocks than buffers, popped in order as the ring wraps
+      for(k=0; k<20; k++) {
+        block.index = k*4;
+        block.nitems = 4;
+        block.data = queue.acquire();
+        memset(block.data, k, 4);
+        buffers.insert(block.data);
+        queue.submit(block);
+        CPPUNIT_ASSERT(queue.depth() <= 3);
+
+        if(queue.depth() == 3) {
+          CPPUNIT_ASSERT(queue.try_pop(block));
+          CPPUNIT_ASSERT_EQUAL(next*4, block.index);
+          CPPUNIT_ASSERT_EQUAL((char)next, block.data[3]);
+          queue.release(block);
+          next++;
+        }
+      }
+      CPPUNIT_ASSERT_EQUAL((uint64_t)(20 - next)*4, queue.pending_items());
+
+      while(queue.try_pop(block)) {
+        CPPUNIT_ASSERT_EQUAL(next*4, block.index);
+        CPPUNIT_ASSERT_EQUAL((char)next, block.data[0]);
+        queue.release(block);
+        next++;
+      }
+      CPPUNIT_ASSERT_EQUAL((uint64_t)20, next);
+      CPPUNIT_ASSERT_EQUAL((size_t)3, buffers.size());
+      CPPUNIT_ASSERT_EQUAL((size_t)3, queue.high_water());
+      CPPUNIT_ASSERT_EQUAL((size_t)0, queue.depth());
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, queue.pending_items());
+    }
+
+    void
+    qa_write_queue::t_blocking()
+    {
+      write_queue queue(1, 4);
+      write_block block;
+      char *waiting = NULL;
+
+      block.index = 0;
+      block.nitems = 4;
+      block.data = queue.acquire();
+      queue.submit(block);
+
+      // the only buffer is queued, so acquire() waits for the writer
+      boost::thread producer(boost::bind(&acquire_into, &queue, &waiting));
+      CPPUNIT_ASSERT(!producer.timed_join(boost::posix_time::milliseconds(100)));
+
+      CPPUNIT_ASSERT(queue.try_pop(block));
+      queue.release(block);
+      producer.join();
+      CPPUNIT_ASSERT(waiting == block.data);
+      CPPUNIT_ASSERT(queue.stall_time() > 0.05);
+    }
+
+    void
+    qa_write_queue::t_zeros()
+    {
+      write_queue queue(1, 4);
+      write_block zeros;
+      write_block block;
+
+      // a drop doesn't take the buffer, so acquire() doesn't wait
+      zeros.index = 0;
+      zeros.nitems = 1000;
+      zeros.data = NULL;
+      queue.submit(zeros);
+      block.index = 1000;
+      block.nitems = 4;
+      block.data = queue.acquire();
+      queue.submit(block);
+      CPPUNIT_ASSERT_EQUAL((uint64_t)1004, queue.pending_items());
+
+      CPPUNIT_ASSERT(queue.try_pop(zeros));
+      CPPUNIT_ASSERT(zeros.data == NULL);
+      queue.release(zeros);
+      CPPUNIT_ASSERT(queue.try_pop(block));
+      queue.release(block);
+      CPPUNIT_ASSERT(!queue.try_pop(block));
+      CPPUNIT_ASSERT_EQUAL((uint64_t)0, queue.pending_items());
+      CPPUNIT_ASSERT_EQUAL(0.0, queue.stall_time());
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
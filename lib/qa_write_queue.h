@@ -0,0 +1,34 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef _QA_WRITE_QUEUE_H_
+#define _QA_WRITE_QUEUE_H_
+
+#include <cppunit/extensions/HelperMacros.h>
+#include <cppunit/TestCase.h>
+
+namespace gr {
+  namespace drf {
+
+    class qa_write_queue : public CppUnit::TestCase
+    {
+    public:
+      CPPUNIT_TEST_SUITE(qa_write_queue);
+      CPPUNIT_TEST(t_wraparound);
+      CPPUNIT_TEST(t_blocking);
+      CPPUNIT_TEST(t_zeros);
+      CPPUNIT_TEST_SUITE_END();
+
+    private:
+      void t_wraparound();
+      void t_blocking();
+      void t_zeros();
+    };
+
+  } /* namespace drf */
+} /* namespace gr */
+
+#endif /* _QA_WRITE_QUEUE_H_ */
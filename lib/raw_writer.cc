@@ -0,0 +1,221 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <algorithm>
+#include <cerrno>
+#include <cstdio>
+#include <cstring>
+#include <stdexcept>
+#include <fcntl.h>
+#include <unistd.h>
+#include <boost/filesystem.hpp>
+#include "drf_layout.h"
+#include "raw_writer.h"
+
+namespace gr {
+  namespace drf {
+
+    raw_writer::raw_writer(const std::string &dir, size_t item_size,
+                           uint64_t sample_rate_numerator,
+                           uint64_t sample_rate_denominator,
+                           uint64_t file_cadence_ms,
+                           const std::string &properties)
+      : d_dir(dir), d_item_size(item_size),
+        d_sample_rate_numerator(sample_rate_numerator),
+        d_sample_rate_denominator(sample_rate_denominator),
+        d_file_cadence_ms(file_cadence_ms), d_fd(-1), d_file_end(0),
+        d_offset(0)
+    {
+      boost::system::error_code ec;
+
+      boost::filesystem::create_directories(d_dir);
+      // recording again, so the converter has to keep watching
+      boost::filesystem::remove(
+              boost::filesystem::path(d_dir) / "stopped", ec);
+      write_file("properties.json", properties.data(), properties.size());
+    }
+
+    raw_writer::~raw_writer()
+    {
+      try {
+        close();
+      }
+      catch(...) {
+      }
+    }
+
+    void
+    raw_writer::write_file(const std::string &name, const char *buf, size_t n)
+    {
+      boost::filesystem::path path = boost::filesystem::path(d_dir) / name;
+      boost::filesystem::path tmp =
+              boost::filesystem::path(d_dir) / ("." + name + ".part");
+      FILE *fp;
+
+      // readers only ever see the whole file
+      fp = fopen(tmp.c_str(), "wb");
+      if(!fp) {
+        throw std::runtime_error(tmp.string() + ": " + strerror(errno));
+      }
+      if(fwrite(buf, 1, n, fp) != n) {
+        fclose(fp);
+        throw std::runtime_error(tmp.string() + ": " + strerror(errno));
+      }
+      if(fclose(fp) || rename(tmp.c_str(), path.c_str())) {
+        throw std::runtime_error(path.string() + ": " + strerror(errno));
+      }
+    }
+
+    void
+    raw_writer::open_segment(uint64_t sample)
+    {
+      uint64_t file_index;
+      std::string path;
+
+      file_index = drf_file_index(sample, d_sample_rate_numerator,
+                                  d_sample_rate_denominator,
+                                  d_file_cadence_ms);
+      d_file_end = drf_file_start_sample(file_index + 1,
+                                         d_sample_rate_numerator,
+                                         d_sample_rate_denominator,
+                                         d_file_cadence_ms);
+      d_name = drf_file_name(file_index, d_file_cadence_ms);
+      d_name.erase(d_name.size() - 3); // ".h5"
+      d_offset = 0;
+      d_runs.clear();
+
+      path = (boost::filesystem::path(d_dir) / (d_name + ".raw")).string();
+      d_fd = ::open(path.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+      if(d_fd < 0) {
+        throw std::runtime_error(path + ": " + strerror(errno));
+      }
+#ifdef __linux__
+      // reserve a full file's space in one extent; the unused end is
+      // trimmed on close, and a file system without support just grows
+      // the file as usual
+      fallocate(d_fd, 0, 0, ((d_file_end - sample)*d_item_size));
+#endif
+    }
+
+    void
+    raw_writer::close_segment()
+    {
+      int fd = d_fd;
+
+      d_fd = -1;
+      if(ftruncate(fd, d_offset)) {
+        ::close(fd);
+        throw std::runtime_error(d_name + ".raw: " + strerror(errno));
+      }
+      if(::close(fd)) {
+        throw std::runtime_error(d_name + ".raw: " + strerror(errno));
+      }
+      // the index goes last, marking the segment complete
+      write_file(d_name + ".idx",
+                 d_runs.empty() ? NULL : (const char *)&d_runs[0],
+                 d_runs.size()*sizeof(raw_run));
+    }
+
+    void
+    raw_writer::add_run(uint64_t sample, uint64_t nitems, uint64_t offset)
+    {
+      raw_run run;
+
+      if(!d_runs.empty()) {
+        raw_run &last = d_runs.back();
+        if(last.start + last.nitems == sample
+           && ((last.offset == RAW_ZEROS && offset == RAW_ZEROS)
+               || (last.offset != RAW_ZEROS
+                   && last.offset + last.nitems*d_item_size == offset))) {
+          last.nitems += nitems;
+          return;
+        }
+      }
+      run.start = sample;
+      run.nitems = nitems;
+      run.offset = offset;
+      d_runs.push_back(run);
+    }
+
+    void
+    raw_writer::write(uint64_t sample, const char *buf, uint64_t nitems)
+    {
+      uint64_t n;
+      size_t bytes;
+      ssize_t written;
+
+      while(nitems > 0) {
+        if(d_fd < 0 || sample >= d_file_end) {
+          if(d_fd >= 0) {
+            close_segment();
+          }
+          open_segment(sample);
+        }
+        n = std::min(nitems, d_file_end - sample);
+        add_run(sample, n, d_offset);
+
+        bytes = n*d_item_size;
+        while(bytes > 0) {
+          written = pwrite(d_fd, buf, bytes, d_offset);
+          if(written < 0) {
+            if(errno == EINTR) {
+              continue;
+            }
+            throw std::runtime_error(d_name + ".raw: " + strerror(errno));
+          }
+          buf += written;
+          bytes -= written;
+          d_offset += written;
+        }
+        sample += n;
+        nitems -= n;
+      }
+    }
+
+    void
+    raw_writer::zeros(uint64_t sample, uint64_t nitems)
+    {
+      uint64_t n;
+
+      while(nitems > 0) {
+        if(d_fd < 0 || sample >= d_file_end) {
+          if(d_fd >= 0) {
+            close_segment();
+          }
+          open_segment(sample);
+        }
+        n = std::min(nitems, d_file_end - sample);
+        add_run(sample, n, RAW_ZEROS);
+        sample += n;
+        nitems -= n;
+      }
+    }
+
+    void
+    raw_writer::close()
+    {
+      if(d_fd >= 0) {
+        close_segment();
+      }
+    }
+
+    void
+    raw_writer::mark_stopped(const std::string &dir)
+    {
+      FILE *fp;
+
+      fp = fopen((boost::filesystem::path(dir) / "stopped").c_str(), "w");
+      if(fp) {
+        fclose(fp);
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,93 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_RAW_WRITER_H
+#define INCLUDED_GRDRF_RAW_WRITER_H
+
+#include <string>
+#include <vector>
+#include <stdint.h>
+#include <gr_drf/api.h>
+
+namespace gr {
+  namespace drf {
+
+    //! One contiguous run of samples in a raw segment's index.
+    struct raw_run
+    {
+      uint64_t start;   // global index of the first sample
+      uint64_t nitems;
+      uint64_t offset;  // byte offset in the .raw file, RAW_ZEROS if none
+    };
+
+    //! raw_run::offset of a run of zeros, which takes no space on disk.
+    static const uint64_t RAW_ZEROS = ~(uint64_t)0;
+
+    /*!
+     * \brief Writes samples as raw segments to be packaged into Digital RF
+     * later.
+     *
+     * Each Digital RF file becomes one segment: a .raw file with the
+     * samples exactly as they arrive and a .idx file listing the runs of
+     * samples it holds as raw_run records in native byte order. A .raw
+     * file is preallocated to the size of a full file and written
+     * sequentially, so writing costs little more than write(2). The .idx
+     * file is written when the segment is closed, so its presence means
+     * the segment is complete. properties.json describes the channel for
+     * the converter, and a file named "stopped" is left once recording
+     * has stopped.
+     */
+    class GRDRF_API raw_writer
+    {
+     private:
+      std::string d_dir;
+      size_t d_item_size;
+      uint64_t d_sample_rate_numerator;
+      uint64_t d_sample_rate_denominator;
+      uint64_t d_file_cadence_ms;
+
+      int d_fd;
+      std::string d_name;       // segment name without an extension
+      uint64_t d_file_end;      // first sample past the open segment
+      uint64_t d_offset;        // bytes written to the open segment
+      std::vector<raw_run> d_runs;
+
+      void open_segment(uint64_t sample);
+      void close_segment();
+      void add_run(uint64_t sample, uint64_t nitems, uint64_t offset);
+      void write_file(const std::string &name, const char *buf, size_t n);
+
+     public:
+      /*!
+       * \param dir Directory for the segments, created if needed.
+       * \param item_size Bytes per sample including all subchannels.
+       * \param properties JSON written to properties.json.
+       */
+      raw_writer(const std::string &dir, size_t item_size,
+                 uint64_t sample_rate_numerator,
+                 uint64_t sample_rate_denominator, uint64_t file_cadence_ms,
+                 const std::string &properties);
+
+      //! Close the open segment, ignoring any error.
+      ~raw_writer();
+
+      //! Write \p nitems samples starting at global index \p sample.
+      void write(uint64_t sample, const char *buf, uint64_t nitems);
+
+      //! Record \p nitems zero samples starting at global index \p sample.
+      void zeros(uint64_t sample, uint64_t nitems);
+
+      //! Close the open segment.
+      void close();
+
+      //! Mark the segments in \p dir as finished.
+      static void mark_stopped(const std::string &dir);
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_RAW_WRITER_H */
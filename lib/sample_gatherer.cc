@@ -0,0 +1,219 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <algorithm>
+#include <cstring>
+#include <stdexcept>
+#include <boost/bind.hpp>
+#include <boost/format.hpp>
+#include "sample_gatherer.h"
+
+namespace gr {
+  namespace drf {
+
+    sample_gatherer::sample_gatherer(
+            size_t item_size, uint64_t capacity, uint64_t align_items,
+            bool coalesce, double max_delay, const acquire_func &acquire,
+            const submit_func &submit, const bounds_func &bounds)
+      : d_item_size(item_size), d_capacity(capacity),
+        d_align_items(align_items), d_coalesce(coalesce), d_acquire(acquire),
+        d_submit(submit), d_bounds(bounds),
+        d_max_delay((int64_t)(max_delay*1e6)), d_limit(0), d_boundary(0),
+        d_done(false)
+    {
+      if(d_capacity == 0) {
+        throw std::invalid_argument("Gathered runs must hold samples");
+      }
+      if(!d_acquire) {
+        d_buffer.resize(d_capacity*d_item_size);
+      }
+      d_pending.index = 0;
+      d_pending.nitems = 0;
+      d_pending.data = NULL;
+      if(d_coalesce) {
+        d_thread = gr::thread::thread(boost::bind(&sample_gatherer::run,
+                                                  this));
+      }
+    }
+
+    sample_gatherer::~sample_gatherer()
+    {
+      if(!d_coalesce) {
+        return;
+      }
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_done = true;
+        d_cond.notify_one();
+      }
+      d_thread.join();
+    }
+
+    uint64_t
+    sample_gatherer::aligned_capacity(uint64_t items, uint64_t max_items,
+                                      uint64_t align_items)
+    {
+      uint64_t aligned;
+
+      if(max_items < align_items) {
+        throw std::invalid_argument((boost::format(
+                "Writer buffers of %lu samples are smaller than the %lu "
+                "sample alignment") % max_items % align_items).str());
+      }
+      // round up to whole aligned blocks, or down if the buffers are full
+      aligned = ((items + align_items - 1)/align_items)*align_items;
+      if(aligned > max_items) {
+        aligned = (max_items/align_items)*align_items;
+      }
+      return aligned;
+    }
+
+    uint64_t
+    sample_gatherer::run_limit(uint64_t capacity, uint64_t align_items,
+                               uint64_t offset)
+    {
+      if(capacity == 0) {
+        return 0;
+      }
+      // never empty, even if capacity isn't a whole number of blocks
+      return capacity - std::min(offset % align_items, capacity - 1);
+    }
+
+    void
+    sample_gatherer::start(uint64_t index)
+    {
+      uint64_t file_start;
+
+      d_pending.index = index;
+      d_pending.nitems = 0;
+      d_pending.data = d_acquire ? d_acquire(index) : &d_buffer[0];
+      d_deadline = boost::get_system_time() + d_max_delay;
+
+      d_bounds(index, file_start, d_boundary);
+      d_limit = d_capacity;
+      if(d_coalesce && d_align_items > 1) {
+        // end on an aligned offset into the file
+        d_limit = run_limit(d_capacity, d_align_items, index - file_start);
+      }
+    }
+
+    void
+    sample_gatherer::add(uint64_t index, const char *buf, uint64_t nitems)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      uint64_t n;
+
+      while(nitems > 0) {
+        if(d_pending.nitems == 0) {
+          start(index);
+          // the run now has a deadline
+          d_cond.notify_one();
+        }
+        n = std::min(nitems, d_limit - d_pending.nitems);
+        if(d_coalesce) {
+          // stop at the file boundary so each write fills out one file
+          n = std::min(n, d_boundary - index);
+        }
+        memcpy(d_pending.data + d_pending.nitems*d_item_size, buf,
+               n*d_item_size);
+        d_pending.nitems += n;
+        index += n;
+        buf += n*d_item_size;
+        nitems -= n;
+
+        if(d_pending.nitems == d_limit || index == d_boundary) {
+          submit();
+        }
+      }
+
+      if(!d_coalesce) {
+        submit();
+      }
+    }
+
+    void
+    sample_gatherer::submit()
+    {
+      if(d_pending.nitems == 0) {
+        return;
+      }
+      d_submit(d_pending);
+      d_pending.nitems = 0;
+      d_pending.data = NULL;
+    }
+
+    void
+    sample_gatherer::flush()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      submit();
+    }
+
+    void
+    sample_gatherer::set_alignment(uint64_t capacity, uint64_t align_items)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      if(capacity == 0) {
+        throw std::invalid_argument("Gathered runs must hold samples");
+      }
+      if(!d_acquire) {
+        // the pending run can't stay in a buffer that's about to move
+        submit();
+        d_buffer.resize(capacity*d_item_size);
+      }
+      d_capacity = capacity;
+      d_align_items = align_items;
+    }
+
+    uint64_t
+    sample_gatherer::pending_items() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_pending.nitems;
+    }
+
+    std::string
+    sample_gatherer::error() const
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_error;
+    }
+
+    void
+    sample_gatherer::run()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      while(!d_done) {
+        if(d_pending.nitems == 0) {
+          d_cond.wait(lock);
+        }
+        else if(boost::get_system_time() < d_deadline) {
+          d_cond.timed_wait(lock, d_deadline);
+        }
+        else {
+          // the source has stalled, don't hold the samples any longer
+          try {
+            submit();
+          }
+          catch(std::exception &e) {
+            if(d_error.empty()) {
+              d_error = e.what();
+            }
+            d_pending.nitems = 0;
+            d_pending.data = NULL;
+          }
+        }
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,126 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_SAMPLE_GATHERER_H
+#define INCLUDED_GRDRF_SAMPLE_GATHERER_H
+
+#include <string>
+#include <vector>
+#include <stdint.h>
+#include <boost/function.hpp>
+#include <boost/thread/thread_time.hpp>
+#include <gnuradio/thread/thread.h>
+#include <gr_drf/api.h>
+#include "write_queue.h"
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Gathers the samples from work() into runs for the writer.
+     *
+     * Samples are copied into a buffer from the acquire function, or one
+     * of its own if there is none, and each run is passed to the submit
+     * function once it holds \p capacity samples. When coalescing, a run
+     * is also submitted at the end of a file, so that each write fills
+     * out one file, and otherwise at the end of each add(). A coalesced
+     * run ends on an offset into its file that is a multiple of
+     * \p align_items, so that the runs after one cut short are aligned
+     * again.
+     *
+     * A coalesced run is submitted from a thread of the gatherer's own
+     * once it has waited \p max_delay seconds, so samples aren't held
+     * indefinitely when the source stalls. The submit function may then
+     * be called from that thread, though never at the same time as from
+     * add() or flush(), and if it throws the error is kept for error().
+     */
+    class GRDRF_API sample_gatherer
+    {
+     public:
+      //! A buffer for the run starting at a sample index.
+      typedef boost::function<char *(uint64_t)> acquire_func;
+
+      typedef boost::function<void (const write_block &)> submit_func;
+
+      //! First and one past the last sample index of a sample's file.
+      typedef boost::function<void (uint64_t, uint64_t &, uint64_t &)>
+              bounds_func;
+
+     private:
+      size_t d_item_size;
+      uint64_t d_capacity;
+      uint64_t d_align_items;
+      bool d_coalesce;
+      acquire_func d_acquire;
+      submit_func d_submit;
+      bounds_func d_bounds;
+      std::vector<char> d_buffer; // when there's no acquire function
+      boost::posix_time::microseconds d_max_delay;
+
+      write_block d_pending;
+      uint64_t d_limit; // samples the pending run may hold
+      uint64_t d_boundary; // index of the first sample of the next file
+      boost::system_time d_deadline; // to submit the pending run by
+      bool d_done;
+      std::string d_error;
+
+      gr::thread::thread d_thread;
+      mutable gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_cond;
+
+      void start(uint64_t index);
+      void submit();
+      void run();
+
+     public:
+      /*!
+       * \brief Samples a run holds: \p items rounded up to a multiple of
+       * \p align_items, or down if that's more than \p max_items.
+       *
+       * Throws std::invalid_argument if \p max_items is less than
+       * \p align_items, as no run could be aligned.
+       */
+      static uint64_t aligned_capacity(uint64_t items, uint64_t max_items,
+                                       uint64_t align_items);
+
+      /*!
+       * \brief Samples a run starting \p offset samples into its file may
+       * hold to end on an aligned offset, between 1 and \p capacity.
+       */
+      static uint64_t run_limit(uint64_t capacity, uint64_t align_items,
+                                uint64_t offset);
+
+      sample_gatherer(size_t item_size, uint64_t capacity,
+                      uint64_t align_items, bool coalesce, double max_delay,
+                      const acquire_func &acquire, const submit_func &submit,
+                      const bounds_func &bounds);
+
+      //! Stop the thread; call flush() first to keep the pending run.
+      ~sample_gatherer();
+
+      //! Gather \p nitems samples from \p buf, starting at index \p index.
+      void add(uint64_t index, const char *buf, uint64_t nitems);
+
+      //! Submit the pending run, if any.
+      void flush();
+
+      /*!
+       * \brief Make the runs from the next one on hold \p capacity
+       * samples and align them to \p align_items.
+       */
+      void set_alignment(uint64_t capacity, uint64_t align_items);
+
+      //! Samples gathered and not submitted yet.
+      uint64_t pending_items() const;
+
+      //! Description of the first failed submit on the thread, or empty.
+      std::string error() const;
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_SAMPLE_GATHERER_H */
@@ -0,0 +1,359 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "stats_rpc.h"
+
+namespace gr {
+  namespace drf {
+
+    stats_rpc::~stats_rpc()
+    {
+    }
+
+    int
+    stats_rpc::queue_depth() const
+    {
+      return rpc_stats().queue_depth;
+    }
+
+    int
+    stats_rpc::queue_high_water() const
+    {
+      return rpc_stats().queue_high_water;
+    }
+
+    double
+    stats_rpc::stall_time() const
+    {
+      return rpc_stats().stall_time;
+    }
+
+    uint64_t
+    stats_rpc::writer_backlog() const
+    {
+      return rpc_stats().writer_backlog;
+    }
+
+    uint64_t
+    stats_rpc::boundary_count() const
+    {
+      return rpc_stats().boundary_count;
+    }
+
+    double
+    stats_rpc::boundary_latency_avg() const
+    {
+      return rpc_stats().boundary_latency_avg;
+    }
+
+    double
+    stats_rpc::boundary_latency_max() const
+    {
+      return rpc_stats().boundary_latency_max;
+    }
+
+    int
+    stats_rpc::close_queue_depth() const
+    {
+      return rpc_stats().close_queue_depth;
+    }
+
+    double
+    stats_rpc::close_latency_avg() const
+    {
+      return rpc_stats().close_latency_avg;
+    }
+
+    double
+    stats_rpc::close_stall_time() const
+    {
+      return rpc_stats().close_stall_time;
+    }
+
+    uint64_t
+    stats_rpc::samples_written() const
+    {
+      return rpc_stats().samples_written;
+    }
+
+    uint64_t
+    stats_rpc::samples_dropped() const
+    {
+      return rpc_stats().samples_dropped;
+    }
+
+    uint64_t
+    stats_rpc::drop_count() const
+    {
+      return rpc_stats().drop_count;
+    }
+
+    uint64_t
+    stats_rpc::bytes_written() const
+    {
+      return rpc_stats().bytes_written;
+    }
+
+    double
+    stats_rpc::write_latency_p50() const
+    {
+      return rpc_stats().write_latency_p50;
+    }
+
+    double
+    stats_rpc::write_latency_p99() const
+    {
+      return rpc_stats().write_latency_p99;
+    }
+
+    double
+    stats_rpc::write_latency_max() const
+    {
+      return rpc_stats().write_latency_max;
+    }
+
+    double
+    stats_rpc::disk_latency_avg() const
+    {
+      return rpc_stats().disk_latency_avg;
+    }
+
+    double
+    stats_rpc::disk_latency_max() const
+    {
+      return rpc_stats().disk_latency_max;
+    }
+
+    uint64_t
+    stats_rpc::staged_bytes() const
+    {
+      return rpc_stats().staged_bytes;
+    }
+
+    int
+    stats_rpc::staged_files() const
+    {
+      return rpc_stats().staged_files;
+    }
+
+    double
+    stats_rpc::writeback_latency_avg() const
+    {
+      return rpc_stats().writeback_latency_avg;
+    }
+
+    double
+    stats_rpc::writeback_latency_max() const
+    {
+      return rpc_stats().writeback_latency_max;
+    }
+
+    uint64_t
+    stats_rpc::alignment() const
+    {
+      return rpc_stats().alignment;
+    }
+
+    uint64_t
+    stats_rpc::chunk_items() const
+    {
+      return rpc_stats().chunk_items;
+    }
+
+    int
+    stats_rpc::compression_level() const
+    {
+      return rpc_stats().compression_level;
+    }
+
+    uint64_t
+    stats_rpc::compression_changes() const
+    {
+      return rpc_stats().compression_changes;
+    }
+
+#ifdef GR_CTRLPORT
+    std::vector<rpcbasic_sptr>
+    stats_rpc::rpc_variables(const std::string &alias) const
+    {
+      // polled by ControlPort clients, nothing here touches work()
+      const pmt::pmt_t none = pmt::from_uint64(0);
+      const pmt::pmt_t most = pmt::from_uint64(~(uint64_t)0);
+      const pmt::pmt_t zero = pmt::mp(0.0);
+      std::vector<rpcbasic_sptr> vars;
+
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, int>(
+          alias, "queue_depth", &stats_rpc::queue_depth,
+          pmt::mp(0), pmt::mp(1 << 20), pmt::mp(0),
+          "buffers", "Buffers waiting for the writer", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, int>(
+          alias, "queue_high_water", &stats_rpc::queue_high_water,
+          pmt::mp(0), pmt::mp(1 << 20), pmt::mp(0),
+          "buffers", "Most buffers waiting at once", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "stall_time", &stats_rpc::stall_time,
+          zero, pmt::mp(3600.0), zero,
+          "s", "Time work() waited for a buffer", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "writer_backlog", &stats_rpc::writer_backlog,
+          none, most, none,
+          "samples", "Samples not yet written", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "boundary_count", &stats_rpc::boundary_count,
+          none, most, none,
+          "files", "Writes that started a new file", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "boundary_latency_avg", &stats_rpc::boundary_latency_avg,
+          zero, pmt::mp(10.0), zero,
+          "s", "Mean file boundary write time", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "boundary_latency_max", &stats_rpc::boundary_latency_max,
+          zero, pmt::mp(10.0), zero,
+          "s", "Longest file boundary write time", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, int>(
+          alias, "close_queue_depth", &stats_rpc::close_queue_depth,
+          pmt::mp(0), pmt::mp(1 << 20), pmt::mp(0),
+          "files", "Files waiting to be closed", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "close_latency_avg", &stats_rpc::close_latency_avg,
+          zero, pmt::mp(10.0), zero,
+          "s", "Mean file close time", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "close_stall_time", &stats_rpc::close_stall_time,
+          zero, pmt::mp(3600.0), zero,
+          "s", "Time waited for the close queue", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "samples_written", &stats_rpc::samples_written,
+          none, most, none,
+          "samples", "Samples written", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "samples_dropped", &stats_rpc::samples_dropped,
+          none, most, none,
+          "samples", "Samples lost to drops", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "drop_count", &stats_rpc::drop_count,
+          none, most, none,
+          "drops", "Number of drops", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "bytes_written", &stats_rpc::bytes_written,
+          none, most, none,
+          "bytes", "Bytes handed to HDF5", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "write_latency_p50", &stats_rpc::write_latency_p50,
+          zero, pmt::mp(10.0), zero,
+          "s", "Median write time", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "write_latency_p99", &stats_rpc::write_latency_p99,
+          zero, pmt::mp(10.0), zero,
+          "s", "99th percentile write time", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "write_latency_max", &stats_rpc::write_latency_max,
+          zero, pmt::mp(10.0), zero,
+          "s", "Longest write time", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "disk_latency_avg", &stats_rpc::disk_latency_avg,
+          zero, pmt::mp(60.0), zero,
+          "s", "Mean rx_time to disk latency", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "disk_latency_max", &stats_rpc::disk_latency_max,
+          zero, pmt::mp(60.0), zero,
+          "s", "Longest rx_time to disk latency", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "staged_bytes", &stats_rpc::staged_bytes,
+          none, most, none,
+          "bytes", "Bytes waiting in staging", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, int>(
+          alias, "staged_files", &stats_rpc::staged_files,
+          pmt::mp(0), pmt::mp(1 << 20), pmt::mp(0),
+          "files", "Files waiting in staging", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "writeback_latency_avg", &stats_rpc::writeback_latency_avg,
+          zero, pmt::mp(10.0), zero,
+          "s", "Mean writeback time", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, double>(
+          alias, "writeback_latency_max", &stats_rpc::writeback_latency_max,
+          zero, pmt::mp(10.0), zero,
+          "s", "Longest writeback time", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "alignment", &stats_rpc::alignment,
+          none, most, none,
+          "bytes", "Write alignment", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "chunk_items", &stats_rpc::chunk_items,
+          none, most, none,
+          "samples", "Samples per HDF5 chunk", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, int>(
+          alias, "compression_level", &stats_rpc::compression_level,
+          pmt::mp(0), pmt::mp(9), pmt::mp(0),
+          "", "Compression level of the open file", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      vars.push_back(
+        rpcbasic_sptr(new rpcbasic_register_get<stats_rpc, uint64_t>(
+          alias, "compression_changes", &stats_rpc::compression_changes,
+          none, most, none,
+          "changes", "Compression level changes", RPC_PRIVLVL_MIN,
+          DISPTIME | DISPOPTSTRIP)));
+      return vars;
+    }
+#endif /* GR_CTRLPORT */
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,78 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_STATS_RPC_H
+#define INCLUDED_GRDRF_STATS_RPC_H
+
+#include <string>
+#include <vector>
+#include <gr_drf/writer_stats.h>
+#ifdef GR_CTRLPORT
+#include <gnuradio/rpcregisterhelpers.h>
+#endif
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief Publishes a block's writer_stats as ControlPort performance
+     * counters.
+     *
+     * ControlPort reads each value by calling a member function of the
+     * block it finds by alias, so a sink derives from this class as well,
+     * implements rpc_stats(), and adds the variables from rpc_variables()
+     * in its setup_rpc(). The getters are this class's rather than the
+     * block's, so each sink only has to provide one snapshot.
+     */
+    class stats_rpc
+    {
+     private:
+      int queue_depth() const;
+      int queue_high_water() const;
+      double stall_time() const;
+      uint64_t writer_backlog() const;
+      uint64_t boundary_count() const;
+      double boundary_latency_avg() const;
+      double boundary_latency_max() const;
+      int close_queue_depth() const;
+      double close_latency_avg() const;
+      double close_stall_time() const;
+      uint64_t samples_written() const;
+      uint64_t samples_dropped() const;
+      uint64_t drop_count() const;
+      uint64_t bytes_written() const;
+      double write_latency_p50() const;
+      double write_latency_p99() const;
+      double write_latency_max() const;
+      double disk_latency_avg() const;
+      double disk_latency_max() const;
+      uint64_t staged_bytes() const;
+      int staged_files() const;
+      double writeback_latency_avg() const;
+      double writeback_latency_max() const;
+      uint64_t alignment() const;
+      uint64_t chunk_items() const;
+      int compression_level() const;
+      uint64_t compression_changes() const;
+
+     protected:
+      //! Statistics to publish, read each time ControlPort polls.
+      virtual writer_stats rpc_stats() const = 0;
+
+#ifdef GR_CTRLPORT
+      //! Variables to register for the block named \p alias.
+      std::vector<rpcbasic_sptr> rpc_variables(
+              const std::string &alias) const;
+#endif
+
+     public:
+      virtual ~stats_rpc();
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_STATS_RPC_H */
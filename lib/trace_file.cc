@@ -0,0 +1,260 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <cstdio>
+#include <map>
+#include <set>
+#include <utility>
+#include <time.h>
+#include <unistd.h>
+#include <boost/thread/tss.hpp>
+#include <boost/weak_ptr.hpp>
+#include "trace_file.h"
+
+// events are stored in chunks so that recording never moves old ones
+#define CHUNK_EVENTS 8192
+// events kept per thread, later ones are counted as lost
+#define MAX_EVENTS (1 << 21)
+
+namespace gr {
+  namespace drf {
+
+    struct trace_event
+    {
+      const char *name;
+      const char *arg_name;
+      uint64_t ts;
+      uint64_t dur;
+      uint64_t arg;
+      int channel;
+      char phase;
+    };
+
+    struct trace_buffer
+    {
+      int tid;
+      std::vector<trace_event *> chunks;
+      size_t count;
+      uint64_t lost;
+    };
+
+    // the buffers a thread has in each trace_file, by serial number;
+    // serials are never reused, and entries of closed files are dropped
+    // the next time the thread records into a file it has no entry for
+    struct thread_cache
+    {
+      std::vector<std::pair<uint64_t, trace_buffer *> > entries;
+    };
+
+    static boost::thread_specific_ptr<thread_cache> s_cache;
+    static gr::thread::mutex s_registry_mutex;
+    static std::map<std::string, boost::weak_ptr<trace_file> > s_registry;
+    static uint64_t s_next_serial = 1;
+    static std::set<uint64_t> s_open_serials;
+
+    boost::shared_ptr<trace_file>
+    trace_file::open(const std::string &path)
+    {
+      gr::thread::scoped_lock lock(s_registry_mutex);
+      boost::shared_ptr<trace_file> file = s_registry[path].lock();
+
+      if(!file) {
+        file.reset(new trace_file(path));
+        s_registry[path] = file;
+      }
+      return file;
+    }
+
+    trace_file::trace_file(const std::string &path)
+      : d_path(path), d_serial(s_next_serial++)
+    {
+      // open() holds s_registry_mutex
+      s_open_serials.insert(d_serial);
+    }
+
+    trace_file::~trace_file()
+    {
+      size_t k, c;
+
+      write();
+      for(k=0; k<d_buffers.size(); k++) {
+        for(c=0; c<d_buffers[k]->chunks.size(); c++) {
+          delete [] d_buffers[k]->chunks[c];
+        }
+        delete d_buffers[k];
+      }
+
+      gr::thread::scoped_lock lock(s_registry_mutex);
+      s_open_serials.erase(d_serial);
+      // unless the path has been opened again since
+      if(s_registry[d_path].expired()) {
+        s_registry.erase(d_path);
+      }
+    }
+
+    uint64_t
+    trace_file::now()
+    {
+      struct timespec ts;
+
+      clock_gettime(CLOCK_MONOTONIC, &ts);
+      return (uint64_t)ts.tv_sec*1000000 + ts.tv_nsec/1000;
+    }
+
+    int
+    trace_file::channel(const std::string &name)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      size_t k;
+
+      for(k=0; k<d_channels.size(); k++) {
+        if(d_channels[k] == name) {
+          return k;
+        }
+      }
+      d_channels.push_back(name);
+      return d_channels.size() - 1;
+    }
+
+    trace_buffer *
+    trace_file::buffer()
+    {
+      thread_cache *cache = s_cache.get();
+      trace_buffer *buf;
+      size_t k;
+
+      if(!cache) {
+        cache = new thread_cache;
+        s_cache.reset(cache);
+      }
+      for(k=0; k<cache->entries.size(); k++) {
+        if(cache->entries[k].first == d_serial) {
+          return cache->entries[k].second;
+        }
+      }
+
+      // first event from this thread, the only time locks are taken
+      {
+        gr::thread::scoped_lock lock(s_registry_mutex);
+        for(k=cache->entries.size(); k>0; k--) {
+          if(!s_open_serials.count(cache->entries[k-1].first)) {
+            cache->entries.erase(cache->entries.begin() + k - 1);
+          }
+        }
+      }
+      buf = new trace_buffer;
+      buf->count = 0;
+      buf->lost = 0;
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_buffers.push_back(buf);
+        buf->tid = d_buffers.size();
+      }
+      cache->entries.push_back(std::make_pair(d_serial, buf));
+      return buf;
+    }
+
+    void
+    trace_file::add(char phase, const char *name, int channel,
+                    uint64_t start, uint64_t duration, const char *arg_name,
+                    uint64_t arg)
+    {
+      trace_buffer *buf = buffer();
+      trace_event *event;
+
+      if(buf->count >= MAX_EVENTS) {
+        buf->lost++;
+        return;
+      }
+      if(buf->count % CHUNK_EVENTS == 0) {
+        buf->chunks.push_back(new trace_event[CHUNK_EVENTS]);
+      }
+      event = &buf->chunks.back()[buf->count % CHUNK_EVENTS];
+      event->name = name;
+      event->arg_name = arg_name;
+      event->ts = start;
+      event->dur = duration;
+      event->arg = arg;
+      event->channel = channel;
+      event->phase = phase;
+      buf->count++;
+    }
+
+    static std::string
+    json_string(const std::string &s)
+    {
+      std::string out = "\"";
+      char hex[8];
+      size_t k;
+
+      for(k=0; k<s.size(); k++) {
+        if(s[k] == '"' || s[k] == '\\') {
+          out += '\\';
+          out += s[k];
+        }
+        else if((unsigned char)s[k] < 0x20) {
+          snprintf(hex, sizeof(hex), "\\u%04x", (unsigned char)s[k]);
+          out += hex;
+        }
+        else {
+          out += s[k];
+        }
+      }
+      return out + "\"";
+    }
+
+    void
+    trace_file::write()
+    {
+      FILE *fp;
+      int pid = getpid();
+      const char *sep = "";
+      trace_buffer *buf;
+      trace_event *event;
+      size_t k, n;
+
+      fp = fopen(d_path.c_str(), "w");
+      if(!fp) {
+        perror(d_path.c_str());
+        return;
+      }
+
+      fprintf(fp, "{\"displayTimeUnit\": \"ms\", \"traceEvents\": [\n");
+      for(k=0; k<d_buffers.size(); k++) {
+        buf = d_buffers[k];
+        fprintf(fp, "%s{\"name\": \"thread_name\", \"ph\": \"M\", "
+                "\"pid\": %d, \"tid\": %d, \"args\": {\"name\": "
+                "\"thread %d (%lu events lost)\"}}",
+                sep, pid, buf->tid, buf->tid, buf->lost);
+        sep = ",\n";
+        for(n=0; n<buf->count; n++) {
+          event = &buf->chunks[n/CHUNK_EVENTS][n % CHUNK_EVENTS];
+          fprintf(fp, "%s{\"name\": \"%s\", \"ph\": \"%c\", \"ts\": %lu, ",
+                  sep, event->name, event->phase, event->ts);
+          if(event->phase == 'X') {
+            fprintf(fp, "\"dur\": %lu, ", event->dur);
+          }
+          else {
+            fprintf(fp, "\"s\": \"t\", ");
+          }
+          fprintf(fp, "\"pid\": %d, \"tid\": %d, \"args\": {\"channel\": %s, "
+                  "\"%s\": %lu}}", pid, buf->tid,
+                  json_string(d_channels[event->channel]).c_str(),
+                  event->arg_name, event->arg);
+        }
+      }
+      fprintf(fp, "\n]}\n");
+      if(fclose(fp)) {
+        perror(d_path.c_str());
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
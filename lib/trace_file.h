@@ -0,0 +1,87 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_TRACE_FILE_H
+#define INCLUDED_GRDRF_TRACE_FILE_H
+
+#include <string>
+#include <vector>
+#include <stdint.h>
+#include <boost/shared_ptr.hpp>
+#include <gr_drf/api.h>
+#include <gnuradio/thread/thread.h>
+
+namespace gr {
+  namespace drf {
+
+    struct trace_buffer;
+
+    /*!
+     * \brief Timeline of sink events written as a Chrome trace.
+     *
+     * Every thread records into a buffer of its own, so recording an event
+     * takes no lock and does no I/O. The buffers are written out as Chrome
+     * trace JSON (chrome://tracing or Perfetto) when the last user of the
+     * file releases it. Sinks opening the same path share one trace_file
+     * so that all of their channels end up on one timeline.
+     *
+     * Event names and argument names must be string literals, as only the
+     * pointers are kept until the file is written. Times are in
+     * microseconds of the monotonic clock, which is shared by all
+     * processes on the host.
+     */
+    class GRDRF_API trace_file
+    {
+     private:
+      std::string d_path;
+      uint64_t d_serial; // tells this file apart in the per-thread cache
+      std::vector<std::string> d_channels;
+      std::vector<trace_buffer *> d_buffers;
+      gr::thread::mutex d_mutex;
+
+      trace_buffer *buffer();
+      void add(char phase, const char *name, int channel, uint64_t start,
+               uint64_t duration, const char *arg_name, uint64_t arg);
+      void write();
+
+      trace_file(const std::string &path);
+
+      // make copy constructor private with no implementation to prevent copying
+      trace_file(const trace_file& that);
+
+     public:
+      //! Get the trace_file writing to \p path, creating it if needed.
+      static boost::shared_ptr<trace_file> open(const std::string &path);
+
+      //! Writes the trace.
+      ~trace_file();
+
+      //! Microseconds on the trace clock.
+      static uint64_t now();
+
+      //! Number for channel \p name to pass with its events.
+      int channel(const std::string &name);
+
+      //! Record an event that started at \p start and ends now.
+      void complete(const char *name, int channel, uint64_t start,
+                    const char *arg_name, uint64_t arg)
+      {
+        uint64_t end = now();
+        add('X', name, channel, start, end - start, arg_name, arg);
+      }
+
+      //! Record an event that happens now.
+      void instant(const char *name, int channel, const char *arg_name,
+                   uint64_t arg)
+      {
+        add('i', name, channel, now(), 0, arg_name, arg);
+      }
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_TRACE_FILE_H */
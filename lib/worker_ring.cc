@@ -0,0 +1,411 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <errno.h>
+#include <fcntl.h>
+#include <signal.h>
+#include <spawn.h>
+#include <stdio.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <sys/wait.h>
+#include <stdexcept>
+#include <gnuradio/high_res_timer.h>
+#include "worker_ring.h"
+
+extern char **environ;
+
+namespace gr {
+  namespace drf {
+
+    struct worker_ring_header
+    {
+      pthread_mutex_t mutex;
+      pthread_cond_t filled_cond;
+      pthread_cond_t free_cond;
+      uint64_t num_buffers;
+      uint64_t buffer_size;
+      uint64_t head; // records submitted
+      uint64_t next; // records handed to the worker
+      uint64_t tail; // records released
+      uint64_t high_water;
+      uint64_t pending_items;
+      int done;
+      int failed;
+      char error[1024];
+      worker_config config;
+      writer_stats stats;
+    };
+
+    namespace {
+
+      // the other process died holding the lock, which is now ours; the
+      // ring may be half updated, so mark it failed for check() to report
+      void
+      recover(worker_ring_header *header)
+      {
+        static const char what[] = "Writer process died holding the ring";
+
+        pthread_mutex_consistent(&header->mutex);
+        if(!header->failed) {
+          strncpy(header->error, what, sizeof(header->error) - 1);
+          header->failed = 1;
+        }
+        pthread_cond_broadcast(&header->filled_cond);
+        pthread_cond_broadcast(&header->free_cond);
+      }
+
+      class ring_lock
+      {
+        worker_ring_header *d_header;
+
+       public:
+        ring_lock(worker_ring_header *header) : d_header(header)
+        {
+          int result = pthread_mutex_lock(&d_header->mutex);
+
+          if(result == EOWNERDEAD) {
+            recover(d_header);
+          }
+          else if(result != 0) {
+            throw std::runtime_error(
+                    std::string("Failed to lock writer ring: ")
+                    + strerror(result));
+          }
+        }
+        ~ring_lock()
+        {
+          pthread_mutex_unlock(&d_header->mutex);
+        }
+      };
+
+      // wait at most a second so a lost peer is noticed
+      void
+      timed_wait(pthread_cond_t *cond, worker_ring_header *header)
+      {
+        struct timespec ts;
+
+        clock_gettime(CLOCK_REALTIME, &ts);
+        ts.tv_sec += 1;
+        if(pthread_cond_timedwait(cond, &header->mutex, &ts) == EOWNERDEAD) {
+          recover(header);
+        }
+      }
+
+      size_t
+      page_align(size_t n)
+      {
+        size_t page = sysconf(_SC_PAGESIZE);
+        return (n + page - 1)/page*page;
+      }
+
+    } // anonymous namespace
+
+    worker_ring::worker_ring(size_t num_buffers, size_t buffer_size,
+                             const worker_config &config)
+      : d_owner(true), d_stall_time(0), d_pid(-1), d_parent(0)
+    {
+      char name[256];
+      size_t records_offset, buffers_offset;
+      pthread_mutexattr_t mattr;
+      pthread_condattr_t cattr;
+      int fd;
+
+      snprintf(name, sizeof(name), "/gr_drf.%d.%p", (int)getpid(),
+               (void *)this);
+      d_name = name;
+
+      records_offset = sizeof(worker_ring_header);
+      buffers_offset = page_align(records_offset
+                                  + num_buffers*sizeof(worker_record));
+      d_size = buffers_offset + num_buffers*buffer_size;
+
+      fd = shm_open(d_name.c_str(), O_CREAT | O_EXCL | O_RDWR, 0600);
+      if(fd < 0) {
+        throw std::runtime_error("Failed to create shared memory for writer");
+      }
+      if(ftruncate(fd, d_size) != 0) {
+        close(fd);
+        shm_unlink(d_name.c_str());
+        throw std::runtime_error("Failed to size shared memory for writer");
+      }
+      d_base = (char *)mmap(NULL, d_size, PROT_READ | PROT_WRITE, MAP_SHARED,
+                            fd, 0);
+      close(fd);
+      if(d_base == MAP_FAILED) {
+        shm_unlink(d_name.c_str());
+        throw std::runtime_error("Failed to map shared memory for writer");
+      }
+
+      d_header = (worker_ring_header *)d_base;
+      d_records = (worker_record *)(d_base + records_offset);
+      d_buffers = d_base + buffers_offset;
+
+      memset(d_header, 0, sizeof(worker_ring_header));
+      pthread_mutexattr_init(&mattr);
+      pthread_mutexattr_setpshared(&mattr, PTHREAD_PROCESS_SHARED);
+      // a worker killed while holding the lock must not hang work()
+      pthread_mutexattr_setrobust(&mattr, PTHREAD_MUTEX_ROBUST);
+      pthread_mutex_init(&d_header->mutex, &mattr);
+      pthread_mutexattr_destroy(&mattr);
+      pthread_condattr_init(&cattr);
+      pthread_condattr_setpshared(&cattr, PTHREAD_PROCESS_SHARED);
+      pthread_cond_init(&d_header->filled_cond, &cattr);
+      pthread_cond_init(&d_header->free_cond, &cattr);
+      pthread_condattr_destroy(&cattr);
+
+      d_header->num_buffers = num_buffers;
+      d_header->buffer_size = buffer_size;
+      d_header->config = config;
+    }
+
+    worker_ring::worker_ring(const std::string &name)
+      : d_name(name), d_owner(false), d_stall_time(0), d_pid(-1),
+        d_parent(getppid())
+    {
+      struct stat st;
+      size_t records_offset, buffers_offset;
+      int fd;
+
+      fd = shm_open(d_name.c_str(), O_RDWR, 0);
+      if(fd < 0) {
+        throw std::runtime_error("Failed to open shared memory " + d_name);
+      }
+      if(fstat(fd, &st) != 0) {
+        close(fd);
+        throw std::runtime_error("Failed to stat shared memory " + d_name);
+      }
+      d_size = st.st_size;
+      d_base = (char *)mmap(NULL, d_size, PROT_READ | PROT_WRITE, MAP_SHARED,
+                            fd, 0);
+      close(fd);
+      if(d_base == MAP_FAILED) {
+        throw std::runtime_error("Failed to map shared memory " + d_name);
+      }
+
+      d_header = (worker_ring_header *)d_base;
+      records_offset = sizeof(worker_ring_header);
+      buffers_offset = page_align(records_offset
+                                  + d_header->num_buffers*sizeof(worker_record));
+      d_records = (worker_record *)(d_base + records_offset);
+      d_buffers = d_base + buffers_offset;
+    }
+
+    worker_ring::~worker_ring()
+    {
+      int status;
+
+      if(d_owner && d_pid > 0) {
+        // shutdown() was not called, don't leave the worker behind
+        kill(d_pid, SIGTERM);
+        waitpid(d_pid, &status, 0);
+      }
+      munmap(d_base, d_size);
+      if(d_owner) {
+        shm_unlink(d_name.c_str());
+      }
+    }
+
+    const worker_config &
+    worker_ring::config() const
+    {
+      return d_header->config;
+    }
+
+    void
+    worker_ring::spawn(const std::string &program)
+    {
+      char *argv[3];
+      int result;
+
+      argv[0] = const_cast<char *>(program.c_str());
+      argv[1] = const_cast<char *>(d_name.c_str());
+      argv[2] = NULL;
+      result = posix_spawnp(&d_pid, program.c_str(), NULL, NULL, argv,
+                            environ);
+      if(result != 0) {
+        d_pid = -1;
+        throw std::runtime_error("Failed to start writer process " + program
+                                 + ": " + strerror(result));
+      }
+    }
+
+    void
+    worker_ring::check_worker_locked()
+    {
+      int status;
+
+      if(d_header->failed) {
+        throw std::runtime_error(d_header->error);
+      }
+      if(d_pid > 0 && waitpid(d_pid, &status, WNOHANG) == d_pid) {
+        d_pid = -1;
+        throw std::runtime_error("Writer process exited unexpectedly");
+      }
+      if(d_pid <= 0) {
+        throw std::runtime_error("Writer process is not running");
+      }
+    }
+
+    void
+    worker_ring::check()
+    {
+      ring_lock lock(d_header);
+      check_worker_locked();
+    }
+
+    bool
+    worker_ring::shutdown()
+    {
+      int status = 0;
+      bool ok;
+
+      {
+        ring_lock lock(d_header);
+        d_header->done = 1;
+        pthread_cond_broadcast(&d_header->filled_cond);
+      }
+      if(d_pid <= 0) {
+        return false;
+      }
+      waitpid(d_pid, &status, 0);
+      d_pid = -1;
+
+      ring_lock lock(d_header);
+      ok = !d_header->failed && WIFEXITED(status) && WEXITSTATUS(status) == 0;
+      return ok;
+    }
+
+    void
+    worker_ring::wait_for_slot()
+    {
+      gr::high_res_timer_type t0;
+
+      if(d_header->head - d_header->tail < d_header->num_buffers) {
+        return;
+      }
+      t0 = gr::high_res_timer_now();
+      while(d_header->head - d_header->tail >= d_header->num_buffers) {
+        check_worker_locked();
+        timed_wait(&d_header->free_cond, d_header);
+      }
+      d_stall_time += ((double)(gr::high_res_timer_now() - t0)
+                       / gr::high_res_timer_tps());
+    }
+
+    char *
+    worker_ring::acquire()
+    {
+      ring_lock lock(d_header);
+
+      if(d_header->failed) {
+        throw std::runtime_error(d_header->error);
+      }
+      wait_for_slot();
+      return d_buffers
+             + (d_header->head % d_header->num_buffers)*d_header->buffer_size;
+    }
+
+    void
+    worker_ring::submit(const worker_record &record)
+    {
+      ring_lock lock(d_header);
+
+      if(d_header->failed) {
+        throw std::runtime_error(d_header->error);
+      }
+      wait_for_slot();
+      d_records[d_header->head % d_header->num_buffers] = record;
+      d_header->head++;
+      d_header->pending_items += record.nitems;
+      if(d_header->head - d_header->tail > d_header->high_water) {
+        d_header->high_water = d_header->head - d_header->tail;
+      }
+      pthread_cond_signal(&d_header->filled_cond);
+    }
+
+    bool
+    worker_ring::pop(worker_record &record, char *&data)
+    {
+      ring_lock lock(d_header);
+      uint64_t slot;
+
+      while(d_header->next == d_header->head) {
+        if(d_header->done || getppid() != d_parent) {
+          return false;
+        }
+        timed_wait(&d_header->filled_cond, d_header);
+      }
+      slot = d_header->next % d_header->num_buffers;
+      record = d_records[slot];
+      data = d_buffers + slot*d_header->buffer_size;
+      d_header->next++;
+      return true;
+    }
+
+    void
+    worker_ring::release(const worker_record &record)
+    {
+      ring_lock lock(d_header);
+
+      d_header->tail++;
+      d_header->pending_items -= record.nitems;
+      pthread_cond_signal(&d_header->free_cond);
+    }
+
+    void
+    worker_ring::fail(const std::string &what)
+    {
+      ring_lock lock(d_header);
+
+      strncpy(d_header->error, what.c_str(), sizeof(d_header->error) - 1);
+      d_header->failed = 1;
+    }
+
+    void
+    worker_ring::set_stats(const writer_stats &stats)
+    {
+      ring_lock lock(d_header);
+      d_header->stats = stats;
+    }
+
+    writer_stats
+    worker_ring::stats() const
+    {
+      ring_lock lock(d_header);
+      return d_header->stats;
+    }
+
+    size_t
+    worker_ring::depth() const
+    {
+      ring_lock lock(d_header);
+      return d_header->head - d_header->next;
+    }
+
+    size_t
+    worker_ring::high_water() const
+    {
+      ring_lock lock(d_header);
+      return d_header->high_water;
+    }
+
+    uint64_t
+    worker_ring::pending_items() const
+    {
+      ring_lock lock(d_header);
+      return d_header->pending_items;
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
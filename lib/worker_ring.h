@@ -0,0 +1,169 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_WORKER_RING_H
+#define INCLUDED_GRDRF_WORKER_RING_H
+
+#include <string>
+#include <pthread.h>
+#include <stdint.h>
+#include <sys/types.h>
+#include <gr_drf/api.h>
+#include <gr_drf/writer_stats.h>
+
+namespace gr {
+  namespace drf {
+
+    //! Writer settings handed to the worker process.
+    struct worker_config
+    {
+      char dir[4096];
+      uint64_t sample_size;
+      uint64_t subdir_cadence_s;
+      uint64_t file_cadence_ms;
+      uint64_t sample_rate_numerator;
+      uint64_t sample_rate_denominator;
+      char uuid[512];
+      int is_complex;
+      int num_subchannels;
+      int is_continuous;
+      int compression_level;
+      int checksum;
+      int lookahead;
+      int close_queue;
+      int quiet;
+      double log_interval;
+      char trace[4096];
+      uint64_t ring_max_bytes;
+      double ring_max_seconds;
+      char staging[4096];
+      double staging_rate;
+      int raw_capture;
+      int preallocate;
+      int writeback_on_close;
+      uint64_t writeback_max_dirty;
+      uint64_t metadata_cache;
+      int alignment; // resolved by the block, never -1
+      int chunk_writes;
+      double adapt_max_lag;
+      char stripe[4096]; // striping roots, one per line
+    };
+
+    //! What a worker_record asks the worker to do.
+    enum worker_record_type {
+      WORKER_DATA,  // write the samples in the record's buffer
+      WORKER_ZEROS, // write nitems zero samples
+      WORKER_START  // (re)create the writer with index as its start sample
+    };
+
+    struct worker_record
+    {
+      int type;
+      uint64_t index; // sample index relative to the start sample
+      uint64_t nitems;
+    };
+
+    struct worker_ring_header;
+
+    /*!
+     * \brief Ring of buffers in shared memory between a sink and the
+     * worker process that writes for it.
+     *
+     * The sink creates the ring and spawn()s the worker with the ring's
+     * name, the worker attaches to it by name. Records are passed in order
+     * through a fixed number of slots, each with a buffer of samples, so
+     * the sink waits only when every slot is in use. Process-shared
+     * pthread primitives guard the ring, and waits time out periodically
+     * to notice if the other process has gone away. The mutex is robust,
+     * so a process that dies holding it marks the ring failed instead of
+     * blocking the other one forever.
+     */
+    class GRDRF_API worker_ring
+    {
+     private:
+      std::string d_name;
+      bool d_owner;
+      size_t d_size;
+      char *d_base;
+      worker_ring_header *d_header;
+      worker_record *d_records;
+      char *d_buffers;
+      double d_stall_time;
+      pid_t d_pid;
+      pid_t d_parent;
+
+      void wait_for_slot();
+      void check_worker_locked();
+
+      // make copy constructor private with no implementation to prevent copying
+      worker_ring(const worker_ring& that);
+
+     public:
+      //! Create a ring for the sink side.
+      worker_ring(size_t num_buffers, size_t buffer_size,
+                  const worker_config &config);
+
+      //! Attach to the ring named \p name from the worker process.
+      explicit worker_ring(const std::string &name);
+
+      ~worker_ring();
+
+      const std::string &name() const { return d_name; }
+      const worker_config &config() const;
+
+      //! Start \p program with the ring's name as its only argument.
+      void spawn(const std::string &program);
+
+      /*!
+       * \brief Raise an error if the worker has reported a failure or
+       * exited early.
+       */
+      void check();
+
+      /*!
+       * \brief Tell the worker to exit once it has written everything and
+       * wait for it.
+       *
+       * Returns false if the worker failed or did not exit cleanly.
+       */
+      bool shutdown();
+
+      //! Get the next free buffer, waiting for the worker if none are free.
+      char *acquire();
+
+      //! Queue a record, with the buffer from acquire() if it has data.
+      void submit(const worker_record &record);
+
+      /*!
+       * \brief Wait for the next record in the worker.
+       *
+       * Returns false once the sink has shut down and all records have been
+       * handed out, or if the sink process has gone away.
+       */
+      bool pop(worker_record &record, char *&data);
+
+      //! Free the slot of a written record.
+      void release(const worker_record &record);
+
+      //! Report a write error from the worker.
+      void fail(const std::string &what);
+
+      //! Statistics of the worker's writer.
+      void set_stats(const writer_stats &stats);
+      writer_stats stats() const;
+
+      size_t depth() const;
+      size_t high_water() const;
+      double stall_time() const { return d_stall_time; }
+
+      //! Items submitted that the worker has not written yet.
+      uint64_t pending_items() const;
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_WORKER_RING_H */
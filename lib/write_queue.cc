@@ -0,0 +1,113 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <gnuradio/high_res_timer.h>
+#include "write_queue.h"
+
+namespace gr {
+  namespace drf {
+
+    write_queue::write_queue(size_t num_buffers, size_t buffer_size)
+      : d_storage(num_buffers*buffer_size), d_buffer_size(buffer_size),
+        d_high_water(0), d_pending_items(0), d_stall_time(0)
+    {
+      size_t i;
+
+      for(i=0; i<num_buffers; i++) {
+        d_free.push_back(&d_storage[i*buffer_size]);
+      }
+    }
+
+    char *
+    write_queue::acquire()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      char *buf;
+
+      if(d_free.empty()) {
+        gr::high_res_timer_type t0 = gr::high_res_timer_now();
+        while(d_free.empty()) {
+          d_free_cond.wait(lock);
+        }
+        d_stall_time += ((double)(gr::high_res_timer_now() - t0)
+                         / gr::high_res_timer_tps());
+      }
+      buf = d_free.front();
+      d_free.pop_front();
+      return buf;
+    }
+
+    void
+    write_queue::submit(const write_block &block)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      d_filled.push_back(block);
+      d_pending_items += block.nitems;
+      if(d_filled.size() > d_high_water) {
+        d_high_water = d_filled.size();
+      }
+    }
+
+    bool
+    write_queue::try_pop(write_block &block)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      if(d_filled.empty()) {
+        return false;
+      }
+      block = d_filled.front();
+      d_filled.pop_front();
+      return true;
+    }
+
+    void
+    write_queue::release(const write_block &block)
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+
+      d_pending_items -= block.nitems;
+      if(block.data) {
+        d_free.push_back(block.data);
+        d_free_cond.notify_one();
+      }
+    }
+
+    size_t
+    write_queue::depth()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_filled.size();
+    }
+
+    size_t
+    write_queue::high_water()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_high_water;
+    }
+
+    double
+    write_queue::stall_time()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_stall_time;
+    }
+
+    uint64_t
+    write_queue::pending_items()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      return d_pending_items;
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,84 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_WRITE_QUEUE_H
+#define INCLUDED_GRDRF_WRITE_QUEUE_H
+
+#include <deque>
+#include <vector>
+#include <stdint.h>
+#include <gnuradio/thread/thread.h>
+#include <gr_drf/api.h>
+
+namespace gr {
+  namespace drf {
+
+    /*!
+     * \brief A contiguous run of samples waiting to be written.
+     *
+     * A block with a NULL \p data pointer stands for \p nitems zero samples,
+     * so that filling a drop does not need to occupy a buffer.
+     */
+    struct write_block
+    {
+      uint64_t index; // sample index relative to the writer's start sample
+      uint64_t nitems;
+      char *data;
+    };
+
+    /*!
+     * \brief Ring of preallocated buffers passed between work() and the
+     * writer thread.
+     *
+     * The producer acquire()s a free buffer, fills it, and submit()s it. A
+     * writer thread try_pop()s filled blocks in order and release()s their
+     * buffers back to the free list once written. No memory is allocated
+     * after construction.
+     */
+    class GRDRF_API write_queue
+    {
+     private:
+      std::vector<char> d_storage;
+      size_t d_buffer_size;
+      std::deque<char *> d_free;
+      std::deque<write_block> d_filled;
+      size_t d_high_water;
+      uint64_t d_pending_items;
+      double d_stall_time;
+
+      gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_free_cond;
+
+     public:
+      write_queue(size_t num_buffers, size_t buffer_size);
+
+      //! Size of each buffer in bytes.
+      size_t buffer_size() const { return d_buffer_size; }
+
+      //! Get a free buffer, waiting for the writer if none are available.
+      char *acquire();
+
+      //! Queue a filled block for writing.
+      void submit(const write_block &block);
+
+      //! Take the next block to write, returns false if none are queued.
+      bool try_pop(write_block &block);
+
+      //! Return the buffer of a written block to the free list.
+      void release(const write_block &block);
+
+      size_t depth();
+      size_t high_water();
+      double stall_time();
+
+      //! Items submitted whose blocks have not been released yet.
+      uint64_t pending_items();
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_WRITE_QUEUE_H */
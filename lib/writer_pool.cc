@@ -0,0 +1,92 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <stdexcept>
+#include <boost/bind.hpp>
+#include "channel_writer.h"
+#include "writer_pool.h"
+
+namespace gr {
+  namespace drf {
+
+    writer_pool::writer_pool(const std::vector<channel_writer *> &channels,
+                             int num_threads)
+      : d_channels(channels), d_busy(channels.size(), false), d_next(0),
+        d_done(false)
+    {
+      int i;
+
+      if(num_threads < 1) {
+        throw std::invalid_argument("Number of writer threads must be >= 1");
+      }
+      for(i=0; i<num_threads; i++) {
+        d_threads.create_thread(boost::bind(&writer_pool::run, this));
+      }
+    }
+
+    writer_pool::~writer_pool()
+    {
+      {
+        gr::thread::scoped_lock lock(d_mutex);
+        d_done = true;
+        d_cond.notify_all();
+      }
+      d_threads.join_all();
+    }
+
+    void
+    writer_pool::notify()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      d_cond.notify_one();
+    }
+
+    void
+    writer_pool::run()
+    {
+      gr::thread::scoped_lock lock(d_mutex);
+      size_t n = d_channels.size();
+      size_t i, k;
+      bool queued;
+
+      while(true) {
+        // next idle channel with work, starting after the last one served
+        queued = false;
+        for(k=0; k<n; k++) {
+          i = (d_next + k) % n;
+          if(d_channels[i]->has_queued()) {
+            queued = true;
+            if(!d_busy[i]) {
+              break;
+            }
+          }
+        }
+
+        if(k == n) {
+          if(d_done && !queued) {
+            return;
+          }
+          d_cond.wait(lock);
+          continue;
+        }
+
+        d_busy[i] = true;
+        d_next = (i + 1) % n;
+        lock.unlock();
+        d_channels[i]->write_queued();
+        lock.lock();
+        d_busy[i] = false;
+        // another thread may be waiting on this channel
+        d_cond.notify_all();
+      }
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
@@ -0,0 +1,54 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_WRITER_POOL_H
+#define INCLUDED_GRDRF_WRITER_POOL_H
+
+#include <vector>
+#include <gnuradio/thread/thread.h>
+
+namespace gr {
+  namespace drf {
+
+    class channel_writer;
+
+    /*!
+     * \brief Threads that write the queued blocks of a set of channels.
+     *
+     * Each thread takes one block at a time from the next channel in
+     * round-robin order that has work and is not already being written by
+     * another thread, so a busy channel cannot starve the others and the
+     * blocks of one channel are always written in order.
+     *
+     * The destructor writes everything still queued before joining.
+     */
+    class writer_pool
+    {
+     private:
+      std::vector<channel_writer *> d_channels;
+      std::vector<bool> d_busy;
+      size_t d_next;
+      bool d_done;
+
+      gr::thread::thread_group d_threads;
+      gr::thread::mutex d_mutex;
+      gr::thread::condition_variable d_cond;
+
+      void run();
+
+     public:
+      writer_pool(const std::vector<channel_writer *> &channels,
+                  int num_threads);
+      ~writer_pool();
+
+      //! Wake a thread after a channel has queued a block.
+      void notify();
+    };
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_WRITER_POOL_H */
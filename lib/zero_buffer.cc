@@ -0,0 +1,49 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <sys/mman.h>
+#include <stdexcept>
+#include <boost/thread/once.hpp>
+#include "zero_buffer.h"
+
+namespace gr {
+  namespace drf {
+
+    namespace {
+
+      boost::once_flag zero_once = BOOST_ONCE_INIT;
+      const char *zero_region = NULL;
+
+      void
+      map_zero_region()
+      {
+        void *p;
+
+        p = mmap(NULL, ZERO_BUFFER_SIZE, PROT_READ,
+                 MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+        if(p != MAP_FAILED) {
+          zero_region = (const char *)p;
+        }
+      }
+
+    } // anonymous namespace
+
+    const char *
+    zero_buffer()
+    {
+      boost::call_once(zero_once, map_zero_region);
+      if(!zero_region) {
+        throw std::runtime_error("Failed to map zero buffer");
+      }
+      return zero_region;
+    }
+
+  } /* namespace drf */
+} /* namespace gr */
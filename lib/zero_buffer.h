@@ -0,0 +1,31 @@
+/* -*- c++ -*- */
+/*
+ * Copyright (c) 2017 Massachusetts Institute of Technology
+ *
+ */
+
+#ifndef INCLUDED_GRDRF_ZERO_BUFFER_H
+#define INCLUDED_GRDRF_ZERO_BUFFER_H
+
+#include <stddef.h>
+
+namespace gr {
+  namespace drf {
+
+    //! Size in bytes of the region returned by zero_buffer().
+    const size_t ZERO_BUFFER_SIZE = 10000000;
+
+    /*!
+     * \brief Read-only region of ZERO_BUFFER_SIZE zero bytes.
+     *
+     * One region is shared by every writer in the process. It is mapped
+     * on first use as anonymous memory that is never written, so its pages
+     * all map the kernel's zero page and it adds next to nothing to the
+     * resident size.
+     */
+    const char *zero_buffer();
+
+  } // namespace drf
+} // namespace gr
+
+#endif /* INCLUDED_GRDRF_ZERO_BUFFER_H */
@@ -27,7 +27,7 @@ description here (python/__init__.py).
 try:
 	# this might fail if the module is python-only
 	#from drf_swig import *
-	from drf_swig import digital_rf_sink
+	from drf_swig import digital_rf_sink, digital_rf_multi_sink
 except ImportError:
 	pass
 
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2017 Massachusetts Institute of Technology
+#
+"""Tests for the multi-channel Digital RF sink."""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pmt
+from gnuradio import blocks, gr, gr_unittest
+from digital_rf import DigitalRFReader
+
+import gr_drf
+
+
+def rx_time_tag(secs):
+    tag = gr.tag_t()
+    tag.offset = 0
+    tag.key = pmt.intern('rx_time')
+    tag.value = pmt.make_tuple(pmt.from_uint64(secs), pmt.from_double(0.0))
+    return tag
+
+
+class qa_digital_rf_multi_sink(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.topdir = tempfile.mkdtemp()
+        self.tb = gr.top_block()
+
+    def tearDown(self):
+        self.tb = None
+        shutil.rmtree(self.topdir)
+
+    def test_001_channels(self):
+        # 1 kHz starting at 1 s, so 2500 samples span three 1 s files
+        nsamples = 2500
+        data = [
+            np.arange(nsamples, dtype=np.float32)*(1 + 1j),
+            np.arange(nsamples, dtype=np.float32)*(1 - 2j),
+        ]
+        chs = ['ch0', 'ch1']
+        dst = gr_drf.digital_rf_multi_sink(
+            [os.path.join(self.topdir, ch) for ch in chs], 8, 3600, 1000,
+            1000, 1, 'qa_digital_rf_multi_sink', True, 1, False, True, 0,
+            False, 2,
+        )
+        dst.set_quiet(True)
+        self.assertEqual(dst.num_channels(), 2)
+        for k in range(2):
+            src = blocks.vector_source_c(
+                data[k].tolist(), False, 1, (rx_time_tag(1),),
+            )
+            self.tb.connect(src, (dst, k))
+        self.tb.run()
+
+        reader = DigitalRFReader(self.topdir)
+        self.assertEqual(sorted(reader.get_channels()), chs)
+        for k, ch in enumerate(chs):
+            stats = dst.stats(k)
+            self.assertEqual(stats.samples_written, nsamples)
+            self.assertEqual(stats.samples_dropped, 0)
+            self.assertEqual(stats.drop_count, 0)
+            self.assertEqual(stats.bytes_written, nsamples*8)
+            result = reader.read_vector(1000, nsamples, ch)
+            self.assertComplexTuplesAlmostEqual(
+                result.reshape(-1), data[k], 6,
+            )
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_digital_rf_multi_sink, 'qa_digital_rf_multi_sink.xml')
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2017 Massachusetts Institute of Technology
+#
+"""Tests for the raw segment converter in apps/drf_convert_raw.py."""
+
+import imp
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from digital_rf import DigitalRFReader
+from gnuradio import gr_unittest
+
+drf_convert_raw = imp.load_source(
+    'drf_convert_raw',
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), os.pardir, 'apps',
+        'drf_convert_raw.py',
+    ),
+)
+
+
+class qa_drf_convert_raw(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.topdir = tempfile.mkdtemp()
+        self.chdir = os.path.join(self.topdir, 'ch0')
+        self.rawdir = os.path.join(self.chdir, 'raw')
+        os.makedirs(self.rawdir)
+        # as written by raw_writer for a 1 kHz complex short channel
+        props = dict(
+            dtype='<i2', is_complex=True, num_subchannels=1,
+            sample_rate_numerator=1000, sample_rate_denominator=1,
+            subdir_cadence_secs=3600, file_cadence_millisecs=1000,
+            uuid_str='qa_drf_convert_raw', compression_level=0,
+            checksum=False, is_continuous=True,
+        )
+        with open(os.path.join(self.rawdir, 'properties.json'), 'w') as f:
+            json.dump(props, f)
+        self.dtype = np.dtype([('r', '<i2'), ('i', '<i2')])
+
+    def tearDown(self):
+        shutil.rmtree(self.topdir)
+
+    def write_segment(self, name, runs, data):
+        data.tofile(os.path.join(self.rawdir, name + '.raw'))
+        np.array(runs, dtype=drf_convert_raw.RUN_DTYPE).tofile(
+            os.path.join(self.rawdir, name + '.idx'),
+        )
+
+    def test_001_convert(self):
+        data = np.zeros(250, dtype=self.dtype)
+        data['r'] = np.arange(250)
+        data['i'] = -np.arange(250)
+        # samples, a drop filled with zeros, then samples again
+        self.write_segment('rf@0.000', [
+            (100, 200, 0),
+            (300, 100, drf_convert_raw.ZEROS),
+            (400, 50, 200*self.dtype.itemsize),
+        ], data)
+        # still being written, so left for later
+        data[:10].tofile(os.path.join(self.rawdir, 'rf@1.000.raw'))
+
+        failed = drf_convert_raw.convert([self.chdir], jobs=1, verbose=False)
+        self.assertEqual(failed, 0)
+
+        expected = np.zeros(350, dtype=self.dtype)
+        expected[:200] = data[:200]
+        expected[300:] = data[200:]
+        reader = DigitalRFReader(self.topdir)
+        result = reader.read_vector_raw(100, 350, 'ch0')
+        self.assertEqual(
+            list(result['r'].reshape(-1)), list(expected['r']),
+        )
+        self.assertEqual(
+            list(result['i'].reshape(-1)), list(expected['i']),
+        )
+
+        self.assertEqual(
+            sorted(os.listdir(self.rawdir)),
+            ['properties.json', 'rf@1.000.raw'],
+        )
+
+    def test_002_keep(self):
+        data = np.arange(20, dtype='<i2').view(self.dtype)
+        self.write_segment('rf@0.000', [(0, 10, 0)], data)
+
+        failed = drf_convert_raw.convert(
+            [self.chdir], jobs=1, keep=True, verbose=False,
+        )
+        self.assertEqual(failed, 0)
+        self.assertEqual(
+            sorted(os.listdir(self.rawdir)),
+            ['properties.json', 'rf@0.000.idx', 'rf@0.000.raw'],
+        )
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_drf_convert_raw, 'qa_drf_convert_raw.xml')
@@ -64,6 +64,17 @@
 }
 
 
+// worker program names and multi sink channel directories
+%include "std_string.i"
+%include "std_vector.i"
+%template(drf_string_vector) std::vector<std::string>;
+
+// statistics returned by stats()
+%include "gr_drf/writer_stats.h"
+
 %include "gr_drf/digital_rf_sink.h"
 GR_SWIG_BLOCK_MAGIC2(drf, digital_rf_sink);
 
+%include "gr_drf/digital_rf_multi_sink.h"
+GR_SWIG_BLOCK_MAGIC2(drf, digital_rf_multi_sink);
+